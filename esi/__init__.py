@@ -10,29 +10,56 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
-import argparse
+# Importing esi must stay cheap: openstack, keystoneauth and the lease
+# modules are only imported once something that needs them is used.
+import importlib
 import typing as ty
 
-import esi.connection
+if ty.TYPE_CHECKING:
+    import argparse
 
-from openstack._log import enable_logging
-import openstack.config
+    import esi.connection
 
 __all__ = [
     'connect',
     'enable_logging',
+    'ESIConnection',
 ]
 
+# Attributes imported on first access, by name.
+_LAZY_ATTRIBUTES = {
+    'enable_logging': ('openstack._log', 'enable_logging'),
+    'ESIConnection': ('esi.connection', 'ESIConnection'),
+}
+_LAZY_SUBMODULES = ('cloud', 'connection', 'lease')
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module, attr = _LAZY_ATTRIBUTES[name]
+        value = getattr(importlib.import_module(module), attr)
+    elif name in _LAZY_SUBMODULES:
+        value = importlib.import_module('esi.' + name)
+    else:
+        raise AttributeError("module 'esi' has no attribute %r" % name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES)
+                  | set(_LAZY_SUBMODULES))
+
 
 def connect(
     cloud: ty.Optional[str] = None,
     app_name: ty.Optional[str] = None,
     app_version: ty.Optional[str] = None,
-    options: ty.Optional[argparse.Namespace] = None,
+    options: ty.Optional['argparse.Namespace'] = None,
     load_yaml_config: bool = True,
     load_envvars: bool = True,
     **kwargs,
-) -> esi.connection.ESIConnection:
+) -> 'esi.connection.ESIConnection':
     """Create a :class:`~esi.connection.ESIConnection`
 
     :param string cloud:
@@ -56,6 +83,9 @@ def connect(
     :raises: keystoneauth1.exceptions.MissingRequiredOptions
         on missing required auth parameters
     """
+    from esi import connection
+    import openstack.config
+
     cloud_region = openstack.config.get_cloud_region(
         cloud=cloud,
         app_name=app_name,
@@ -65,7 +95,7 @@ def connect(
         options=options,
         **kwargs,
     )
-    return esi.connection.ESIConnection(
+    return connection.ESIConnection(
         config=cloud_region,
         vendor_hook=kwargs.get('vendor_hook'),
     )
@@ -0,0 +1,150 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextlib
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+#: The directory used when ``token_cache`` is set to ``True``.
+DEFAULT_DIRECTORY = os.path.join('~', '.cache', 'esisdk', 'tokens')
+
+#: Tokens expiring within this many seconds are not reused.
+STALE_DURATION = 60
+
+
+@contextlib.contextmanager
+def _locked(path, exclusive):
+    """Hold a lock on ``path`` + ``.lock``, where supported."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+class TokenCache:
+    """Tokens and service catalogs shared by processes through files.
+
+    There is one file per set of authentication options, named after
+    :meth:`keystoneauth1.identity.base.BaseIdentityPlugin.get_cache_id`,
+    so different clouds, users and projects never share a token. The
+    directory is only accessible to its owner and each file is readable and
+    writable by its owner only.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        """Create a token cache.
+
+        :param str directory: The directory holding the token files.
+        """
+        self.directory = os.path.expanduser(directory)
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a token cache from the ``token_cache`` setting.
+
+        :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+        :returns: A :class:`TokenCache`, or ``None`` when the setting is
+            unset or false. ``True`` selects :data:`DEFAULT_DIRECTORY`; any
+            other value is the directory to use.
+        """
+        value = config.config.get('token_cache')
+        if isinstance(value, str) and value.lower() in ('true', 'false'):
+            value = value.lower() == 'true'
+        if not value:
+            return None
+        return cls() if value is True else cls(value)
+
+    def _path(self, auth):
+        cache_id = auth.get_cache_id()
+        if not cache_id:
+            return None
+        return os.path.join(self.directory, cache_id + '.json')
+
+    def load(self, auth):
+        """Install the cached token of ``auth``, if any is still valid.
+
+        :param auth: A keystoneauth identity plugin.
+        :returns: Whether a token was installed.
+        """
+        path = self._path(auth)
+        if path is None or not os.path.exists(path):
+            return False
+        with _locked(path, exclusive=False):
+            try:
+                with open(path) as f:
+                    state = f.read()
+            except OSError:
+                return False
+        try:
+            auth.set_auth_state(state)
+        except (ValueError, KeyError, TypeError):
+            auth.set_auth_state(None)
+            return False
+        if auth.auth_ref.will_expire_soon(STALE_DURATION):
+            auth.set_auth_state(None)
+            return False
+        return True
+
+    def save(self, auth):
+        """Store the current token of ``auth``.
+
+        :param auth: A keystoneauth identity plugin.
+        """
+        path = self._path(auth)
+        state = auth.get_auth_state()
+        if path is None or state is None:
+            return
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        # makedirs leaves the mode of an existing directory unchanged.
+        os.chmod(self.directory, 0o700)
+        with _locked(path, exclusive=True):
+            # mkstemp creates the file readable by its owner only.
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.token-')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    f.write(state)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def attach(self, auth):
+        """Reuse a cached token for ``auth`` and cache the new ones.
+
+        Every token obtained by the plugin from then on is written to the
+        cache as soon as it is received.
+
+        :param auth: A keystoneauth identity plugin.
+        """
+        if not hasattr(auth, 'get_cache_id'):
+            return
+        self.load(auth)
+        get_access = auth.get_access
+
+        def get_access_and_save(session, **kwargs):
+            previous = auth.auth_ref
+            result = get_access(session, **kwargs)
+            if result is not previous:
+                self.save(auth)
+            return result
+
+        auth.get_access = get_access_and_save
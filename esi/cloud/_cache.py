@@ -0,0 +1,200 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import logging
+import threading
+import time
+import uuid
+
+import dogpile.cache
+from dogpile.cache import api as dogpile_api
+
+_log = logging.getLogger(__name__)
+
+#: Prefix of the cache keys and of the ``cache.expiration`` settings.
+PREFIX = 'esi.lease'
+
+# Arguments which change how results are fetched, not which are returned.
+_TRANSPORT_ARGS = ('prefetch', 'stream')
+
+
+def _async_creation_runner(cache, key, creator, mutex):
+    """Regenerate an expired value in the background.
+
+    dogpile serves the stale value to the callers in the meantime, and
+    keeps serving it when regenerating fails.
+    """
+    def runner():
+        try:
+            cache.set(key, creator())
+        except Exception:
+            _log.warning('Revalidation of the lease cache entry %s failed',
+                         key, exc_info=True)
+        finally:
+            mutex.release()
+
+    threading.Thread(target=runner, daemon=True).start()
+
+
+class LeaseCache:
+    """A cache of lease service reads.
+
+    Entries are stored as plain dicts, so any dogpile backend can be used,
+    including shared ones such as ``dogpile.cache.dbm`` (a file) or
+    ``dogpile.cache.memcached``. Each resource has its own expiration time;
+    a resource without one is not cached.
+
+    Entries are never invalidated one by one. Instead, every key embeds a
+    generation stored in the backend itself, and :meth:`invalidate` replaces
+    it, so invalidations are seen by every process sharing the backend.
+    """
+
+    def __init__(self, cache_class='dogpile.cache.null', arguments=None,
+                 expirations=None, stale_while_revalidate=0):
+        """Create a lease cache.
+
+        :param str cache_class: The dogpile backend to use.
+        :param dict arguments: The arguments of the dogpile backend.
+        :param dict expirations: A mapping of resource names (``offers``,
+            ``leases``, ``nodes``, ``events``, ``offer``, ``lease`` and
+            ``not_found`` for missing resources) to expiration times in
+            seconds.
+        :param int stale_while_revalidate: When set, an expired entry
+            younger than its expiration time plus this many seconds is still
+            returned while it is refreshed in the background.
+        """
+        self.expirations = dict(expirations or {})
+        self.stale_while_revalidate = stale_while_revalidate
+        self.enabled = (cache_class != 'dogpile.cache.null'
+                        and any(self.expirations.values()))
+        runner = _async_creation_runner if stale_while_revalidate else None
+        self._region = dogpile.cache.make_region(
+            async_creation_runner=runner
+        ).configure(cache_class, arguments=arguments or {})
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a lease cache from a cloud region configuration.
+
+        The backend is the one of the ``cache`` section of ``clouds.yaml``;
+        expiration times are read from its ``expiration`` mapping using keys
+        such as ``esi.lease.offers``. The stale window is read from the
+        ``lease_cache_stale_while_revalidate`` option.
+
+        :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+        """
+        prefix = PREFIX + '.'
+        expirations = {
+            key[len(prefix):]: float(value)
+            for key, value in config.get_cache_expirations().items()
+            if key.startswith(prefix)
+        }
+        return cls(
+            cache_class=config.get_cache_class(),
+            arguments=config.get_cache_arguments(),
+            expirations=expirations,
+            stale_while_revalidate=float(config.config.get(
+                'lease_cache_stale_while_revalidate') or 0),
+        )
+
+    def caches(self, resource, negative=False):
+        """Whether reads of a resource are cached.
+
+        :param str resource: The resource name, e.g. ``offers``.
+        :param bool negative: Whether caching missing resources counts.
+        """
+        return self.enabled and bool(
+            self.expirations.get(resource)
+            or (negative and self.expirations.get('not_found')))
+
+    def _generation(self):
+        key = PREFIX + '.generation'
+        generation = self._region.get(key, ignore_expiration=True)
+        if generation is dogpile_api.NO_VALUE:
+            generation = uuid.uuid4().hex
+            self._region.set(key, generation)
+        return generation
+
+    def _key(self, resource, params):
+        params = {k: v for k, v in params.items()
+                  if k not in _TRANSPORT_ARGS}
+        return '.'.join([
+            PREFIX, self._generation(), resource,
+            json.dumps(params, sort_keys=True, default=str),
+        ])
+
+    def _get_or_create(self, key, expiration, creator):
+        if self.stale_while_revalidate:
+            # Entries past the stale window are refetched synchronously.
+            max_age = expiration + self.stale_while_revalidate
+            if self._region.get(key, expiration_time=max_age) \
+                    is dogpile_api.NO_VALUE:
+                self._region.delete(key)
+        return self._region.get_or_create(key, creator,
+                                          expiration_time=expiration)
+
+    def list(self, resource, creator, **params):
+        """Return a cached listing.
+
+        :param str resource: The resource name, e.g. ``offers``.
+        :param callable creator: Returns the list of items on a cache miss.
+        :param dict params: The query parameters of the listing.
+        :returns: The list of items.
+        """
+        expiration = self.expirations.get(resource)
+        if not self.caches(resource):
+            return creator()
+        return self._get_or_create(self._key(resource, params), expiration,
+                                   creator)
+
+    def get(self, resource, creator, not_found, **params):
+        """Return a cached resource, caching misses as well.
+
+        :param str resource: The resource name, e.g. ``lease``.
+        :param callable creator: Returns the item on a cache miss and raises
+            ``not_found`` when the resource does not exist.
+        :param not_found: The exception class signalling a missing resource.
+        :param dict params: The ID and parameters of the request.
+        :returns: The item.
+        :raises: ``not_found`` when the resource is missing, including when
+            that was cached.
+        """
+        expiration = self.expirations.get(resource)
+        negative = self.expirations.get('not_found')
+        if not self.caches(resource, negative=True):
+            return creator()
+        key = self._key(resource, params)
+        cached = self._region.get(key, ignore_expiration=True)
+        if cached is not dogpile_api.NO_VALUE:
+            age = time.time() - cached['time']
+            if cached['missing'] and negative and age < negative:
+                raise not_found("No %s found for %s (cached)"
+                                % (resource, params.get('id')))
+            if not cached['missing'] and expiration and age < expiration:
+                return cached['value']
+        try:
+            value = creator()
+        except not_found:
+            if negative:
+                self._region.set(key, {'time': time.time(), 'missing': True,
+                                       'value': None})
+            raise
+        if expiration:
+            self._region.set(key, {'time': time.time(), 'missing': False,
+                                   'value': value})
+        return value
+
+    def invalidate(self):
+        """Invalidate every cached lease service read."""
+        if self.enabled:
+            self._region.set(PREFIX + '.generation', uuid.uuid4().hex)
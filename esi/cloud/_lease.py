@@ -10,7 +10,17 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
+
+from esi.cloud import _cache
+from esi.lease.v1 import _common
 from esi.lease.v1._proxy import Proxy
+from esi.lease.v1 import _singleflight
+from esi.lease.v1 import event as _event
+from esi.lease.v1 import lease as _lease
+from esi.lease.v1 import node as _node
+from esi.lease.v1 import offer as _offer
+from openstack import exceptions
 
 
 class LeaseCloudMixin:
@@ -18,44 +28,165 @@ class LeaseCloudMixin:
 
     def __init__(self):
         super(LeaseCloudMixin, self).__init__()
-        self.cache_enabled = False
+        self._lease_cache = _cache.LeaseCache.from_config(self.config)
+
+    def configure_lease_cache(self, cache_class='dogpile.cache.memory',
+                              arguments=None, expirations=None,
+                              stale_while_revalidate=0):
+        """Replace the cache of lease service reads.
+
+        See :class:`~esi.cloud._cache.LeaseCache` for the parameters. By
+        default the cache is configured from ``clouds.yaml``.
+        """
+        self._lease_cache = _cache.LeaseCache(
+            cache_class=cache_class, arguments=arguments,
+            expirations=expirations,
+            stale_while_revalidate=stale_while_revalidate)
+
+    @staticmethod
+    def _share_items(items):
+        return [(type(item), item._snapshot())
+                if isinstance(item, _common.FetchMixin) else (None, item)
+                for item in items]
+
+    def _own_items(self, shared):
+        return [copy.deepcopy(item) if cls is None
+                else cls.existing(connection=self)._restore(item)
+                for cls, item in shared]
+
+    def _list_cached(self, resource, resource_type, list_func, **kwargs):
+        def fetch():
+            # Identical concurrent listings share one series of requests.
+            # The others rebuild their own items from a copy of its state.
+            owned = []
+            items = self.lease.single_flight.do(
+                _singleflight.key('list', resource, kwargs),
+                lambda: owned.append(list(list_func(**kwargs))) or owned[0],
+                share=self._share_items)
+            return items if owned else self._own_items(items)
+
+        if kwargs.get('raw') or not self._lease_cache.caches(resource):
+            return fetch()
+        items = self._lease_cache.list(
+            resource,
+            lambda: [r.to_dict(headers=False, computed=False)
+                     for r in fetch()],
+            **kwargs)
+        return [resource_type.existing(connection=self, **item)
+                for item in items]
+
+    def _get_cached(self, resource, resource_type, get_func, value, fields):
+        if not self._lease_cache.caches(resource, negative=True):
+            return get_func(value, fields=fields)
+        item = self._lease_cache.get(
+            resource,
+            lambda: get_func(value, fields=fields).to_dict(headers=False,
+                                                           computed=False),
+            exceptions.ResourceNotFound,
+            id=resource_type._get_id(value), fields=fields)
+        return resource_type.existing(connection=self, **item)
+
+    def _invalidating(self, func, *args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            # Even a failed call may have changed something.
+            self._lease_cache.invalidate()
 
     def list_offers(self, **kwargs):
         """Return a list of all offers."""
-        return list(self.lease.offers(**kwargs))
+        return self._list_cached('offers', _offer.Offer, self.lease.offers,
+                                 **kwargs)
+
+    def get_offer(self, offer, fields=None):
+        """Get an offer"""
+        return self._get_cached('offer', _offer.Offer, self.lease.get_offer,
+                                offer, fields)
 
     def create_offer(self, resource_uuid, node_type, **kwargs):
         """Create an offer"""
-        return self.lease.create_offer(resource_uuid=resource_uuid,
-                                       node_type=node_type,
-                                       **kwargs)
+        return self._invalidating(self.lease.create_offer,
+                                  resource_uuid=resource_uuid,
+                                  node_type=node_type, **kwargs)
 
     def delete_offer(self, offer):
         """Delete an offer"""
-        return self.lease.delete_offer(offer)
+        return self._invalidating(self.lease.delete_offer, offer)
+
+    def create_offers(self, offers, **kwargs):
+        """Create many offers concurrently and wait for the results"""
+        return self._invalidating(
+            lambda: self.lease.create_offers(offers, **kwargs).wait())
+
+    def delete_offers(self, offers, **kwargs):
+        """Delete many offers concurrently and wait for the results"""
+        return self._invalidating(
+            lambda: self.lease.delete_offers(offers, **kwargs).wait())
 
     def claim_offer(self, offer, **kwargs):
         """Claim an offer"""
-        return self.lease.claim_offer(offer, **kwargs)
+        return self._invalidating(self.lease.claim_offer, offer,
+                                  **kwargs)
 
     def list_leases(self, **kwargs):
         """Return a list of all leases"""
-        return list(self.lease.leases(**kwargs))
+        return self._list_cached('leases', _lease.Lease, self.lease.leases,
+                                 **kwargs)
+
+    def get_lease(self, lease, fields=None):
+        """Get a lease"""
+        return self._get_cached('lease', _lease.Lease, self.lease.get_lease,
+                                lease, fields)
 
     def create_lease(self, resource_uuid, project_id, **kwargs):
         """Create a lease"""
-        return self.lease.create_lease(resource_uuid=resource_uuid,
-                                       project_id=project_id,
-                                       **kwargs)
+        return self._invalidating(self.lease.create_lease,
+                                  resource_uuid=resource_uuid,
+                                  project_id=project_id, **kwargs)
 
     def delete_lease(self, lease):
         """Delete a lease"""
-        return self.lease.delete_lease(lease)
+        return self._invalidating(self.lease.delete_lease, lease)
+
+    def create_leases(self, leases, **kwargs):
+        """Create many leases concurrently and wait for the results"""
+        return self._invalidating(
+            lambda: self.lease.create_leases(leases, **kwargs).wait())
+
+    def update_leases(self, updates, **kwargs):
+        """Update many leases concurrently and wait for the results"""
+        return self._invalidating(
+            lambda: self.lease.update_leases(updates, **kwargs).wait())
 
-    def list_nodes(self):
+    def delete_leases(self, leases, **kwargs):
+        """Delete many leases concurrently and wait for the results"""
+        return self._invalidating(
+            lambda: self.lease.delete_leases(leases, **kwargs).wait())
+
+    def list_nodes(self, **kwargs):
         """Return a list of all nodes info"""
-        return list(self.lease.nodes())
+        return self._list_cached('nodes', _node.Node, self.lease.nodes,
+                                 **kwargs)
 
     def list_events(self, **kwargs):
         """Return a list of events"""
-        return list(self.lease.events(**kwargs))
+        return self._list_cached('events', _event.Event, self.lease.events,
+                                 **kwargs)
+
+    def get_lease_metrics(self, output='dict'):
+        """Return the metrics of the lease calls of this connection.
+
+        Metrics are collected from the first call of this method, or from
+        the start with the ``lease_metrics`` setting.
+
+        :param str output: ``dict`` for a snapshot, see
+            :meth:`~esi.lease.v1._metrics.LeaseMetrics.snapshot`, or
+            ``prometheus`` for the Prometheus text format.
+        """
+        metrics = self.lease.enable_metrics()
+        if output == 'prometheus':
+            return metrics.prometheus()
+        if output == 'dict':
+            return metrics.snapshot()
+        raise ValueError("output must be 'dict' or 'prometheus', not %r"
+                         % output)
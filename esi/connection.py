@@ -11,6 +11,7 @@
 #    under the License.
 
 from esi import _services_mixin
+from esi import _token_cache
 from esi.cloud import _lease
 from openstack import connection
 
@@ -20,3 +21,24 @@ class ESIConnection(connection.Connection,
                     _lease.LeaseCloudMixin):
     def __init__(self, **kwargs):
         super(ESIConnection, self).__init__(**kwargs)
+        # openstack's Connection initializes its own mixins explicitly and
+        # never chains to ours.
+        _lease.LeaseCloudMixin.__init__(self)
+        token_cache = _token_cache.TokenCache.from_config(self.config)
+        if token_cache is not None and self.session.auth is not None:
+            token_cache.attach(self.session.auth)
+        self._async_lease = None
+
+    @property
+    def async_lease(self):
+        """The asyncio counterpart of the ``lease`` proxy.
+
+        The returned :class:`~esi.lease.v1._async_proxy.AsyncProxy` shares
+        authentication with :attr:`lease`. Close it with ``await
+        conn.async_lease.close()`` or use it as an async context manager.
+        """
+        if self._async_lease is None:
+            # Imported here as it pulls in aiohttp, when installed.
+            from esi.lease.v1 import _async_proxy
+            self._async_lease = _async_proxy.AsyncProxy(self.lease)
+        return self._async_lease
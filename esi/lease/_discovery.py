@@ -0,0 +1,128 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+#: The default lifetime of discovered endpoints, in seconds.
+DEFAULT_TTL = 300
+
+# Discovered endpoints of this process, shared by all connections.
+_entries = {}
+_lock = threading.Lock()
+
+
+def cache_key(config):
+    """Return the key of the lease endpoint of a cloud region.
+
+    :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+    """
+    return json.dumps([
+        config.get_auth_args().get('auth_url'),
+        config.get_region_name('lease'),
+        config.get_interface('lease'),
+        config.get_endpoint('lease'),
+        config.get_api_version('lease'),
+    ])
+
+
+class DiscoveryCache:
+    """A cache of the discovered lease endpoint URLs and API versions.
+
+    Entries are kept in memory for the whole process and, when ``path`` is
+    set, in a JSON file shared with other processes.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, path=None):
+        """Create a cache.
+
+        :param float ttl: How long entries are used, in seconds.
+        :param str path: The path of the file to share entries through.
+        """
+        self.ttl = ttl
+        self.path = path
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a cache from the settings of a cloud region.
+
+        The settings are ``lease_discovery_cache_ttl``, in seconds, where 0
+        disables the cache, and ``lease_discovery_cache_file``.
+
+        :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+        """
+        ttl = config.config.get('lease_discovery_cache_ttl')
+        return cls(ttl=DEFAULT_TTL if ttl is None else float(ttl),
+                   path=config.config.get('lease_discovery_cache_file'))
+
+    def _fresh(self, entry):
+        return entry is not None and time.time() - entry['time'] < self.ttl
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, key):
+        """Return the cached endpoint of a key, or ``None``.
+
+        :returns: A dict with the ``service_url`` and the ``api_version``
+            as a list of integers.
+        """
+        if self.ttl <= 0:
+            return None
+        with _lock:
+            entry = _entries.get(key)
+        if not self._fresh(entry) and self.path:
+            entry = self._load().get(key)
+            if self._fresh(entry):
+                with _lock:
+                    _entries[key] = entry
+        return entry if self._fresh(entry) else None
+
+    def set(self, key, service_url, api_version):
+        """Cache the endpoint of a key.
+
+        :param str service_url: The URL of the lease service.
+        :param tuple api_version: The discovered API version.
+        """
+        if self.ttl <= 0:
+            return
+        entry = {'service_url': service_url,
+                 'api_version': list(api_version),
+                 'time': time.time()}
+        with _lock:
+            _entries[key] = entry
+        if self.path:
+            entries = {k: v for k, v in self._load().items()
+                       if self._fresh(v)}
+            entries[key] = entry
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix='.discovery-')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entries, f)
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+
+def clear():
+    """Forget the endpoints discovered by this process."""
+    with _lock:
+        _entries.clear()
@@ -10,7 +10,12 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from esi.lease import _discovery
+from esi.lease.v1 import _pool
 from esi.lease.v1 import _proxy
+from esi.lease.v1 import _ratelimit
+from esi.lease.v1 import _retry
+from esi.lease.v1 import _tracing
 from openstack import service_description
 
 import warnings
@@ -29,6 +34,62 @@ class LeaseService(service_description.ServiceDescription):
     def _make_proxy(self, instance):
         """Override _make_proxy() for esi lease service.
 
+        The discovered endpoint is cached, see
+        :class:`~esi.lease._discovery.DiscoveryCache`. The connection pool,
+        timeout, retry and rate limit options of the lease service, such as
+        ``lease_pool_maxsize``, ``lease_timeout_read``,
+        ``lease_retry_max_attempts`` or ``lease_rate_limit_read``, are
+        applied to the proxy, whose metrics are enabled by ``lease_metrics``
+        and tracing disabled by ``lease_tracing``.
+
+        :param instance:
+          The `esi.connection.Connection` we're working with.
+        """
+        config = instance.config
+        cache = _discovery.DiscoveryCache.from_config(config)
+        key = _discovery.cache_key(config)
+        proxy_obj = self._cached_proxy(config, cache.get(key))
+        if proxy_obj is None:
+            proxy_obj = self._discover_proxy(instance)
+            if isinstance(proxy_obj, _proxy.Proxy):
+                data = proxy_obj.get_endpoint_data()
+                if data and data.api_version:
+                    cache.set(key, data.url, data.api_version)
+        if isinstance(proxy_obj, _proxy.Proxy):
+            options = _pool.pool_options(config)
+            endpoint = proxy_obj.get_endpoint() if options else None
+            if endpoint:
+                _pool.mount(proxy_obj.session, endpoint, **options)
+            proxy_obj.timeouts = _pool.timeouts(config)
+            proxy_obj.retry_policy = _retry.RetryPolicy.from_config(config)
+            proxy_obj.rate_limiter = _ratelimit.RateLimiter.from_config(
+                config)
+            if _pool.to_bool(config.config.get('lease_metrics', False)):
+                proxy_obj.enable_metrics()
+            if not _pool.to_bool(config.config.get('lease_tracing', True)):
+                proxy_obj.tracer = _tracing.NOOP
+        return proxy_obj
+
+    def _cached_proxy(self, config, cached):
+        """Create the proxy from a cached endpoint, without any request.
+
+        :param config: The cloud region of the connection.
+        :param dict cached: The cached endpoint, see
+            :class:`~esi.lease._discovery.DiscoveryCache`.
+        :returns: The proxy, or ``None`` if the endpoint is not usable.
+        """
+        if not cached:
+            return None
+        proxy_class = self.supported_versions.get(
+            str(cached['api_version'][0]))
+        if not proxy_class:
+            return None
+        config.config['lease_endpoint_override'] = cached['service_url']
+        return config.get_session_client('lease', constructor=proxy_class)
+
+    def _discover_proxy(self, instance):
+        """Create the proxy, discovering the API version if needed.
+
         :param instance:
           The `esi.connection.Connection` we're working with.
         """
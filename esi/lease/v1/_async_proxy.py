@@ -0,0 +1,488 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import asyncio
+import ssl
+import urllib.parse
+
+from esi.lease.v1 import _common
+from esi.lease.v1 import _follow
+from esi.lease.v1 import event as _event
+from esi.lease.v1 import lease as _lease
+from esi.lease.v1 import node as _node
+from esi.lease.v1 import offer as _offer
+
+from openstack import exceptions
+from openstack import utils
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+_EXCEPTIONS = {
+    400: exceptions.BadRequestException,
+    403: exceptions.ForbiddenException,
+    404: exceptions.ResourceNotFound,
+    409: exceptions.ConflictException,
+    412: exceptions.PreconditionFailedException,
+}
+
+
+class _PageResponse:
+    """The parts of a page response needed by ``Resource._get_next_link``."""
+
+    def __init__(self, headers, links):
+        self.headers = headers
+        self.links = {
+            rel: {'uri': str(link.get('url'))} for rel, link in links.items()
+        }
+
+
+class AsyncProxy:
+    """An asyncio counterpart of :class:`esi.lease.v1._proxy.Proxy`.
+
+    Authentication, endpoint lookup and TLS settings are taken from the
+    synchronous proxy, so both share one keystone token. HTTP requests are
+    sent through a single :class:`aiohttp.ClientSession`, which lets many
+    lease operations run concurrently on one event loop.
+
+    Requests are sent directly: the retry policy, rate limiter, observers,
+    metrics and tracing of the synchronous proxy do not apply to them.
+
+    The proxy is usually obtained from
+    :attr:`esi.connection.ESIConnection.async_lease` and should be closed
+    with :meth:`close` or used as an async context manager.
+    """
+
+    def __init__(self, proxy, session=None, limit=100):
+        """Create an asyncio lease proxy.
+
+        :param proxy: The synchronous :class:`~esi.lease.v1._proxy.Proxy`
+            providing authentication and the service endpoint.
+        :param session: An optional :class:`aiohttp.ClientSession` to use.
+            A session owned by this proxy is created on first use otherwise.
+        :param int limit: The maximum number of simultaneous connections of
+            the owned session.
+        """
+        if aiohttp is None:
+            raise exceptions.SDKException(
+                "aiohttp is required for asyncio support of the lease "
+                "service. Install it with 'pip install esisdk[async]'."
+            )
+        self._proxy = proxy
+        self._session = session
+        self._owns_session = session is None
+        self._limit = limit
+        self._credentials = None
+        self._credentials_lock = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the aiohttp session if it is owned by this proxy."""
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    def _ssl_context(self):
+        ks_session = self._proxy.session
+        if ks_session.verify is False:
+            return False
+        if isinstance(ks_session.verify, str):
+            context = ssl.create_default_context(cafile=ks_session.verify)
+        else:
+            context = ssl.create_default_context()
+        if ks_session.cert:
+            if isinstance(ks_session.cert, (tuple, list)):
+                context.load_cert_chain(*ks_session.cert)
+            else:
+                context.load_cert_chain(ks_session.cert)
+        return context
+
+    def _get_session(self):
+        if self._session is None:
+            timeout = self._proxy.session.timeout
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self._limit, ssl=self._ssl_context()
+                ),
+                timeout=aiohttp.ClientTimeout(total=timeout),
+            )
+        return self._session
+
+    async def _request(self, method, path, error_message=None, **kwargs):
+        """Send a request to the lease service.
+
+        :returns: A tuple of the response status, headers, links and
+            decoded JSON body (``None`` when the body is empty).
+        :raises: :class:`~openstack.exceptions.HttpException` subclasses for
+            error responses.
+        """
+        credentials = await self._get_credentials()
+        result = await self._send(method, path, credentials, error_message,
+                                  retry=True, **kwargs)
+        if result is None:
+            # The cached token was revoked or has expired.
+            credentials = await self._get_credentials(stale=credentials)
+            result = await self._send(method, path, credentials,
+                                      error_message, **kwargs)
+        return result
+
+    def _resolve_credentials(self, invalidate):
+        if invalidate:
+            self._proxy.session.invalidate()
+        return (self._proxy.get_endpoint(),
+                self._proxy.session.get_auth_headers())
+
+    async def _get_credentials(self, stale=None):
+        """Return the endpoint and the authentication headers.
+
+        keystoneauth may block on the network to issue a token or look up
+        the catalog, so both are resolved in the default executor, then
+        cached until the service rejects the token.
+
+        :param stale: The credentials rejected by the service, which are
+            refreshed unless another coroutine already did.
+        """
+        if self._credentials_lock is None:
+            self._credentials_lock = asyncio.Lock()
+        async with self._credentials_lock:
+            if self._credentials is None or self._credentials is stale:
+                loop = asyncio.get_running_loop()
+                self._credentials = await loop.run_in_executor(
+                    None, self._resolve_credentials, stale is not None)
+            return self._credentials
+
+    async def _send(self, method, path, credentials, error_message,
+                    retry=False, **kwargs):
+        """Send a request, returning ``None`` on 401 when ``retry`` is set."""
+        endpoint, auth_headers = credentials
+        url = path
+        if not urllib.parse.urlparse(path).scheme:
+            url = utils.urljoin(endpoint, path)
+        headers = {'Accept': 'application/json'}
+        headers.update(auth_headers or {})
+
+        session = self._get_session()
+        async with session.request(
+            method, url, headers=headers, **kwargs
+        ) as response:
+            if response.status == 401 and retry:
+                return None
+            content = await response.read()
+            body = None
+            if content:
+                try:
+                    body = await response.json(content_type=None)
+                except ValueError:
+                    body = content.decode('utf-8', 'replace')
+            if response.status >= 400:
+                self._raise_from_response(
+                    response, body, url, error_message
+                )
+            return response.status, response.headers, response.links, body
+
+    @staticmethod
+    def _raise_from_response(response, body, url, error_message):
+        cls = _EXCEPTIONS.get(response.status, exceptions.HttpException)
+        details = None
+        if isinstance(body, dict):
+            messages = [exceptions._extract_message(obj)
+                        for obj in body.values()]
+            if not any(messages):
+                messages = [exceptions._extract_message(body)]
+            details = '\n'.join(msg for msg in messages if msg)
+        if not details:
+            details = response.reason or body
+        error = cls(
+            message=error_message,
+            details=details,
+            http_status=response.status,
+            request_id=response.headers.get('x-openstack-request-id'),
+        )
+        error.url = url
+        raise error
+
+    def _existing(self, resource_type, attrs):
+        attrs.pop('self', None)
+        return resource_type.existing(
+            connection=self._proxy._get_connection(), **attrs
+        )
+
+    async def _list(self, resource_type, fields=None,
+                    allow_unknown_params=False, **query):
+        """Yield resources of ``resource_type`` page by page.
+
+        This mirrors :meth:`esi.lease.v1._common.ListMixin.list`, including
+        pagination, client-side filtering of attributes the server cannot
+        filter on and the rejection of unknown parameters.
+        """
+        base_path = resource_type.base_path
+        api_filters, client_filters = resource_type._split_query(
+            query, base_path, allow_unknown_params)
+        params = resource_type._query_mapping._transpose(
+            api_filters, resource_type
+        )
+        if fields:
+            params['fields'] = resource_type._list_fields(fields)
+        limit = params.get('limit')
+        uri = base_path
+        total_yielded = 0
+        while uri:
+            status, headers, links, data = await self._request(
+                'GET', uri, params=params.copy()
+            )
+            last_marker = params.pop('marker', None)
+            params.pop('limit', None)
+
+            items = data[resource_type.resources_key] if data else []
+            if not isinstance(items, list):
+                items = [items]
+
+            marker = None
+            for item in items:
+                value = self._existing(resource_type, item)
+                marker = value.id
+                total_yielded += 1
+                if _common._matches(client_filters, value):
+                    yield value
+
+            if not items:
+                return
+            uri, next_params = resource_type._get_next_link(
+                uri, _PageResponse(headers, links), data, marker, limit,
+                total_yielded
+            )
+            if next_params.get('marker', object()) == last_marker:
+                raise exceptions.SDKException(
+                    'Endless pagination loop detected, aborting'
+                )
+            params.update(next_params)
+
+    async def _create(self, resource_type, **attrs):
+        res = resource_type.new(**attrs)
+        request = res._prepare_request(requires_id=False, prepend_key=True)
+        status, headers, links, body = await self._request(
+            'POST', request.url, json=request.body
+        )
+        return self._existing(resource_type, body or {})
+
+    async def _get(self, resource_type, value, fields=None):
+        res = self._proxy._get_resource(resource_type, value)
+        params = {}
+        if fields:
+            params['fields'] = _common.fields_type(fields, resource_type)
+        status, headers, links, body = await self._request(
+            'GET',
+            utils.urljoin(resource_type.base_path, res.id),
+            error_message="No {resource_type} found for {value}".format(
+                resource_type=resource_type.__name__, value=value
+            ),
+            params=params,
+        )
+        return self._existing(resource_type, body or {})
+
+    async def _delete(self, resource_type, value, ignore_missing=True):
+        res = self._proxy._get_resource(resource_type, value)
+        try:
+            await self._request(
+                'DELETE', utils.urljoin(resource_type.base_path, res.id)
+            )
+        except exceptions.ResourceNotFound:
+            if ignore_missing:
+                return None
+            raise
+        return res
+
+    def offers(self, **query):
+        """Retrieve an async iterator of offers.
+
+        :param dict query: Optional query parameters to be sent to restrict
+            the offers returned. See
+            :meth:`esi.lease.v1._proxy.Proxy.offers`.
+
+        :returns: An async iterator of offer instances.
+        """
+        return self._list(_offer.Offer, **query)
+
+    async def create_offer(self, **attrs):
+        """Create a new offer from attributes.
+
+        :param dict attrs: Keyword arguments that will be used to create a
+            :class:`~esi_leap.v1.offer.Offer`.
+
+        :returns: The results of offer creation.
+        :rtype: :class:`~esi_leap.v1.offer.Offer`.
+        """
+        return await self._create(_offer.Offer, **attrs)
+
+    async def get_offer(self, offer, fields=None):
+        """Get a specific offer.
+
+        :param offer: The value can be the ID of an offer or a
+            :class:`~esi_leap.v1.offer.Offer` instance.
+        :param fields: Limit the resource fields to fetch.
+
+        :returns: One :class:`~esi_leap.v1.offer.Offer`
+        :raises: :class:`~openstack.exceptions.ResourceNotFound` when no
+            offer matching the name or ID could be found.
+        """
+        return await self._get(_offer.Offer, offer, fields=fields)
+
+    async def delete_offer(self, offer, ignore_missing=True):
+        """Delete an offer.
+
+        :param offer: The value can be either the ID of an offer or
+            a :class:`~esi_leap.v1.offer.Offer` instance.
+        :param bool ignore_missing: When set to ``False``, an exception
+            :class:`~openstack.exceptions.ResourceNotFound` will be raised
+            when the offer could not be found.
+
+        :returns: The result of delete.
+        :rtype: :class:`~esi_leap.v1.offer.Offer`.
+        """
+        return await self._delete(_offer.Offer, offer,
+                                  ignore_missing=ignore_missing)
+
+    async def claim_offer(self, offer, **attrs):
+        """Claim an offer.
+
+        :param offer: Either the ID of a offer or an instance
+            of :class:`~esi_leap.v1.offer.Offer`.
+        :param dict attrs: The attributes of the lease to create.
+
+        :returns: The claimed offer.
+        :rtype: Response json data.
+        """
+        res = self._proxy._get_resource(_offer.Offer, offer)
+        status, headers, links, body = await self._request(
+            'POST',
+            utils.urljoin(_offer.Offer.base_path, res.id, 'claim'),
+            error_message="Failed to claim offer {offer} ".format(
+                offer=res.id),
+            json=attrs,
+        )
+        return body
+
+    def leases(self, **query):
+        """Retrieve an async iterator of leases.
+
+        :param dict query: Optional query parameters to be sent to restrict
+            the leases returned. See
+            :meth:`esi.lease.v1._proxy.Proxy.leases`.
+
+        :returns: An async iterator of lease instances.
+        """
+        return self._list(_lease.Lease, **query)
+
+    async def create_lease(self, **attrs):
+        """Create a new lease from attributes.
+
+        :param dict attrs: Keyword arguments that will be used to create a
+            :class:`~esi_leap.v1.lease.Lease`.
+
+        :returns: The results of lease creation.
+        :rtype: :class:`~esi_leap.v1.lease.Lease`.
+        """
+        return await self._create(_lease.Lease, **attrs)
+
+    async def update_lease(self, lease, **attrs):
+        """Update a lease.
+
+        :param lease: The value can be the ID of a lease or a
+            :class:`~esi_leap.v1.lease.Lease` instance.
+        :param dict attrs: The attributes to update on the lease.
+
+        :returns: The updated lease
+        :rtype: Response json data.
+        """
+        res = self._proxy._get_resource(_lease.Lease, lease)
+        status, headers, links, body = await self._request(
+            'PATCH',
+            utils.urljoin(_lease.Lease.base_path, res.id),
+            error_message="Failed to update lease {lease} ".format(
+                lease=res.id),
+            json=attrs,
+        )
+        return body
+
+    async def get_lease(self, lease, fields=None):
+        """Get a specific lease.
+
+        :param lease: The value can be the ID of a lease or a
+            :class:`~esi_leap.v1.lease.Lease` instance.
+        :param fields: Limit the resource fields to fetch.
+
+        :returns: One :class:`~esi_leap.v1.lease.Lease`
+        :raises: :class:`~openstack.exceptions.ResourceNotFound` when no
+            lease matching the name or ID could be found.
+        """
+        return await self._get(_lease.Lease, lease, fields=fields)
+
+    async def delete_lease(self, lease, ignore_missing=True):
+        """Delete a lease.
+
+        :param lease: The value can be either the ID of a lease or
+            a :class:`~esi_leap.v1.lease.Lease` instance.
+        :param bool ignore_missing: When set to ``False``, an exception
+            :class:`~openstack.exceptions.ResourceNotFound` will be raised
+            when the lease could not be found.
+
+        :returns: The result of delete.
+        :rtype: :class:`~esi_leap.v1.lease.Lease`.
+        """
+        return await self._delete(_lease.Lease, lease,
+                                  ignore_missing=ignore_missing)
+
+    def nodes(self, **query):
+        """Retrieve an async iterator of nodes.
+
+        :returns: An async iterator of node instances.
+        """
+        return self._list(_node.Node, **query)
+
+    def events(self, **query):
+        """Retrieve an async iterator of events.
+
+        :param dict query: Optional query parameters to be sent to restrict
+            the events returned. See
+            :meth:`esi.lease.v1._proxy.Proxy.events`.
+
+        :returns: An async iterator of event instances.
+        """
+        return self._list(_event.Event, **query)
+
+    async def follow_events(self, last_event_id=None, checkpoint=None,
+                            min_interval=_follow.MIN_INTERVAL,
+                            max_interval=_follow.MAX_INTERVAL, **query):
+        """Retrieve a never-ending async iterator of events as they happen.
+
+        See :meth:`esi.lease.v1._proxy.Proxy.follow_events`.
+
+        :returns: An async iterator of event instances.
+        """
+        follower = _follow.EventFollower(
+            last_event_id=last_event_id, checkpoint=checkpoint,
+            min_interval=min_interval, max_interval=max_interval)
+        while True:
+            events = [event async for event in
+                      self.events(**follower.query(query))]
+            for event in follower.new_events(events):
+                yield event
+                follower.advance(event)
+            await asyncio.sleep(follower.interval)
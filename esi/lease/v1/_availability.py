@@ -0,0 +1,165 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import datetime
+import threading
+
+
+def _timestamp(value):
+    """Convert a datetime or an ISO 8601 string to a POSIX timestamp.
+
+    Times without a timezone are in UTC, as returned by esi-leap.
+    """
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def _windows(offer):
+    """Return the availability windows of an offer as timestamp pairs.
+
+    An empty list of availabilities means the offer is fully booked; only
+    when it is missing are the start and end times of the offer used.
+    """
+    if offer.availabilities is not None:
+        windows = offer.availabilities
+    elif offer.start_time and offer.end_time:
+        windows = [(offer.start_time, offer.end_time)]
+    else:
+        return []
+    return [(_timestamp(start), _timestamp(end)) for start, end in windows]
+
+
+class _Tree:
+    """The windows of one resource class, sorted by start.
+
+    A segment tree over the sorted windows holds the latest end of every
+    range of them, so the windows starting before a time and ending after
+    another are found without scanning the others.
+    """
+
+    def __init__(self, windows):
+        windows.sort(key=lambda w: w[0])
+        self.starts = [start for start, _, _ in windows]
+        self.owners = [uuid for _, _, uuid in windows]
+        self.size = 1
+        while self.size < len(windows):
+            self.size *= 2
+        self.max_end = [float('-inf')] * (2 * self.size)
+        for i, (_, end, _) in enumerate(windows):
+            self.max_end[self.size + i] = end
+        for i in range(self.size - 1, 0, -1):
+            self.max_end[i] = max(self.max_end[2 * i],
+                                  self.max_end[2 * i + 1])
+
+    def covering(self, start, end):
+        """Yield the owners of the windows covering ``[start, end]``.
+
+        Owners are yielded by increasing window start, possibly repeated.
+        """
+        limit = bisect.bisect_right(self.starts, start)
+        if not limit:
+            return
+        # Depth-first, left to right, over the nodes holding windows that
+        # start early enough, skipping those ending too soon.
+        stack = [(1, 0, self.size)]
+        while stack:
+            node, low, high = stack.pop()
+            if low >= limit or self.max_end[node] < end:
+                continue
+            if node >= self.size:
+                yield self.owners[low]
+                continue
+            middle = (low + high) // 2
+            stack.append((2 * node + 1, middle, high))
+            stack.append((2 * node, low, middle))
+
+
+class AvailabilityIndex:
+    """An index of the availability windows of offers.
+
+    Offers are grouped by resource class. Each group is indexed on first
+    query after a change, so queries take logarithmic time plus the number
+    of results, and updating a few offers only re-indexes their groups.
+    """
+
+    def __init__(self, offers=()):
+        """Create an index.
+
+        :param offers: The :class:`~esi.lease.v1.offer.Offer` instances to
+            index. Their ``availabilities``, or else their ``start_time``
+            and ``end_time``, are used.
+        """
+        self._lock = threading.Lock()
+        self._offers = {}
+        self._classes = {}
+        self._trees = {}
+        self.update(offers)
+
+    def __len__(self):
+        return len(self._offers)
+
+    def update(self, offers):
+        """Add offers to the index, replacing those with the same UUID."""
+        with self._lock:
+            for offer in offers:
+                self._discard(offer.id)
+                self._offers[offer.id] = offer
+                self._classes.setdefault(offer.resource_class,
+                                         set()).add(offer.id)
+                self._trees.pop(offer.resource_class, None)
+
+    def remove(self, offer):
+        """Remove an offer, given by instance or UUID, from the index."""
+        with self._lock:
+            self._discard(getattr(offer, 'id', offer))
+
+    def _discard(self, uuid):
+        offer = self._offers.pop(uuid, None)
+        if offer is not None:
+            self._classes[offer.resource_class].discard(uuid)
+            self._trees.pop(offer.resource_class, None)
+
+    def _tree(self, resource_class):
+        with self._lock:
+            tree = self._trees.get(resource_class)
+            if tree is None:
+                windows = [
+                    (start, end, uuid)
+                    for uuid in self._classes.get(resource_class, ())
+                    for start, end in _windows(self._offers[uuid])
+                ]
+                tree = self._trees[resource_class] = _Tree(windows)
+            return tree, self._offers
+
+    def find_available(self, resource_class, start, end, count=None):
+        """Return the offers available for a whole time range.
+
+        :param str resource_class: The resource class of the offers.
+        :param start: The start of the range, as a datetime or an ISO 8601
+            string.
+        :param end: The end of the range, as a datetime or an ISO 8601
+            string.
+        :param int count: Return at most this many offers.
+        :returns: A list of :class:`~esi.lease.v1.offer.Offer`, by
+            increasing start of the window covering the range.
+        """
+        tree, offers = self._tree(resource_class)
+        found = {}
+        for uuid in tree.covering(_timestamp(start), _timestamp(end)):
+            if count is not None and len(found) >= count:
+                break
+            found.setdefault(uuid, offers.get(uuid))
+        return [offer for offer in found.values() if offer is not None]
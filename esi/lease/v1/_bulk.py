@@ -0,0 +1,155 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import concurrent.futures
+import contextvars
+import time
+
+from openstack import exceptions
+from openstack import resource
+
+#: The default number of concurrent calls of a bulk operation.
+DEFAULT_WORKERS = 10
+
+
+class BulkResult:
+    """The outcome of a single call of a bulk operation."""
+
+    def __init__(self, item, result=None, error=None, elapsed=0.0):
+        #: The input the call was made for.
+        self.item = item
+        #: The value returned by the call, if it succeeded.
+        self.result = result
+        #: The exception raised by the call, if it failed.
+        self.error = error
+        #: The duration of the call in seconds.
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        status = 'ok' if self.ok else 'failed: %s' % self.error
+        return '<BulkResult %r %s (%.3fs)>' % (self.item, status, self.elapsed)
+
+
+class BulkResults:
+    """The results of a bulk operation.
+
+    All calls are submitted to a thread pool as soon as the object is
+    created. Iterating yields a :class:`BulkResult` for every call in
+    completion order, as soon as it is available; a failing call never
+    stops the others.
+    """
+
+    def __init__(self, func, items, max_workers=DEFAULT_WORKERS):
+        """Run ``func(item)`` for every item.
+
+        :param callable func: The function to call for each item.
+        :param items: An iterable of items to pass to ``func``.
+        :param int max_workers: The maximum number of concurrent calls.
+        """
+        self.results = []
+        self._started = self._finished = time.monotonic()
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers)
+        # Each call runs in a copy of the caller's context, so that the
+        # spans of its requests belong to the caller's trace.
+        self._pending = {executor.submit(contextvars.copy_context().run,
+                                         self._call, func, item)
+                         for item in items}
+        executor.shutdown(wait=False)
+
+    def _call(self, func, item):
+        started = time.monotonic()
+        try:
+            result = BulkResult(item, result=func(item))
+        except Exception as e:
+            result = BulkResult(item, error=e)
+        self._finished = time.monotonic()
+        result.elapsed = self._finished - started
+        return result
+
+    def __iter__(self):
+        yield from list(self.results)
+        for future in concurrent.futures.as_completed(list(self._pending)):
+            if future not in self._pending:
+                # Already consumed by another iteration.
+                continue
+            self._pending.discard(future)
+            result = future.result()
+            self.results.append(result)
+            yield result
+
+    @property
+    def elapsed(self):
+        """The wall time of the operation, once every call completed."""
+        if self._pending:
+            return None
+        return self._finished - self._started
+
+    def __len__(self):
+        return len(self.wait().results)
+
+    def wait(self):
+        """Wait for every call to complete.
+
+        :returns: This :class:`BulkResults` instance.
+        """
+        for _ in self:
+            pass
+        return self
+
+    @property
+    def succeeded(self):
+        """The results of the calls that succeeded."""
+        return [r for r in self.wait().results if r.ok]
+
+    @property
+    def failed(self):
+        """The results of the calls that raised an exception."""
+        return [r for r in self.wait().results if not r.ok]
+
+
+#: The result of a multi-get: the resources found, in the order they were
+#: asked for, and the IDs of those that do not exist.
+GetManyResult = collections.namedtuple('GetManyResult', ['found', 'missing'])
+
+
+def get_many(get, values, max_workers=DEFAULT_WORKERS):
+    """Get many resources concurrently.
+
+    :param callable get: Called with each value, returns a resource or
+        raises :class:`~openstack.exceptions.ResourceNotFound`.
+    :param values: An iterable of IDs or resources.
+    :param int max_workers: The maximum number of concurrent calls.
+    :returns: A :class:`GetManyResult`.
+    :raises: The first error other than
+        :class:`~openstack.exceptions.ResourceNotFound`, once every call
+        completed.
+    """
+    values = list(values)
+    results = BulkResults(lambda index: get(values[index]),
+                          range(len(values)), max_workers=max_workers)
+    by_index = {r.item: r for r in results.wait().results}
+    found, missing = [], []
+    for index, value in enumerate(values):
+        result = by_index[index]
+        if result.ok:
+            found.append(result.result)
+        elif isinstance(result.error, exceptions.ResourceNotFound):
+            missing.append(resource.Resource._get_id(value))
+        else:
+            raise result.error
+    return GetManyResult(found, missing)
@@ -11,10 +11,256 @@
 #    under the License.
 
 
+import contextvars
+import copy
+import functools
+import queue
+import threading
+import time
+
+from esi.lease.v1 import _conditional
+from esi.lease.v1 import _observe
+from esi.lease.v1 import _record
+from esi.lease.v1 import _stream
+from esi.lease.v1 import _tracing
+
+from openstack import exceptions
+from openstack import resource
+
+
+def comma_separated_list(value):
+    if value is None:
+        return None
+    else:
+        return ','.join(value)
+
+
+def fields_type(value, resource_type):
+    """Convert requested fields to the server-side ``fields`` parameter.
+
+    Fields may be given by attribute name (``node_type``) or by server-side
+    name (``resource_type``), as a list or a comma-separated string.
+
+    :param value: The fields to request, or ``None``.
+    :param resource_type: The :class:`~openstack.resource.Resource` class
+        the fields belong to.
+    :returns: A comma-separated string of server-side field names.
+    :raises: :exc:`~openstack.exceptions.InvalidResourceQuery` if a field
+        is not an attribute of ``resource_type``.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+
+    server_names = resource_type._body_mapping()
+    mapping = {attr: name for name, attr in server_names.items()}
+    mapping.update((name, name) for name in server_names)
+    alternate_id = resource_type._alternate_id()
+    if alternate_id:
+        mapping['id'] = mapping[alternate_id]
+
+    invalid = [field for field in value if field not in mapping]
+    if invalid:
+        raise exceptions.InvalidResourceQuery(
+            message="Invalid fields for %s: %s" % (resource_type.__name__,
+                                                   ",".join(invalid)),
+            extra_data=invalid,
+        )
+    return comma_separated_list(dict.fromkeys(mapping[f] for f in value))
+
+
+def prefetched(iterable, depth):
+    """Iterate over ``iterable`` on a background thread.
+
+    Up to ``depth`` items are fetched ahead of the consumer, so the next
+    pages of a listing are requested while the current one is processed.
+    Exceptions raised by ``iterable`` are re-raised to the consumer.
+
+    :param iterable: The iterable to consume, usually a page generator.
+    :param int depth: The maximum number of items buffered ahead.
+    :returns: A generator of the items of ``iterable``.
+    """
+    items = queue.Queue()
+    slots = threading.Semaphore(depth)
+    stopped = threading.Event()
+    done = object()
+
+    def worker():
+        iterator = iter(iterable)
+        while True:
+            slots.acquire()
+            if stopped.is_set():
+                return
+            try:
+                items.put((next(iterator), None))
+            except StopIteration:
+                items.put((done, None))
+                return
+            except Exception as e:
+                items.put((done, e))
+                return
+
+    # The caller's context is kept, so that the spans of the requests
+    # belong to the caller's trace.
+    thread = threading.Thread(target=contextvars.copy_context().run,
+                              args=(worker,), daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+        slots.release()
+
+
+def _matches(filters, value):
+    """Tell whether a resource matches client-side filters.
+
+    As in :meth:`openstack.resource.Resource.list`, a dict filter matches
+    when each of its keys matches, recursively.
+    """
+    if not value:
+        return False
+    for key, expected in filters.items():
+        if isinstance(expected, dict):
+            if not _matches(expected, value.get(key)):
+                return False
+        elif value.get(key) != expected:
+            return False
+    return True
+
+
+class _Page:
+    """The resources of one list response.
+
+    Iterating hydrates the raw items one at a time and applies the
+    client-side filters.
+    """
+
+    def __init__(self, items, hydrate, client_filters):
+        self._items = iter(items)
+        self._hydrate = hydrate
+        self._client_filters = client_filters
+        #: The number of items received so far.
+        self.count = 0
+        #: The ID of the last item received.
+        self.marker = None
+
+    def __iter__(self):
+        for raw_resource in self._items:
+            value = self._hydrate(raw_resource)
+            self.marker = value.id
+            self.count += 1
+            if _matches(self._client_filters, value):
+                yield value
+
+
+class FetchMixin:
+    def fetch(self, session, requires_id=True, base_path=None,
+              error_message=None, skip_cache=False, *,
+              resource_response_key=None, microversion=None, **params):
+        """Get a remote resource based on this instance.
+
+        This is :meth:`openstack.resource.Resource.fetch`, except that the
+        request is conditional when the resource was fetched before and the
+        server sent validators, see
+        :class:`~esi.lease.v1._conditional.ValidatorCache`.
+        """
+        if not self.allow_fetch:
+            raise exceptions.MethodNotSupported(self, 'fetch')
+
+        request = self._prepare_request(
+            requires_id=requires_id,
+            base_path=base_path,
+        )
+        session = self._get_session(session)
+        if microversion is None:
+            microversion = self._get_microversion(session, action='fetch')
+        started = time.perf_counter()
+        response = _conditional.get(
+            session,
+            request.url,
+            microversion=microversion,
+            params=params,
+            skip_cache=skip_cache,
+        )
+        received = time.perf_counter()
+        kwargs = {}
+        if error_message:
+            kwargs['error_message'] = error_message
+
+        self.microversion = microversion
+        if resource_response_key is not None:
+            kwargs['resource_response_key'] = resource_response_key
+        self._translate_response(response, **kwargs)
+        observers = _observe.observers(session)
+        if observers:
+            # Decoding and building the resource are not told apart.
+            finished = time.perf_counter()
+            operation, resource_type = _observe.operation_name(
+                'GET', request.url)
+            _observe.emit(observers, _observe.Event(
+                _observe.FETCH, operation, resource_type, method='GET',
+                url=request.url, status=response.status_code, items=1,
+                started=time.time() - (finished - started),
+                elapsed=finished - started,
+                timings={'request': received - started,
+                         'hydrate': finished - received}))
+        return self
+
+    def _snapshot(self):
+        """Return a copy of the state set by :meth:`fetch`."""
+        return copy.deepcopy({
+            'body': dict(self._body.attributes),
+            'header': dict(self._header.attributes),
+            'original_body': getattr(self, '_original_body', None),
+            'microversion': self.microversion,
+        })
+
+    def _restore(self, snapshot):
+        """Update this instance as if it had been fetched.
+
+        :param dict snapshot: A state returned by :meth:`_snapshot`, which
+            is copied and so may be restored into several instances.
+        """
+        snapshot = copy.deepcopy(snapshot)
+        self._body.attributes.update(snapshot['body'])
+        self._body.clean()
+        self._header.attributes.update(snapshot['header'])
+        self._header.clean()
+        if snapshot['original_body'] is not None:
+            self._original_body = snapshot['original_body']
+        self.microversion = snapshot['microversion']
+        self._update_location()
+        dict.update(self, self.to_dict())
+        return self
+
+
+def _emit_page(observers, cls, uri, response, count, started, timings):
+    # Streamed pages include the time the consumer spent on each item.
+    elapsed = time.perf_counter() - started
+    length = response.headers.get('Content-Length')
+    _observe.emit(observers, _observe.Event(
+        _observe.PAGE, 'list_' + cls.resources_key,
+        _observe.operation_name('GET', uri)[1], method='GET', url=uri,
+        status=response.status_code,
+        bytes=int(length) if length is not None else None, items=count,
+        started=time.time() - elapsed, elapsed=elapsed, timings=timings))
+
+
 # borrowed from openstacksdk
 class ListMixin:
     @classmethod
-    def list(cls, session, **params):
+    def list(cls, session, paginated=True, base_path=None,
+             allow_unknown_params=False, *, microversion=None, prefetch=0,
+             fields=None, raw=False, stream=False, **params):
         """This method is a generator which yields resource objects.
 
         This resource object list generator handles pagination and takes query
@@ -22,6 +268,24 @@ class ListMixin:
 
         :param session: The session to use for making this request.
         :type session: :class:`~keystoneauth1.adapter.Adapter`
+        :param bool paginated: ``True`` if a GET to this resource returns
+            a paginated series of responses, or ``False`` if a GET returns only
+            one page of data.
+        :param str base_path: Base part of the URI for listing resources, if
+            different from :data:`~openstack.resource.Resource.base_path`.
+        :param bool allow_unknown_params: Discard the parameters which are
+            neither query parameters nor resource attributes, instead of
+            raising :exc:`~openstack.exceptions.InvalidResourceQuery`.
+        :param str microversion: API version to override the negotiated one.
+        :param int prefetch: When set, up to this many pages are fetched on a
+            background thread ahead of the consumer.
+        :param fields: Limit the resource fields to fetch. See
+            :func:`fields_type`.
+        :param bool raw: Yield lightweight :class:`~esi.lease.v1._record.Record`
+            objects instead of resources.
+        :param bool stream: Decode each response incrementally, yielding
+            resources while the body is still being received. Combined with
+            ``prefetch``, whole pages are buffered again.
         :param dict params: These keyword arguments are passed through the
             :meth:`~openstack.resource.QueryParameter._transpose` method
             to find if any of them match expected query parameters to be
@@ -32,7 +296,183 @@ class ListMixin:
         :raises: :exc:`~openstack.exceptions.InvalidResourceQuery` if query
                  contains invalid params.
         """
-        base_path = cls.base_path
-        return super(ListMixin, cls).list(
-            session, paginated=True, base_path=base_path, **params
+        pages = cls.list_pages(session, paginated=paginated,
+                               base_path=base_path,
+                               allow_unknown_params=allow_unknown_params,
+                               microversion=microversion, fields=fields,
+                               raw=raw, stream=stream, **params)
+        if prefetch:
+            pages = prefetched(map(list, pages), prefetch)
+        for page in pages:
+            yield from page
+
+    @classmethod
+    def list_pages(cls, session, paginated=True, base_path=None, **params):
+        """This method is a generator which yields pages of resources.
+
+        See :meth:`list` for the parameters. When the session has a tracer,
+        the listing and each page get a span, see
+        :class:`~esi.lease.v1._tracing.Tracer`.
+
+        :return: A generator of lists of :class:`openstack.resource.Resource`
+            objects, or of :class:`~esi.lease.v1._record.Record` objects
+            when ``raw`` is set, one list per response. When ``stream`` is
+            set, each page is a lazy iterable instead of a list.
+        """
+        pages = cls._list_pages(session, paginated, base_path, **params)
+        tracer = _tracing.tracer(session)
+        if not tracer.enabled:
+            return pages
+        operation, resource_type = _observe.operation_name(
+            'GET', base_path or cls.base_path)
+        query = {k: v for k, v in params.items()
+                 if k not in ('allow_unknown_params', 'microversion', 'raw',
+                              'stream')
+                 and v is not None}
+        return tracer.pages(operation, resource_type, query, pages)
+
+    @classmethod
+    def _list_fields(cls, fields, paginated=True):
+        """Return the ``fields`` parameter of a listing.
+
+        The id is always requested when paginating, since the marker of the
+        next page is the id of the last resource.
+        """
+        value = fields_type(fields, cls)
+        id_name = fields_type(['id'], cls)
+        if paginated and id_name not in value.split(','):
+            value += ',' + id_name
+        return value
+
+    @classmethod
+    def _split_query(cls, params, base_path, allow_unknown_params=False):
+        """Split listing parameters into server and client-side filters.
+
+        :returns: A tuple of the query parameters sent to the server and
+            the attributes filtered on the client, see :func:`_matches`.
+        :raises: :exc:`~openstack.exceptions.InvalidResourceQuery` for the
+            parameters which are neither, unless ``allow_unknown_params``.
+        """
+        api_filters = cls._query_mapping._validate(
+            params, base_path=base_path, allow_unknown_params=True
         )
+        # Gather query parameters which are not supported by the server
+        client_filters = {
+            k: v for k, v in params.items()
+            if isinstance(getattr(cls, k, None), resource.Body)
+            and k not in cls._query_mapping._mapping
+        }
+        unknown = set(params) - set(api_filters) - set(client_filters)
+        if unknown and not allow_unknown_params:
+            raise exceptions.InvalidResourceQuery(
+                message="Invalid query params: %s" % ",".join(sorted(unknown)),
+                extra_data=unknown)
+        return api_filters, client_filters
+
+    @classmethod
+    def _list_pages(cls, session, paginated=True, base_path=None, *,
+                    allow_unknown_params=False, microversion=None,
+                    fields=None, raw=False, stream=False, **params):
+        if not cls.allow_list:
+            raise exceptions.MethodNotSupported(cls, 'list')
+
+        session = cls._get_session(session)
+        if microversion is None:
+            microversion = cls._get_microversion(session, action='list')
+        if base_path is None:
+            base_path = cls.base_path
+
+        api_filters, client_filters = cls._split_query(
+            params, base_path, allow_unknown_params)
+        query_params = cls._query_mapping._transpose(api_filters, cls)
+        if fields:
+            query_params['fields'] = cls._list_fields(fields, paginated)
+        uri = base_path % params
+        limit = query_params.get('limit')
+        # URI parts are set on the resources, as openstack does.
+        uri_params = {
+            k: v for k, v in params.items()
+            if isinstance(getattr(cls, k, None), resource.URI)
+        }
+
+        if raw:
+            hydrate = _record.record_type(cls)
+        else:
+            def hydrate(raw_resource):
+                raw_resource.pop("self", None)
+                raw_resource.update(uri_params)
+                return cls.existing(
+                    microversion=microversion,
+                    connection=session._get_connection(),
+                    **raw_resource,
+                )
+
+        get_kwargs = {'stream': True} if stream else {}
+        observers = _observe.observers(session)
+        total_yielded = 0
+        while uri:
+            # Copy query_params due to weird mock unittest interactions
+            # Streamed bodies are not kept, so they cannot be revalidated.
+            get = session.get if stream else functools.partial(
+                _conditional.get, session)
+            started = time.perf_counter()
+            response = get(
+                uri,
+                headers={"Accept": "application/json"},
+                params=query_params.copy(),
+                microversion=microversion,
+                **get_kwargs
+            )
+            timings = {'request': time.perf_counter() - started}
+            exceptions.raise_from_response(response)
+
+            # Discard any existing pagination keys
+            last_marker = query_params.pop('marker', None)
+            query_params.pop('limit', None)
+
+            if stream:
+                data = _stream.StreamingObject(
+                    response.iter_content(_stream.CHUNK_SIZE),
+                    cls.resources_key,
+                )
+                page = _Page(data.items(), hydrate, client_filters)
+                try:
+                    yield page
+                    # Drain what the consumer left to reach the links.
+                    for _ in page:
+                        pass
+                finally:
+                    response.close()
+                data = data.rest
+                if observers:
+                    _emit_page(observers, cls, uri, response, page.count,
+                               started, timings)
+            else:
+                decoding = time.perf_counter()
+                data = response.json()
+                resources = data[cls.resources_key]
+                if not isinstance(resources, list):
+                    resources = [resources]
+                page = _Page(resources, hydrate, client_filters)
+                hydrating = time.perf_counter()
+                items = list(page)
+                if observers:
+                    timings['decode'] = hydrating - decoding
+                    timings['hydrate'] = time.perf_counter() - hydrating
+                    _emit_page(observers, cls, uri, response, page.count,
+                               started, timings)
+                yield items
+
+            total_yielded += page.count
+            if not (page.count and paginated):
+                return
+            uri, next_params = cls._get_next_link(
+                uri, response, data, page.marker, limit, total_yielded
+            )
+            if next_params.get('marker', object()) == last_marker:
+                # If next page marker is same as what we were just
+                # asked something went terribly wrong.
+                raise exceptions.SDKException(
+                    'Endless pagination loop detected, aborting'
+                )
+            query_params.update(next_params)
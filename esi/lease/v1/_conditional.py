@@ -0,0 +1,159 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import json
+import threading
+
+from requests import structures
+from requests import utils
+
+#: The default number of responses remembered by a :class:`ValidatorCache`.
+MAX_ENTRIES = 128
+#: The default total size of the bodies remembered by a
+#: :class:`ValidatorCache`, in bytes.
+MAX_BYTES = 8 * 1024 * 1024
+
+
+class CachedResponse:
+    """A stored response, replayed when the server answers 304."""
+
+    status_code = 200
+
+    def __init__(self, headers, content):
+        self.headers = headers
+        self.content = content
+
+    @property
+    def links(self):
+        # As requests.Response.links, for the pagination links.
+        header = self.headers.get('Link')
+        if not header:
+            return {}
+        return {link.get('rel') or link.get('url'): link
+                for link in utils.parse_header_links(header)}
+
+    def json(self):
+        # Decoded on every replay, so callers are free to alter the result.
+        return json.loads(self.content)
+
+
+class ValidatorCache:
+    """The validators and bodies of the last GET responses of a proxy.
+
+    Only responses carrying an ``ETag`` or ``Last-Modified`` header are
+    remembered, so servers which send no validators cost nothing, and only
+    the most recently used ones within ``max_entries`` and ``max_bytes``.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        """Create an empty cache.
+
+        :param int max_entries: The number of responses remembered.
+        :param int max_bytes: The total size of the bodies remembered;
+            larger bodies are not remembered at all.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        #: The number of conditional requests sent.
+        self.requests = 0
+        #: The number of those answered with 304 Not Modified.
+        self.hits = 0
+
+    @property
+    def hit_rate(self):
+        """The share of conditional requests answered with 304."""
+        return self.hits / self.requests if self.requests else 0.0
+
+    @staticmethod
+    def _key(url, params, microversion):
+        return json.dumps([url, params, microversion], sort_keys=True,
+                          default=str)
+
+    def get(self, session, url, headers=None, params=None,
+            microversion=None, **kwargs):
+        """Send a GET request, conditional if the URL was seen before.
+
+        :param session: The :class:`~keystoneauth1.adapter.Adapter` to use.
+        :param str url: The URL to get.
+        :param dict headers: Additional request headers.
+        :param dict params: The query parameters.
+        :param str microversion: The API microversion.
+        :returns: The response, or a :class:`CachedResponse` on 304.
+        """
+        key = self._key(url, params, microversion)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        headers = dict(headers or {})
+        if entry is not None:
+            etag, modified = entry[0].get('ETag'), entry[0].get(
+                'Last-Modified')
+            if etag:
+                headers['If-None-Match'] = etag
+            if modified:
+                headers['If-Modified-Since'] = modified
+        response = session.get(url, headers=headers, params=params,
+                               microversion=microversion, **kwargs)
+        if entry is None:
+            self._store(key, response)
+            return response
+        with self._lock:
+            self.requests += 1
+            if response.status_code == 304:
+                self.hits += 1
+                return CachedResponse(*entry)
+        self._store(key, response)
+        return response
+
+    def _store(self, key, response):
+        if response.status_code != 200:
+            return
+        headers = structures.CaseInsensitiveDict(response.headers)
+        if 'ETag' not in headers and 'Last-Modified' not in headers:
+            return
+        content = response.content
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            if len(content) > self.max_bytes:
+                return
+            self._entries[key] = (headers, content)
+            self._bytes += len(content)
+            while (len(self._entries) > self.max_entries
+                   or self._bytes > self.max_bytes):
+                self._bytes -= len(self._entries.popitem(last=False)[1][1])
+
+    def stats(self):
+        """Return the counters as a dict."""
+        return {'requests': self.requests, 'hits': self.hits,
+                'hit_rate': self.hit_rate, 'entries': len(self._entries),
+                'bytes': self._bytes}
+
+
+def get(session, url, **kwargs):
+    """Send a GET request through the validator cache of the session, if any.
+
+    :param session: The :class:`~keystoneauth1.adapter.Adapter` to use,
+        usually a :class:`~esi.lease.v1._proxy.Proxy`.
+    :param str url: The URL to get.
+    :param dict kwargs: Passed to :meth:`ValidatorCache.get`.
+    """
+    cache = getattr(session, 'validator_cache', None)
+    if cache is None:
+        return session.get(url, **kwargs)
+    return cache.get(session, url, **kwargs)
@@ -0,0 +1,151 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import tempfile
+import time
+
+#: The default delay between polls while events keep coming, in seconds.
+MIN_INTERVAL = 0.2
+#: The default delay between polls once the event log is idle, in seconds.
+MAX_INTERVAL = 10.0
+
+
+def _sort_key(event_id):
+    # esi-leap event IDs are integers, but may be sent as strings.
+    try:
+        return 0, int(event_id)
+    except (TypeError, ValueError):
+        return 1, str(event_id)
+
+
+class Checkpoint:
+    """The cursor of an event follower, persisted in a file.
+
+    The file is replaced atomically, so a crash never leaves a partially
+    written cursor behind.
+    """
+
+    def __init__(self, path):
+        """Create a checkpoint.
+
+        :param str path: The path of the file holding the cursor.
+        """
+        self.path = path
+
+    def load(self):
+        """Return the saved cursor, or ``None`` if there is none yet."""
+        try:
+            with open(self.path) as f:
+                return json.load(f).get('last_event_id')
+        except FileNotFoundError:
+            return None
+
+    def save(self, last_event_id):
+        """Save the cursor.
+
+        :param last_event_id: The ID of the last processed event.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'last_event_id': last_event_id}, f)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+class EventFollower:
+    """The state of an event follower, shared by the sync and async APIs.
+
+    The follower keeps a cursor on the ID of the last event it returned,
+    and polls for events newer than that. The delay between polls is
+    ``min_interval`` while events keep coming and doubles with every empty
+    poll, up to ``max_interval``.
+    """
+
+    def __init__(self, last_event_id=None, checkpoint=None,
+                 min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        """Create a follower.
+
+        :param last_event_id: Only follow events after this one. Defaults
+            to the cursor saved in ``checkpoint``, if any; otherwise all
+            existing events are returned first.
+        :param checkpoint: A :class:`Checkpoint`, or the path of its file,
+            in which the cursor is saved after every event.
+        :param float min_interval: The shortest delay between polls.
+        :param float max_interval: The longest delay between polls.
+        """
+        if isinstance(checkpoint, (str, os.PathLike)):
+            checkpoint = Checkpoint(checkpoint)
+        self.checkpoint = checkpoint
+        if last_event_id is None and checkpoint is not None:
+            last_event_id = checkpoint.load()
+        self.last_event_id = last_event_id
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+
+    def query(self, query):
+        """Return the query parameters of the next poll."""
+        query = dict(query)
+        if self.last_event_id is not None:
+            query['last_event_id'] = self.last_event_id
+        return query
+
+    def new_events(self, events):
+        """Return the events after the cursor, ordered by ID.
+
+        Events at or before the cursor, as returned by overlapping polls,
+        and duplicates are dropped. The delay of the next poll is adjusted
+        depending on whether anything was new.
+        """
+        cursor = (None if self.last_event_id is None
+                  else _sort_key(self.last_event_id))
+        new = {}
+        for event in events:
+            key = _sort_key(event.id)
+            if cursor is None or key > cursor:
+                new[key] = event
+        if new:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        return [new[key] for key in sorted(new)]
+
+    def advance(self, event):
+        """Move the cursor past an event once it has been processed."""
+        self.last_event_id = event.id
+        if self.checkpoint is not None:
+            self.checkpoint.save(event.id)
+
+
+def follow(list_events, follower, sleep=time.sleep, **query):
+    """Yield events as they are recorded, forever.
+
+    :param callable list_events: Called with the query parameters of every
+        poll, returns an iterable of events.
+    :param follower: An :class:`EventFollower`.
+    :param callable sleep: Called with the delay between polls.
+    :param dict query: Additional query parameters of every poll.
+    """
+    while True:
+        for event in follower.new_events(
+                list_events(**follower.query(query))):
+            yield event
+            # Only reached once the consumer asks for the next event, so a
+            # resumed follower never skips an unprocessed one.
+            follower.advance(event)
+        sleep(follower.interval)
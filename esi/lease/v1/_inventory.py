@@ -0,0 +1,233 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import datetime
+import logging
+import threading
+
+from esi.lease.v1 import _follow
+
+from openstack import exceptions
+
+_log = logging.getLogger(__name__)
+
+#: The attributes objects can be looked up by, besides their UUID.
+INDEXES = ('resource_uuid', 'project_id', 'owner_id', 'status')
+
+#: Offers and leases with these statuses are dropped from the inventory.
+GONE_STATUSES = ('deleted', 'expired')
+
+#: The resource types of events about nodes listed by the lease API.
+NODE_RESOURCE_TYPES = ('ironic_node',)
+
+# How far back the first poll looks for events, in seconds, so that events
+# recorded while the inventory is listed are not missed even if the local
+# clock is ahead of the server's. Replaying an event is harmless.
+_CLOCK_MARGIN = 60
+
+
+class Inventory:
+    """An in-process view of the offers, leases and nodes.
+
+    The view is loaded by listing every object once. It is then kept up to
+    date from the event log: each event re-fetches the offer or lease it
+    names, and the nodes named by the events of a poll are refreshed.
+    Lookups never call the API.
+
+    Call :meth:`sync` to apply new events, or :meth:`start` to do so on a
+    background thread. Objects are the resources returned by the proxy.
+    """
+
+    def __init__(self, proxy, min_interval=_follow.MIN_INTERVAL,
+                 max_interval=_follow.MAX_INTERVAL):
+        """Create an inventory.
+
+        :param proxy: The :class:`~esi.lease.v1._proxy.Proxy` to use.
+        :param float min_interval: The delay between event polls of
+            :meth:`start` while events keep coming.
+        :param float max_interval: The longest delay between event polls.
+        """
+        self._proxy = proxy
+        self._lock = threading.RLock()
+        self._objects = {kind: {} for kind in ('offer', 'lease', 'node')}
+        self._indexes = {
+            kind: {attr: collections.defaultdict(set) for attr in INDEXES}
+            for kind in self._objects
+        }
+        self._follower = _follow.EventFollower(min_interval=min_interval,
+                                               max_interval=max_interval)
+        self._event_query = None
+        self._stopped = threading.Event()
+        self._thread = None
+        #: The exception of the last failed background sync, if the
+        #: inventory is stale because of it; ``None`` once a sync succeeds.
+        self.last_error = None
+
+    def bootstrap(self):
+        """Load the inventory from full listings."""
+        since = (datetime.datetime.now(datetime.timezone.utc)
+                 - datetime.timedelta(seconds=_CLOCK_MARGIN))
+        offers = list(self._proxy.offers())
+        leases = list(self._proxy.leases())
+        nodes = list(self._proxy.nodes())
+        with self._lock:
+            for kind, objects in (('offer', offers), ('lease', leases),
+                                  ('node', nodes)):
+                self._replace(kind, objects)
+            if self._event_query is None:
+                self._event_query = {'last_event_time': since.isoformat()}
+
+    def _replace(self, kind, objects):
+        for obj in list(self._objects[kind].values()):
+            self._remove(kind, obj.id)
+        for obj in objects:
+            self._add(kind, obj)
+
+    def _add(self, kind, obj):
+        self._remove(kind, obj.id)
+        if kind != 'node' and obj.status in GONE_STATUSES:
+            return
+        self._objects[kind][obj.id] = obj
+        for attr, index in self._indexes[kind].items():
+            value = getattr(obj, attr, None)
+            if value is not None:
+                index[value].add(obj.id)
+
+    def _remove(self, kind, uuid):
+        obj = self._objects[kind].pop(uuid, None)
+        if obj is None:
+            return
+        for attr, index in self._indexes[kind].items():
+            value = getattr(obj, attr, None)
+            ids = index.get(value)
+            if ids is not None:
+                ids.discard(uuid)
+                if not ids:
+                    del index[value]
+
+    def _refresh(self, kind, uuid):
+        get = self._proxy.get_offer if kind == 'offer' else \
+            self._proxy.get_lease
+        try:
+            obj = get(uuid)
+        except exceptions.ResourceNotFound:
+            with self._lock:
+                self._remove(kind, uuid)
+        else:
+            with self._lock:
+                self._add(kind, obj)
+
+    def sync(self):
+        """Apply the events recorded since the last call.
+
+        :returns: The number of events applied.
+        """
+        if self._event_query is None:
+            self.bootstrap()
+        events = self._follower.new_events(
+            self._proxy.events(**self._follower.query(self._event_query)))
+        nodes = set()
+        for event in events:
+            if event.object_type in ('offer', 'lease') and event.object_uuid:
+                self._refresh(event.object_type, event.object_uuid)
+            if (event.resource_uuid
+                    and event.resource_type in NODE_RESOURCE_TYPES + (None,)):
+                nodes.add(event.resource_uuid)
+            self._follower.advance(event)
+        if nodes:
+            self._refresh_nodes(nodes)
+        return len(events)
+
+    def _refresh_nodes(self, uuids):
+        # The lease API cannot fetch a single node, so one listing serves
+        # every node of the poll; the other nodes are left as they are.
+        found, missing = self._proxy.get_nodes(uuids)
+        with self._lock:
+            for obj in found:
+                self._add('node', obj)
+            for uuid in missing:
+                self._remove('node', uuid)
+
+    def start(self):
+        """Keep the inventory up to date on a background thread."""
+        if self._thread is not None:
+            return
+        if self._event_query is None:
+            self.bootstrap()
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                # Keep the stale view and retry after the idle delay.
+                _log.warning('Lease inventory sync failed: %s', e,
+                             exc_info=True)
+                self.last_error = e
+                self._follower.new_events([])
+            else:
+                self.last_error = None
+            self._stopped.wait(self._follower.interval)
+
+    def stop(self):
+        """Stop the background thread started by :meth:`start`."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def get(self, kind, uuid):
+        """Return an object by UUID, or ``None``.
+
+        :param str kind: ``offer``, ``lease`` or ``node``.
+        :param str uuid: The UUID of the object.
+        """
+        with self._lock:
+            return self._objects[kind].get(uuid)
+
+    def find(self, kind, **filters):
+        """Return the objects matching every filter.
+
+        :param str kind: ``offer``, ``lease`` or ``node``.
+        :param dict filters: Values of the indexed attributes
+            ``resource_uuid``, ``project_id``, ``owner_id`` and ``status``.
+        :returns: A list of objects.
+        """
+        unknown = set(filters) - set(INDEXES)
+        if unknown:
+            raise exceptions.InvalidResourceQuery(
+                message="Invalid query params: %s" % ",".join(sorted(unknown)),
+                extra_data=unknown)
+        with self._lock:
+            objects = self._objects[kind]
+            if not filters:
+                return list(objects.values())
+            matches = [self._indexes[kind][attr].get(value, set())
+                       for attr, value in filters.items()]
+            ids = set.intersection(*sorted(matches, key=len))
+            return [objects[uuid] for uuid in ids]
+
+    def offers(self, **filters):
+        """Return the offers matching the filters. See :meth:`find`."""
+        return self.find('offer', **filters)
+
+    def leases(self, **filters):
+        """Return the leases matching the filters. See :meth:`find`."""
+        return self.find('lease', **filters)
+
+    def nodes(self, **filters):
+        """Return the nodes matching the filters. See :meth:`find`."""
+        return self.find('node', **filters)
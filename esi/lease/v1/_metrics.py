@@ -0,0 +1,254 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import threading
+
+from esi.lease.v1 import _observe
+
+#: The default upper bounds of the latency buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+                   1.0, 2.5, 5.0, 7.5, 10.0, 30.0, 60.0)
+
+#: The prefix of the exported metric names.
+PREFIX = 'esi_lease'
+
+
+class Histogram:
+    """A histogram with fixed buckets.
+
+    Recording a value is a binary search and an increment. Percentiles are
+    estimated by linear interpolation within their bucket. Not thread-safe
+    on its own; :class:`LeaseMetrics` serializes the updates.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Create an empty histogram.
+
+        :param buckets: The increasing upper bounds of the buckets; values
+            above the last one go to an implicit ``+Inf`` bucket.
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, percent):
+        """Estimate a percentile of the recorded values.
+
+        :param float percent: The percentile, between 0 and 100.
+        :returns: The estimate, or ``None`` without values. Values in the
+            ``+Inf`` bucket are reported as the last bound.
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                low = self.buckets[index - 1] if index else 0.0
+                high = self.buckets[index]
+                return low + (high - low) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def cumulative(self):
+        """Return ``(bound, count of values <= bound)`` pairs, ``+Inf`` last."""
+        total, result = 0, []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': self.cumulative(),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+        }
+
+
+class _Operation:
+    def __init__(self, buckets):
+        self.latency = Histogram(buckets)
+        self.statuses = {}
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.items = 0
+        self.pages = 0
+
+    def snapshot(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'statuses': dict(self.statuses),
+            'bytes': self.bytes,
+            'items': self.items,
+            'pages': self.pages,
+            'latency': self.latency.snapshot(),
+        }
+
+
+def _label(value):
+    return (str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class LeaseMetrics(_observe.Observer):
+    """Aggregate the timing events of a lease proxy.
+
+    Requests are counted and their latency recorded per operation, such as
+    ``list_offers`` or ``claim_offer``; a request failing or answered with
+    an error status counts as an error. Pages and fetches add the number
+    of items received. The retries and rate limiting waits of the proxy are
+    included in the exports.
+    """
+
+    def __init__(self, proxy=None, buckets=DEFAULT_BUCKETS):
+        """Create empty metrics.
+
+        :param proxy: The :class:`~esi.lease.v1._proxy.Proxy` whose retry
+            and rate limit statistics are exported, if any.
+        :param buckets: The upper bounds of the latency buckets, in seconds.
+        """
+        self._proxy = proxy
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._operations = {}
+
+    def _operation(self, name):
+        operation = self._operations.get(name)
+        if operation is None:
+            operation = self._operations[name] = _Operation(self._buckets)
+        return operation
+
+    def on_request(self, event):
+        with self._lock:
+            operation = self._operation(event.operation)
+            operation.requests += 1
+            operation.latency.record(event.elapsed)
+            if event.status is not None:
+                operation.statuses[event.status] = \
+                    operation.statuses.get(event.status, 0) + 1
+            if event.error is not None or (event.status or 0) >= 400:
+                operation.errors += 1
+            operation.bytes += event.bytes or 0
+
+    def on_page(self, event):
+        with self._lock:
+            operation = self._operation(event.operation)
+            operation.pages += 1
+            operation.items += event.items or 0
+
+    on_fetch = on_page
+
+    def reset(self):
+        """Forget every recorded value."""
+        with self._lock:
+            self._operations = {}
+
+    def snapshot(self):
+        """Return the metrics as a dict.
+
+        :returns: A dict with ``operations``, mapping operation names to
+            their counters and latency histogram (in seconds, with estimated
+            ``p50``, ``p95`` and ``p99``), and, when the metrics belong to a
+            proxy, its ``retries`` and ``rate_limit`` statistics.
+        """
+        with self._lock:
+            result = {'operations': {name: operation.snapshot()
+                                     for name, operation
+                                     in sorted(self._operations.items())}}
+        if self._proxy is not None:
+            result['retries'] = self._proxy.retry_policy.stats()
+            result['rate_limit'] = self._proxy.rate_limiter.stats()
+        return result
+
+    def prometheus(self):
+        """Render the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+
+        def family(name, kind, help, samples):
+            lines.append('# HELP %s_%s %s' % (PREFIX, name, help))
+            lines.append('# TYPE %s_%s %s' % (PREFIX, name, kind))
+            for suffix, labels, value in samples:
+                shown = ','.join('%s="%s"' % (k, _label(v))
+                                 for k, v in labels)
+                lines.append('%s_%s%s%s %s' % (
+                    PREFIX, name, suffix, '{%s}' % shown if shown else '',
+                    _number(value)))
+
+        operations = snapshot['operations']
+        samples = []
+        for name, operation in operations.items():
+            latency = operation['latency']
+            for bound, count in latency['buckets']:
+                samples.append(('_bucket', (('operation', name),
+                                            ('le', _number(bound))), count))
+            samples.append(('_sum', (('operation', name),), latency['sum']))
+            samples.append(('_count', (('operation', name),),
+                            latency['count']))
+        family('request_duration_seconds', 'histogram',
+               'Duration of the requests to the lease service.', samples)
+        family('requests_total', 'counter',
+               'Requests to the lease service by response status.',
+               [('', (('operation', name), ('status', status)), count)
+                for name, operation in operations.items()
+                for status, count in sorted(operation['statuses'].items())])
+        for metric, key, help in (
+                ('request_errors_total', 'errors',
+                 'Requests failing or answered with an error status.'),
+                ('response_bytes_total', 'bytes',
+                 'Size of the response bodies.'),
+                ('items_total', 'items',
+                 'Resources received by listings and fetches.'),
+                ('pages_total', 'pages', 'Listing pages received.')):
+            family(metric, 'counter', help,
+                   [('', (('operation', name),), operation[key])
+                    for name, operation in operations.items()])
+        if 'retries' in snapshot:
+            family('retries_total', 'counter',
+                   'Requests retried, by status code or exception.',
+                   [('', (('reason', reason),), count)
+                    for reason, count in sorted(snapshot['retries'].items())
+                    if reason != 'total'])
+            limits = sorted(snapshot['rate_limit'].items())
+            family('rate_limit_delayed_total', 'counter',
+                   'Requests delayed by the client-side rate limiter.',
+                   [('', (('type', op),), stats['delayed'])
+                    for op, stats in limits])
+            family('rate_limit_wait_seconds_total', 'counter',
+                   'Time spent waiting for the client-side rate limiter.',
+                   [('', (('type', op),), stats['wait_time'])
+                    for op, stats in limits])
+            family('in_flight', 'gauge', 'Requests in flight.',
+                   [('', (('type', op),), stats['in_flight'])
+                    for op, stats in limits])
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,181 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import time
+import urllib.parse
+
+_log = logging.getLogger(__name__)
+
+#: An HTTP request to the lease service, retries included.
+REQUEST = 'request'
+#: A page of a listing, once its resources are built.
+PAGE = 'page'
+#: A resource fetched by ID, once built.
+FETCH = 'fetch'
+
+_SINGULAR = {'offers': 'offer', 'leases': 'lease', 'nodes': 'node',
+             'events': 'event'}
+_VERBS = {'POST': 'create', 'PATCH': 'update', 'PUT': 'update',
+          'DELETE': 'delete'}
+
+
+def operation_name(method, url):
+    """Name the lease operation of a request, e.g. ``claim_offer``.
+
+    :param str method: The HTTP method.
+    :param str url: The URL or path of the request.
+    :returns: A tuple of the operation name and of the resource type, such
+        as ``('list_offers', 'offer')``.
+    """
+    parts = [p for p in urllib.parse.urlsplit(url).path.split('/') if p]
+    for index, part in enumerate(parts):
+        if part in _SINGULAR:
+            resource_type, rest = _SINGULAR[part], parts[index + 1:]
+            break
+    else:
+        return method.lower(), None
+    method = method.upper()
+    if rest[1:] == ['claim'] and method == 'POST':
+        return 'claim_offer', resource_type
+    if method in ('GET', 'HEAD'):
+        if rest:
+            return 'get_' + resource_type, resource_type
+        return 'list_' + part, resource_type
+    return '%s_%s' % (_VERBS.get(method, method.lower()),
+                      resource_type), resource_type
+
+
+class Event:
+    """A timing event of the lease proxy.
+
+    ``timings`` maps the phases of the event to their duration in seconds:
+
+    * ``auth``, ``server`` and ``request`` for a :data:`REQUEST`: getting the
+      token, waiting for the response headers, and the whole request.
+    * ``request``, ``decode`` and ``hydrate`` for a :data:`PAGE`: getting
+      the response, parsing the JSON and building the resources. Streamed
+      pages are decoded while they are consumed, so only ``request`` is set.
+    * ``request`` and ``hydrate`` for a :data:`FETCH`, where ``hydrate``
+      includes parsing the JSON.
+    """
+
+    __slots__ = ('kind', 'operation', 'resource_type', 'method', 'url',
+                 'status', 'bytes', 'items', 'started', 'elapsed', 'timings',
+                 'error')
+
+    def __init__(self, kind, operation, resource_type=None, method=None,
+                 url=None, status=None, bytes=None, items=None, started=None,
+                 elapsed=0.0, timings=None, error=None):
+        #: :data:`REQUEST`, :data:`PAGE` or :data:`FETCH`.
+        self.kind = kind
+        #: The operation, e.g. ``list_offers`` or ``claim_offer``.
+        self.operation = operation
+        #: The resource type, e.g. ``offer``.
+        self.resource_type = resource_type
+        self.method = method
+        self.url = url
+        #: The response status code, if any.
+        self.status = status
+        #: The size of the response body, if known.
+        self.bytes = bytes
+        #: The number of resources received, for pages and fetches.
+        self.items = items
+        #: The time.time() at which the event started.
+        self.started = started
+        #: The duration of the event in seconds.
+        self.elapsed = elapsed
+        #: A dict of durations by phase, in seconds.
+        self.timings = timings or {}
+        #: The exception raised, if any.
+        self.error = error
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return '<Event %s %s status=%s %.3fs>' % (
+            self.kind, self.operation, self.status, self.elapsed)
+
+
+class Observer:
+    """A base class for observers of the lease proxy.
+
+    Subclasses override the methods of the events they want; any callable
+    taking an :class:`Event` can be used as an observer as well.
+    """
+
+    def __call__(self, event):
+        getattr(self, 'on_' + event.kind)(event)
+
+    def on_request(self, event):
+        pass
+
+    def on_page(self, event):
+        pass
+
+    def on_fetch(self, event):
+        pass
+
+
+def observers(session):
+    """Return the observers of a session, if it is a lease proxy."""
+    return getattr(session, 'observers', None) or ()
+
+
+def emit(observers, event):
+    """Pass an event to observers; their errors are logged and ignored."""
+    for observer in observers:
+        try:
+            observer(event)
+        except Exception:
+            _log.exception('Observer %r failed on %r', observer, event)
+
+
+def _size(response, streamed):
+    length = response.headers.get('Content-Length')
+    if length is not None:
+        return int(length)
+    return None if streamed else len(response.content)
+
+
+def observe_request(proxy, url, method, send, streamed=False):
+    """Send a request, emitting a :data:`REQUEST` event to the observers.
+
+    :param proxy: The lease proxy.
+    :param str url: The URL of the request.
+    :param str method: The HTTP method.
+    :param callable send: Sends the request and returns the response.
+    :param bool streamed: Whether the body is streamed, and not read yet.
+    """
+    operation, resource_type = operation_name(method, url)
+    event = Event(REQUEST, operation, resource_type, method=method, url=url,
+                  started=time.time())
+    started = time.perf_counter()
+    try:
+        proxy.session.get_auth_headers(auth=proxy.auth)
+        sent = time.perf_counter()
+        event.timings['auth'] = sent - started
+        response = send()
+        event.timings['request'] = time.perf_counter() - sent
+        event.status = response.status_code
+        event.bytes = _size(response, streamed)
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed is not None:
+            event.timings['server'] = elapsed.total_seconds()
+        return response
+    except Exception as e:
+        event.error = e
+        raise
+    finally:
+        event.elapsed = time.perf_counter() - started
+        emit(proxy.observers, event)
@@ -0,0 +1,183 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+import urllib.parse
+
+from requests import adapters
+
+# The options of the connection pool, read from ``lease_<name>`` settings.
+_POOL_OPTIONS = {
+    'pool_connections': int,
+    'pool_maxsize': int,
+    'pool_block': bool,
+    'tcp_nodelay': bool,
+    'tcp_keepalive': bool,
+    'tcp_keepidle': int,
+}
+# The timeouts, read from ``lease_<name>`` settings. Names must not end with
+# "timeout": openstack folds any such setting into api_timeout.
+_TIMEOUT_OPTIONS = ('timeout_connect', 'timeout_read', 'timeout_write')
+
+_READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def to_bool(value):
+    """Read a boolean setting, which may be given as a string."""
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+def operation_class(method):
+    """Return ``read`` or ``write`` depending on an HTTP method."""
+    return 'read' if method.upper() in _READ_METHODS else 'write'
+
+
+class LeaseHTTPAdapter(adapters.HTTPAdapter):
+    """An HTTP adapter with tunable pooling and socket options."""
+
+    def __init__(self, pool_connections=adapters.DEFAULT_POOLSIZE,
+                 pool_maxsize=adapters.DEFAULT_POOLSIZE, pool_block=False,
+                 tcp_nodelay=True, tcp_keepalive=True, tcp_keepidle=60):
+        """Create an adapter.
+
+        :param int pool_connections: The number of hosts to keep a pool of
+            connections for.
+        :param int pool_maxsize: The maximum number of connections kept
+            open to a host.
+        :param bool pool_block: Whether to wait for a connection to be
+            returned to the pool rather than open a new one that will not be
+            kept when all of them are in use.
+        :param bool tcp_nodelay: Whether to disable Nagle's algorithm.
+        :param bool tcp_keepalive: Whether to send TCP keep-alive probes.
+        :param int tcp_keepidle: The idle time, in seconds, before sending
+            keep-alive probes, where supported.
+        """
+        self.socket_options = [
+            (socket.IPPROTO_TCP, socket.TCP_NODELAY, int(tcp_nodelay)),
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, int(tcp_keepalive)),
+        ]
+        if tcp_keepalive and hasattr(socket, 'TCP_KEEPIDLE'):
+            self.socket_options.append(
+                (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, tcp_keepidle))
+        super(LeaseHTTPAdapter, self).__init__(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+            pool_block=pool_block)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault('socket_options', self.socket_options)
+        super(LeaseHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+def pool_options(config):
+    """Return the connection pool options set in a cloud configuration.
+
+    :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+    :returns: The keyword arguments of :class:`LeaseHTTPAdapter`; empty when
+        none is set.
+    """
+    options = {}
+    for name, convert in _POOL_OPTIONS.items():
+        value = config.config.get('lease_' + name)
+        if value is not None:
+            options[name] = (to_bool if convert is bool else convert)(value)
+    return options
+
+
+def timeouts(config):
+    """Return the timeouts of each operation class set in a configuration.
+
+    A part left unset falls back to ``api_timeout``, the timeout of the
+    other services; a connect timeout left unset otherwise falls back to
+    the read or write timeout, as a single timeout would.
+
+    :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+    :returns: A dict mapping ``read`` and ``write`` to ``(connect, read)``
+        timeout tuples, as accepted by requests, for the classes with a
+        timeout.
+    """
+    values = {name: config.config.get('lease_' + name)
+              for name in _TIMEOUT_OPTIONS}
+    if all(value is None for value in values.values()):
+        return {}
+
+    def seconds(*values):
+        for value in values:
+            if value is not None:
+                return float(value)
+        return None
+
+    default = config.config.get('api_timeout')
+    result = {}
+    for name in ('read', 'write'):
+        timeout = seconds(values['timeout_' + name], default)
+        connect = seconds(values['timeout_connect'], default, timeout)
+        if connect is not None or timeout is not None:
+            result[name] = (connect, timeout)
+    return result
+
+
+def _prefix(endpoint):
+    return endpoint.rstrip('/') + '/'
+
+
+def mount(session, endpoint, **options):
+    """Use a :class:`LeaseHTTPAdapter` for the requests to an endpoint.
+
+    :param session: The :class:`~keystoneauth1.session.Session` to alter.
+    :param str endpoint: The lease endpoint; the adapter serves the URLs
+        under its path. Other services using the session are not affected,
+        unless their endpoints are under the same path.
+    :param dict options: The arguments of :class:`LeaseHTTPAdapter`.
+    :returns: The mounted adapter.
+    """
+    adapter = LeaseHTTPAdapter(**options)
+    session.session.mount(_prefix(endpoint), adapter)
+    return adapter
+
+
+def stats(session, endpoint):
+    """Return the state of the connection pools used for an endpoint.
+
+    :param session: The :class:`~keystoneauth1.session.Session` in use.
+    :param str endpoint: The lease endpoint.
+    :returns: A list with a dict per pool, giving the ``host``, ``port``,
+        the ``maxsize`` of the pool, the connections ``in_use`` and
+        ``idle``, the number of connections ``created`` and of
+        ``requests`` sent, and the ``utilization`` of the pool.
+    """
+    url = urllib.parse.urlsplit(endpoint)
+    adapter = session.session.get_adapter(_prefix(endpoint))
+    manager = getattr(adapter, 'poolmanager', None)
+    if manager is None:
+        return []
+    result = []
+    for key in manager.pools.keys():
+        pool = manager.pools.get(key)
+        if pool is None or pool.host != url.hostname:
+            continue
+        # The queue starts full of placeholders; a connection in use has
+        # taken one out.
+        in_use = pool.pool.maxsize - pool.pool.qsize()
+        result.append({
+            'host': pool.host,
+            'port': pool.port,
+            'maxsize': pool.pool.maxsize,
+            'in_use': in_use,
+            'idle': sum(1 for conn in list(pool.pool.queue)
+                        if conn is not None),
+            'created': pool.num_connections,
+            'requests': pool.num_requests,
+            'utilization': in_use / pool.pool.maxsize,
+        })
+    return result
@@ -10,13 +10,28 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+
+from esi.lease.v1 import _availability
+from esi.lease.v1 import _bulk
 from esi.lease.v1 import _common
+from esi.lease.v1 import _conditional
+from esi.lease.v1 import _follow
+from esi.lease.v1 import _inventory
+from esi.lease.v1 import _metrics
+from esi.lease.v1 import _observe
+from esi.lease.v1 import _pool
+from esi.lease.v1 import _ratelimit
+from esi.lease.v1 import _retry
+from esi.lease.v1 import _singleflight
+from esi.lease.v1 import _tracing
 from esi.lease.v1 import event as _event
 from esi.lease.v1 import lease as _lease
 from esi.lease.v1 import node as _node
 from esi.lease.v1 import offer as _offer
 
 from openstack import proxy
+from openstack import resource
 
 
 class Proxy(proxy.Proxy):
@@ -28,6 +43,98 @@ class Proxy(proxy.Proxy):
         "event": _event.Event
     }
 
+    def __init__(self, *args, **kwargs):
+        super(Proxy, self).__init__(*args, **kwargs)
+        #: The validators of fetched and listed resources, see
+        #: :class:`~esi.lease.v1._conditional.ValidatorCache`.
+        self.validator_cache = _conditional.ValidatorCache()
+        #: ``(connect, read)`` timeouts of ``read`` and ``write`` requests.
+        self.timeouts = {}
+        #: Coalesces identical concurrent reads, see
+        #: :class:`~esi.lease.v1._singleflight.SingleFlight`.
+        self.single_flight = _singleflight.SingleFlight()
+        #: The :class:`~esi.lease.v1._retry.RetryPolicy` of every request.
+        self.retry_policy = _retry.RetryPolicy()
+        #: The :class:`~esi.lease.v1._ratelimit.RateLimiter` of every
+        #: request, shared by the threads using this proxy.
+        self.rate_limiter = _ratelimit.RateLimiter()
+        #: The callables receiving the timing events of this proxy, see
+        #: :meth:`add_observer`.
+        self.observers = ()
+        self._observers_lock = threading.RLock()
+        #: The :class:`~esi.lease.v1._metrics.LeaseMetrics` of this proxy,
+        #: once enabled with :meth:`enable_metrics`.
+        self.metrics = None
+        #: The :class:`~esi.lease.v1._tracing.Tracer` creating the spans of
+        #: the lease calls, or a no-op one when OpenTelemetry is missing.
+        self.tracer = _tracing.default()
+
+    def request(self, url, method, *args, **kwargs):
+        timeout = self.timeouts.get(_pool.operation_class(method))
+        if timeout is not None:
+            kwargs.setdefault('timeout', timeout)
+        operation = _ratelimit.operation(method, url)
+
+        def send():
+            return self.retry_policy.call(method, lambda: (
+                self.rate_limiter.call(operation, lambda: super(
+                    Proxy, self).request(url, method, *args, **kwargs))))
+
+        if self.observers:
+            def observed(send=send):
+                return _observe.observe_request(
+                    self, url, method, send,
+                    streamed=kwargs.get('stream', False))
+            send = observed
+        return self.tracer.call(method, url, kwargs, send)
+
+    def add_observer(self, observer):
+        """Receive the timing events of this proxy.
+
+        The observer is called with an :class:`~esi.lease.v1._observe.Event`
+        after each request, each page of a listing and each resource fetch,
+        from the thread that made it. Errors of observers are logged and
+        ignored. Without observers, nothing is measured.
+
+        :param observer: A callable taking an event, such as an
+            :class:`~esi.lease.v1._observe.Observer`.
+        :returns: The observer.
+        """
+        with self._observers_lock:
+            self.observers = self.observers + (observer,)
+        return observer
+
+    def remove_observer(self, observer):
+        """Stop passing timing events to an observer.
+
+        :param observer: An observer given to :meth:`add_observer`.
+        """
+        with self._observers_lock:
+            self.observers = tuple(o for o in self.observers
+                                   if o != observer)
+
+    def enable_metrics(self, buckets=_metrics.DEFAULT_BUCKETS):
+        """Aggregate latency histograms and counters of the lease calls.
+
+        Does nothing if the metrics are already enabled.
+
+        :param buckets: The upper bounds of the latency buckets, in seconds.
+        :returns: The :class:`~esi.lease.v1._metrics.LeaseMetrics`, also
+            available as :attr:`metrics`.
+        """
+        with self._observers_lock:
+            if self.metrics is None:
+                self.metrics = self.add_observer(
+                    _metrics.LeaseMetrics(self, buckets=buckets))
+            return self.metrics
+
+    def pool_stats(self):
+        """Return the state of the connection pools to the lease service.
+
+        :returns: A list of dicts, see :func:`esi.lease.v1._pool.stats`.
+        """
+        return _pool.stats(self.session, self.get_endpoint())
+
     def _get_with_fields(self, resource_type, value, fields=None):
         """Fetch an ESI-LEAP resource.
 
@@ -45,13 +152,21 @@ class Proxy(proxy.Proxy):
         kwargs = {}
         if fields:
             kwargs['fields'] = _common.fields_type(fields, resource_type)
-        return res.fetch(
-            self,
-            error_message="No {resource_type} found for {value}".format(
-                resource_type=resource_type.__name__, value=value
+        # Identical concurrent gets share one request. The others receive a
+        # copy of its state, applied to their own resource.
+        fetched = self.single_flight.do(
+            _singleflight.key('get', resource_type.__name__, res.id, kwargs),
+            lambda: res.fetch(
+                self,
+                error_message="No {resource_type} found for {value}".format(
+                    resource_type=resource_type.__name__, value=value
+                ),
+                **kwargs
             ),
-            **kwargs
-        )
+            share=lambda fetched: fetched._snapshot())
+        if fetched is res:
+            return res
+        return res._restore(fetched)
 
     def offers(self, **query):
         """Retrieve a generator of offers.
@@ -76,6 +191,16 @@ class Proxy(proxy.Proxy):
               resource uuid.
             * ``resource_class``:only return the ones associated with this specific
               resource class.
+            * ``prefetch``: not sent to the server; fetch up to this many
+              pages ahead on a background thread while the current page is
+              processed.
+            * ``fields``: only return these fields of each offer, given by
+              attribute or server-side name.
+            * ``raw``: when ``True``, yield lightweight
+              :class:`~esi.lease.v1._record.Record` objects instead of
+              resources.
+            * ``stream``: when ``True``, decode each response incrementally
+              and yield items while the body is still being received.
 
         :returns: A generator of offer instances.
         """
@@ -105,6 +230,23 @@ class Proxy(proxy.Proxy):
         """
         return self._get_with_fields(_offer.Offer, offer, fields=fields)
 
+    def get_offers(self, offers, fields=None,
+                   max_workers=_bulk.DEFAULT_WORKERS):
+        """Get many offers concurrently.
+
+        :param offers: An iterable of IDs of offers or
+            :class:`~esi_leap.v1.offer.Offer` instances.
+        :param fields: Limit the resource fields to fetch.
+        :param int max_workers: The maximum number of concurrent requests.
+
+        :returns: The offers found, in the order of ``offers``, and the IDs
+            of the missing ones.
+        :rtype: :class:`~esi.lease.v1._bulk.GetManyResult`
+        """
+        return _bulk.get_many(
+            lambda offer: self.get_offer(offer, fields=fields), offers,
+            max_workers=max_workers)
+
     def delete_offer(self, offer, ignore_missing=True):
         """Delete an offer.
 
@@ -121,6 +263,40 @@ class Proxy(proxy.Proxy):
         """
         return self._delete(_offer.Offer, offer, ignore_missing=ignore_missing)
 
+    def create_offers(self, offers, max_workers=_bulk.DEFAULT_WORKERS):
+        """Create many offers concurrently.
+
+        :param offers: An iterable of dicts of attributes, each used to
+            create an :class:`~esi_leap.v1.offer.Offer`.
+        :param int max_workers: The maximum number of concurrent requests.
+
+        :returns: The results of the creations. Failed creations do not
+            stop the others and are reported through
+            :attr:`~esi.lease.v1._bulk.BulkResults.failed`.
+        :rtype: :class:`~esi.lease.v1._bulk.BulkResults`
+        """
+        return _bulk.BulkResults(lambda attrs: self.create_offer(**attrs),
+                                 offers, max_workers=max_workers)
+
+    def delete_offers(self, offers, ignore_missing=True,
+                      max_workers=_bulk.DEFAULT_WORKERS):
+        """Delete many offers concurrently.
+
+        :param offers: An iterable of offer IDs or
+            :class:`~esi_leap.v1.offer.Offer` instances.
+        :param bool ignore_missing: When set to ``False``, a missing offer
+            is reported as a failed
+            :class:`~esi.lease.v1._bulk.BulkResult`.
+        :param int max_workers: The maximum number of concurrent requests.
+
+        :returns: The results of the deletions.
+        :rtype: :class:`~esi.lease.v1._bulk.BulkResults`
+        """
+        return _bulk.BulkResults(
+            lambda offer: self.delete_offer(offer,
+                                            ignore_missing=ignore_missing),
+            offers, max_workers=max_workers)
+
     def claim_offer(self, offer, **attrs):
         """Claim an offer.
 
@@ -158,6 +334,16 @@ class Proxy(proxy.Proxy):
               resource class.
             * ``purpose``:only return the ones associated with this specific
               purpose.
+            * ``prefetch``: not sent to the server; fetch up to this many
+              pages ahead on a background thread while the current page is
+              processed.
+            * ``fields``: only return these fields of each lease, given by
+              attribute or server-side name.
+            * ``raw``: when ``True``, yield lightweight
+              :class:`~esi.lease.v1._record.Record` objects instead of
+              resources.
+            * ``stream``: when ``True``, decode each response incrementally
+              and yield items while the body is still being received.
 
         :returns: A generator of lease instances.
         """
@@ -200,6 +386,23 @@ class Proxy(proxy.Proxy):
         """
         return self._get_with_fields(_lease.Lease, lease, fields=fields)
 
+    def get_leases(self, leases, fields=None,
+                   max_workers=_bulk.DEFAULT_WORKERS):
+        """Get many leases concurrently.
+
+        :param leases: An iterable of IDs of leases or
+            :class:`~esi_leap.v1.lease.Lease` instances.
+        :param fields: Limit the resource fields to fetch.
+        :param int max_workers: The maximum number of concurrent requests.
+
+        :returns: The leases found, in the order of ``leases``, and the IDs
+            of the missing ones.
+        :rtype: :class:`~esi.lease.v1._bulk.GetManyResult`
+        """
+        return _bulk.get_many(
+            lambda lease: self.get_lease(lease, fields=fields), leases,
+            max_workers=max_workers)
+
     def delete_lease(self, lease, ignore_missing=True):
         """Delete a lease.
 
@@ -216,13 +419,99 @@ class Proxy(proxy.Proxy):
         """
         return self._delete(_lease.Lease, lease, ignore_missing=ignore_missing)
 
+    def create_leases(self, leases, max_workers=_bulk.DEFAULT_WORKERS):
+        """Create many leases concurrently.
+
+        :param leases: An iterable of dicts of attributes, each used to
+            create a :class:`~esi_leap.v1.lease.Lease`.
+        :param int max_workers: The maximum number of concurrent requests.
+
+        :returns: The results of the creations. Failed creations do not
+            stop the others and are reported through
+            :attr:`~esi.lease.v1._bulk.BulkResults.failed`.
+        :rtype: :class:`~esi.lease.v1._bulk.BulkResults`
+        """
+        return _bulk.BulkResults(lambda attrs: self.create_lease(**attrs),
+                                 leases, max_workers=max_workers)
+
+    def update_leases(self, updates, max_workers=_bulk.DEFAULT_WORKERS):
+        """Update many leases concurrently.
+
+        :param dict updates: A mapping of lease IDs to dicts of the
+            attributes to update on that lease.
+        :param int max_workers: The maximum number of concurrent requests.
+
+        :returns: The results of the updates. The ``item`` of each result
+            is the lease ID.
+        :rtype: :class:`~esi.lease.v1._bulk.BulkResults`
+        """
+        return _bulk.BulkResults(
+            lambda lease: self.update_lease(lease, **updates[lease]),
+            updates, max_workers=max_workers)
+
+    def delete_leases(self, leases, ignore_missing=True,
+                      max_workers=_bulk.DEFAULT_WORKERS):
+        """Delete many leases concurrently.
+
+        :param leases: An iterable of lease IDs or
+            :class:`~esi_leap.v1.lease.Lease` instances.
+        :param bool ignore_missing: When set to ``False``, a missing lease
+            is reported as a failed
+            :class:`~esi.lease.v1._bulk.BulkResult`.
+        :param int max_workers: The maximum number of concurrent requests.
+
+        :returns: The results of the deletions.
+        :rtype: :class:`~esi.lease.v1._bulk.BulkResults`
+        """
+        return _bulk.BulkResults(
+            lambda lease: self.delete_lease(lease,
+                                            ignore_missing=ignore_missing),
+            leases, max_workers=max_workers)
+
     def nodes(self, **query):
         """Retrieve a generator of nodes.
 
-        :returns: A generator of lease instances.
+        :param dict query: Optional query parameters to be sent to restrict
+            the nodes returned. Available parameters include:
+
+            * ``prefetch``: not sent to the server; fetch up to this many
+              pages ahead on a background thread while the current page is
+              processed.
+            * ``fields``: only return these fields of each node, given by
+              attribute or server-side name.
+            * ``raw``: when ``True``, yield lightweight
+              :class:`~esi.lease.v1._record.Record` objects instead of
+              resources.
+            * ``stream``: when ``True``, decode each response incrementally
+              and yield items while the body is still being received.
+
+        :returns: A generator of node instances.
         """
         return _node.Node.list(self, **query)
 
+    def get_nodes(self, nodes, fields=None):
+        """Get many nodes.
+
+        The lease API cannot fetch a single node, so this lists the nodes
+        once and picks the requested ones.
+
+        :param nodes: An iterable of UUIDs of nodes or
+            :class:`~esi_leap.v1.node.Node` instances.
+        :param fields: Limit the resource fields to fetch.
+
+        :returns: The nodes found, in the order of ``nodes``, and the UUIDs
+            of the missing ones.
+        :rtype: :class:`~esi.lease.v1._bulk.GetManyResult`
+        """
+        ids = [resource.Resource._get_id(node) for node in nodes]
+        if fields:
+            fields = list(_common.fields_type(fields, _node.Node).split(','))
+            if 'uuid' not in fields:
+                fields.append('uuid')
+        listed = {node.id: node for node in self.nodes(fields=fields)}
+        return _bulk.GetManyResult([listed[i] for i in ids if i in listed],
+                                   [i for i in ids if i not in listed])
+
     def events(self, **query):
         """Retrieve a generator of events.
 
@@ -240,7 +529,70 @@ class Proxy(proxy.Proxy):
               node type.
             * ``resource_uuid``:only return the ones associated with this specific
               resource uuid.
+            * ``prefetch``: not sent to the server; fetch up to this many
+              pages ahead on a background thread while the current page is
+              processed.
+            * ``fields``: only return these fields of each event, given by
+              attribute or server-side name.
+            * ``raw``: when ``True``, yield lightweight
+              :class:`~esi.lease.v1._record.Record` objects instead of
+              resources.
+            * ``stream``: when ``True``, decode each response incrementally
+              and yield items while the body is still being received.
 
         :returns: A generator of event instances.
         """
         return _event.Event.list(self, **query)
+
+    def follow_events(self, last_event_id=None, checkpoint=None,
+                      min_interval=_follow.MIN_INTERVAL,
+                      max_interval=_follow.MAX_INTERVAL, **query):
+        """Retrieve a never-ending generator of events as they happen.
+
+        The event log is polled for events after the last one returned,
+        quickly while events keep coming and less often when it is idle.
+        Events are yielded once each, ordered by ID.
+
+        :param last_event_id: Only return events after this one. Defaults
+            to the cursor saved in ``checkpoint``, or to returning all
+            existing events first.
+        :param checkpoint: The path of a file in which the ID of the last
+            processed event is saved, so that following can be resumed. An
+            event is considered processed once the next one is requested.
+        :param float min_interval: The delay between polls, in seconds,
+            while events keep coming.
+        :param float max_interval: The longest delay between polls, in
+            seconds, reached by doubling the delay after every empty poll.
+        :param dict query: Optional query parameters to be sent to restrict
+            the events returned. See :meth:`events`.
+
+        :returns: A generator of event instances.
+        """
+        follower = _follow.EventFollower(
+            last_event_id=last_event_id, checkpoint=checkpoint,
+            min_interval=min_interval, max_interval=max_interval)
+        return _follow.follow(self.events, follower, **query)
+
+    def inventory(self, **kwargs):
+        """Create an in-process view of the offers, leases and nodes.
+
+        The view is loaded once and then kept up to date from the event
+        log, so lookups do not call the API. See
+        :class:`~esi.lease.v1._inventory.Inventory` for the arguments.
+
+        :returns: An :class:`~esi.lease.v1._inventory.Inventory`, not yet
+            loaded; call its ``start`` method.
+        """
+        return _inventory.Inventory(self, **kwargs)
+
+    def availability_index(self, **query):
+        """Index the availability windows of the offers.
+
+        :param dict query: Optional query parameters to be sent to restrict
+            the offers indexed. See :meth:`offers`.
+
+        :returns: An :class:`~esi.lease.v1._availability.AvailabilityIndex`,
+            which can be refreshed with its ``update`` and ``remove``
+            methods.
+        """
+        return _availability.AvailabilityIndex(self.offers(**query))
@@ -0,0 +1,212 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+import urllib.parse
+
+#: The operation types requests are limited by.
+OPERATIONS = ('read', 'claim', 'delete', 'write')
+
+_READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def operation(method, url):
+    """Return the operation type of a request.
+
+    :param str method: The HTTP method.
+    :param str url: The URL or path of the request.
+    :returns: One of :data:`OPERATIONS`.
+    """
+    method = method.upper()
+    if method in _READ_METHODS:
+        return 'read'
+    if method == 'DELETE':
+        return 'delete'
+    if urllib.parse.urlsplit(url).path.rstrip('/').endswith('/claim'):
+        return 'claim'
+    return 'write'
+
+
+class TokenBucket:
+    """A token bucket, allowing ``rate`` calls per second on average.
+
+    Up to ``burst`` calls can be made at once after an idle period. Callers
+    reserve their token before sleeping, so they are served in order.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic,
+                 sleep=time.sleep):
+        """Create a token bucket.
+
+        :param float rate: The number of tokens added per second.
+        :param int burst: The capacity of the bucket, ``rate`` rounded up by
+            default.
+        :param callable clock: Returns the current time in seconds.
+        :param callable sleep: Called with the time to wait for a token.
+        """
+        self.rate = float(rate)
+        self.burst = float(burst or max(1, -(-self.rate // 1)))
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def acquire(self):
+        """Take a token, waiting for it if needed.
+
+        :returns: The time waited, in seconds.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens
+                               + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+class _Limit:
+    """The limits and metrics of one operation type."""
+
+    def __init__(self, rate=None, burst=None, max_in_flight=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.bucket = (TokenBucket(rate, burst, clock=clock, sleep=sleep)
+                       if rate else None)
+        self.max_in_flight = max_in_flight
+        self.semaphore = (threading.BoundedSemaphore(max_in_flight)
+                          if max_in_flight else None)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.delayed = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.in_flight = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'rate': self.bucket.rate if self.bucket else None,
+                'burst': self.bucket.burst if self.bucket else None,
+                'max_in_flight': self.max_in_flight,
+                'requests': self.requests,
+                'delayed': self.delayed,
+                'wait_time': self.wait_time,
+                'max_wait': self.max_wait,
+                'in_flight': self.in_flight,
+            }
+
+
+class RateLimiter:
+    """Limit the rate and concurrency of lease API requests.
+
+    Each operation type of :data:`OPERATIONS` has its own token bucket and
+    maximum number of requests in flight, shared by every thread using the
+    limiter. Operation types without limits are not throttled, but their
+    requests are still counted.
+    """
+
+    def __init__(self, limits=None, clock=time.monotonic, sleep=time.sleep):
+        """Create a rate limiter.
+
+        :param dict limits: A mapping of operation types to dicts with the
+            optional keys ``rate`` (requests per second), ``burst`` and
+            ``max_in_flight``.
+        :param callable clock: Returns the current time in seconds.
+        :param callable sleep: Called with the time to wait for a token.
+        :raises: ValueError for unknown operation types, or a ``burst``
+            without a ``rate``.
+        """
+        limits = limits or {}
+        unknown = set(limits) - set(OPERATIONS)
+        if unknown:
+            raise ValueError('Unknown operation types: %s'
+                             % ', '.join(sorted(unknown)))
+        unlimited = sorted(op for op, limit in limits.items()
+                           if limit.get('burst') is not None
+                           and not limit.get('rate'))
+        if unlimited:
+            raise ValueError('A burst requires a rate limit for: %s'
+                             % ', '.join(unlimited))
+        self._limits = {op: _Limit(clock=clock, sleep=sleep,
+                                   **limits.get(op, {}))
+                        for op in OPERATIONS}
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a rate limiter from the settings of a cloud region.
+
+        The settings are ``lease_rate_limit_<operation>`` (requests per
+        second), ``lease_rate_burst_<operation>`` and
+        ``lease_max_in_flight_<operation>``, where the operation is one of
+        ``read``, ``claim``, ``delete`` and ``write``.
+
+        :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+        """
+        limits = {}
+        for op in OPERATIONS:
+            for name, key, convert in (
+                    ('rate', 'lease_rate_limit_', float),
+                    ('burst', 'lease_rate_burst_', int),
+                    ('max_in_flight', 'lease_max_in_flight_', int)):
+                value = config.config.get(key + op)
+                if value is not None:
+                    limits.setdefault(op, {})[name] = convert(value)
+        return cls(limits)
+
+    def call(self, operation, send):
+        """Send a request once the limits of its operation type allow it.
+
+        :param str operation: One of :data:`OPERATIONS`.
+        :param callable send: Sends the request and returns the response.
+        :returns: The response.
+        """
+        limit = self._limits[operation]
+        wait = 0.0
+        if (limit.semaphore is not None
+                and not limit.semaphore.acquire(blocking=False)):
+            started = limit.clock()
+            limit.semaphore.acquire()
+            wait = limit.clock() - started
+        try:
+            if limit.bucket is not None:
+                wait += limit.bucket.acquire()
+            with limit.lock:
+                limit.requests += 1
+                limit.in_flight += 1
+                if wait > 0:
+                    limit.delayed += 1
+                    limit.wait_time += wait
+                    limit.max_wait = max(limit.max_wait, wait)
+            try:
+                return send()
+            finally:
+                with limit.lock:
+                    limit.in_flight -= 1
+        finally:
+            if limit.semaphore is not None:
+                limit.semaphore.release()
+
+    def stats(self):
+        """Return the limits and metrics of every operation type.
+
+        :returns: A dict mapping operation types to dicts with the limits
+            and the number of ``requests``, of ``delayed`` requests, the
+            total and maximum ``wait_time`` and ``max_wait`` in seconds, and
+            the number of requests ``in_flight``.
+        """
+        return {op: limit.stats() for op, limit in self._limits.items()}
@@ -0,0 +1,84 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+_record_types = {}
+
+
+class Record:
+    """A lightweight, read-only view of a listed resource.
+
+    Records have the attribute names of the resource they stand for, such
+    as ``uuid``, ``resource_uuid`` or ``node_type``, but none of the
+    bookkeeping of :class:`~openstack.resource.Resource`. Nested values such
+    as ``properties`` are kept as decoded by the JSON parser and never
+    copied.
+    """
+
+    __slots__ = ()
+
+    #: Pairs of attribute and server-side names, set on subclasses.
+    _fields = ()
+    #: The attribute holding the resource ID.
+    _id_attr = 'id'
+
+    def __init__(self, item):
+        get = item.get
+        for attr, name in self._fields:
+            setattr(self, attr, get(name))
+
+    @property
+    def id(self):
+        return getattr(self, self._id_attr)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def to_dict(self):
+        return {attr: getattr(self, attr) for attr, _ in self._fields}
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(
+            '%s=%r' % (attr, getattr(self, attr)) for attr, _ in self._fields))
+
+
+def record_type(resource_type):
+    """Return the :class:`Record` subclass for a resource class.
+
+    :param resource_type: A :class:`~openstack.resource.Resource` subclass.
+    :returns: A :class:`Record` subclass with one slot per body attribute.
+    """
+    try:
+        return _record_types[resource_type]
+    except KeyError:
+        pass
+
+    id_attr = resource_type._alternate_id() or 'id'
+    fields = tuple((attr, name) for name, attr
+                   in resource_type._body_mapping().items()
+                   if attr != 'id' or id_attr == 'id')
+    namespace = {'__slots__': tuple(attr for attr, _ in fields),
+                 '_fields': fields,
+                 '_id_attr': id_attr}
+    cls = type(resource_type.__name__ + 'Record', (Record,), namespace)
+    _record_types[resource_type] = cls
+    return cls
@@ -0,0 +1,164 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import datetime
+import email.utils
+import random
+import threading
+import time
+
+from keystoneauth1 import exceptions as ks_exceptions
+
+#: Methods which can be repeated without changing the outcome.
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+#: The default status codes worth retrying.
+STATUS_CODES = (429, 502, 503, 504)
+
+#: The status codes which guarantee that a request was not processed, so
+#: that even non-idempotent requests can be retried.
+NOT_PROCESSED_STATUS_CODES = (429,)
+
+
+def _retry_after(response):
+    """Return the delay requested by a Retry-After header, in seconds."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+def _codes(value):
+    if isinstance(value, str):
+        value = value.split(',')
+    return tuple(int(code) for code in value)
+
+
+class RetryPolicy:
+    """When and how to retry lease API requests.
+
+    Failed requests are retried after an exponential backoff with full
+    jitter, or after the delay asked by a ``Retry-After`` header if longer.
+    Requests with a non-idempotent method, such as claiming an offer, are
+    only retried when the response guarantees they were not processed.
+    """
+
+    def __init__(self, max_attempts=3, backoff=0.5, max_backoff=30.0,
+                 status_codes=STATUS_CODES, max_retry_after=60.0,
+                 sleep=time.sleep):
+        """Create a retry policy.
+
+        :param int max_attempts: The maximum number of attempts of a
+            request; 1 disables retries.
+        :param float backoff: The base delay before a retry, in seconds,
+            doubled at each attempt.
+        :param float max_backoff: The maximum backoff delay, in seconds.
+        :param status_codes: The response status codes to retry.
+        :param float max_retry_after: Requests asking to be retried later
+            than this, in seconds, are not retried.
+        :param callable sleep: Called with the delay before each retry.
+        """
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.status_codes = tuple(status_codes)
+        self.max_retry_after = max_retry_after
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        #: The number of retries, by status code or exception name.
+        self.retries = collections.Counter()
+
+    @classmethod
+    def from_config(cls, config):
+        """Create a retry policy from the settings of a cloud region.
+
+        The settings are ``lease_retry_max_attempts``,
+        ``lease_retry_backoff``, ``lease_retry_max_backoff``,
+        ``lease_retry_status_codes`` and ``lease_retry_max_retry_after``.
+
+        :param config: A :class:`~openstack.config.cloud_region.CloudRegion`.
+        """
+        kwargs = {}
+        for name, convert in (('max_attempts', int), ('backoff', float),
+                              ('max_backoff', float),
+                              ('status_codes', _codes),
+                              ('max_retry_after', float)):
+            value = config.config.get('lease_retry_' + name)
+            if value is not None:
+                kwargs[name] = convert(value)
+        return cls(**kwargs)
+
+    def _delay(self, attempt, response=None):
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+        retry_after = None if response is None else _retry_after(response)
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+    def _count(self, reason):
+        with self._lock:
+            self.retries[reason] += 1
+
+    def call(self, method, send):
+        """Send a request, retrying it according to the policy.
+
+        :param str method: The HTTP method of the request.
+        :param callable send: Sends the request and returns the response.
+        :returns: The last response.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 1
+        while True:
+            last = attempt >= self.max_attempts
+            try:
+                response = send()
+            except ks_exceptions.RetriableConnectionFailure as e:
+                # The request may have been processed before the failure.
+                if last or not idempotent:
+                    raise
+                reason, delay = type(e).__name__, self._delay(attempt)
+            else:
+                code = response.status_code
+                if (last or code not in self.status_codes
+                        or not (idempotent
+                                or code in NOT_PROCESSED_STATUS_CODES)):
+                    return response
+                reason, delay = code, self._delay(attempt, response)
+                if delay is None:
+                    return response
+                response.close()
+            self._count(reason)
+            self.sleep(delay)
+            attempt += 1
+
+    def stats(self):
+        """Return the number of retries, by reason and in total."""
+        with self._lock:
+            stats = {str(reason): count
+                     for reason, count in self.retries.items()}
+        stats['total'] = sum(stats.values())
+        return stats
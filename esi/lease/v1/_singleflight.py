@@ -0,0 +1,98 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import threading
+
+
+def key(*parts):
+    """Return a key identifying a call from its name and arguments."""
+    return json.dumps(parts, sort_keys=True, default=str)
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls.
+
+    While a call is in flight, identical calls, as told by their key, wait
+    for it and receive its result or exception instead of running again.
+    Nothing is kept once the call returns, so this never serves stale data.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        #: The number of calls actually run.
+        self.executed = 0
+        #: The number of calls which shared the result of another one.
+        self.collapsed = 0
+
+    def do(self, key, func, share=None):
+        """Run ``func``, unless an identical call is in flight.
+
+        :param str key: Identifies the call, see :func:`key`.
+        :param callable func: The call, without arguments.
+        :param callable share: Called with the result of ``func`` when other
+            callers waited for it, to return what they receive instead, such
+            as a copy that the caller of ``func`` cannot modify.
+        :returns: The result of ``func``, or what ``share`` returned for the
+            identical call.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                call.waiters += 1
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        else:
+            with self._lock:
+                # No caller can join once the call is removed.
+                del self._calls[key]
+                waiters = call.waiters
+            if waiters:
+                try:
+                    call.result = result if share is None else share(result)
+                except BaseException as e:
+                    call.error = e
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        """Return the counters as a dict."""
+        return {'executed': self.executed, 'collapsed': self.collapsed}
@@ -0,0 +1,122 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import codecs
+import json
+
+from openstack import exceptions
+
+#: The number of bytes read from the response at a time.
+CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+
+class StreamingObject:
+    """Incrementally decode a JSON object holding one large array.
+
+    The items of the array stored under ``key`` are decoded and yielded by
+    :meth:`items` one at a time while the body is still being read, so only
+    one item needs to be held in memory. The other members of the object,
+    such as pagination links, are available from :attr:`rest` once
+    :meth:`items` is exhausted.
+    """
+
+    def __init__(self, chunks, key):
+        """Create a decoder.
+
+        :param chunks: An iterable of ``bytes`` or ``str`` chunks of the
+            body, e.g. ``response.iter_content(CHUNK_SIZE)``.
+        :param str key: The name of the member holding the array.
+        """
+        self._chunks = iter(chunks)
+        self._key = key
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        #: The other members of the object, filled in by :meth:`items`.
+        self.rest = {}
+
+    def _read(self):
+        if self._eof:
+            raise exceptions.SDKException(
+                'Truncated JSON response, expected more data')
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._eof = True
+            self._buffer += self._utf8.decode(b'', final=True)
+            return
+        if isinstance(chunk, bytes):
+            chunk = self._utf8.decode(chunk)
+        self._buffer += chunk
+
+    def _peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self._pos < len(self._buffer):
+                if self._buffer[self._pos] not in _WHITESPACE:
+                    return self._buffer[self._pos]
+                self._pos += 1
+            self._read()
+
+    def _expect(self, *chars):
+        char = self._peek()
+        if char not in chars:
+            raise exceptions.SDKException(
+                'Unexpected %r in JSON response, expected one of %s'
+                % (char, ', '.join(repr(c) for c in chars)))
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Decode the next JSON value."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                value, end = None, None
+            # A value ending with the buffer may be a truncated number or
+            # literal, so it is only accepted once more data is known.
+            if end is not None and (end < len(self._buffer) or self._eof):
+                self._pos = end
+                return value
+            self._read()
+
+    def items(self):
+        """Yield the decoded items of the array one by one."""
+        self._expect('{')
+        if self._peek() == '}':
+            return
+        while True:
+            name = self._value()
+            self._expect(':')
+            if name == self._key and self._peek() != '[':
+                yield self._value()
+            elif name == self._key:
+                self._pos += 1
+                if self._peek() == ']':
+                    self._pos += 1
+                else:
+                    while True:
+                        yield self._value()
+                        if self._expect(',', ']') == ']':
+                            break
+            else:
+                self.rest[name] = self._value()
+            if self._expect(',', '}') == '}':
+                return
@@ -0,0 +1,191 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextvars
+
+from esi.lease.v1 import _observe
+
+try:
+    from opentelemetry import propagate
+    from opentelemetry import trace
+except ImportError:
+    trace = None
+
+#: The instrumentation name of the spans.
+TRACER_NAME = 'esi.lease'
+
+# The page of a listing being fetched, whose request opens its span.
+_page = contextvars.ContextVar('esi_lease_page', default=None)
+
+
+class NoopTracer:
+    """A tracer doing nothing, used when tracing is disabled."""
+
+    enabled = False
+
+    def call(self, method, url, kwargs, send):
+        return send()
+
+    def pages(self, operation, resource_type, query, pages):
+        return pages
+
+
+#: The shared :class:`NoopTracer`.
+NOOP = NoopTracer()
+
+
+class _Page:
+    __slots__ = ('context', 'name', 'attributes', 'span')
+
+    def __init__(self, context, name, attributes):
+        self.context = context
+        self.name = name
+        self.attributes = attributes
+        self.span = None
+
+    def end(self, items=None, error=None):
+        if self.span is None:
+            return
+        if items is not None:
+            self.span.set_attribute('esi.lease.items', items)
+        if error is not None:
+            self.span.record_exception(error)
+            self.span.set_status(trace.StatusCode.ERROR, str(error))
+        self.span.end()
+
+
+class Tracer:
+    """Create OpenTelemetry spans for lease calls.
+
+    Requests get a client span named after their operation, such as
+    ``claim_offer``, and carry the trace context in their headers. A
+    listing gets a span for the whole iteration, with a child span per page
+    fetched, annotated with its number and item count; the request of a
+    page carries the context of the page span.
+    """
+
+    enabled = True
+
+    def __init__(self, tracer_provider=None):
+        """Create a tracer.
+
+        :param tracer_provider: The OpenTelemetry tracer provider, the
+            global one by default.
+        """
+        if trace is None:
+            raise RuntimeError('Tracing requires the opentelemetry-api '
+                               'package, install esisdk[tracing]')
+        self._tracer = trace.get_tracer(TRACER_NAME,
+                                        tracer_provider=tracer_provider)
+
+    @staticmethod
+    def _send(span, method, url, kwargs, send):
+        span.set_attribute('http.request.method', method)
+        span.set_attribute('url.full', url)
+        headers = dict(kwargs.get('headers') or {})
+        propagate.inject(headers)
+        kwargs['headers'] = headers
+        response = send()
+        span.set_attribute('http.response.status_code', response.status_code)
+        if response.status_code >= 400:
+            span.set_status(trace.StatusCode.ERROR,
+                            'HTTP %s' % response.status_code)
+        return response
+
+    def call(self, method, url, kwargs, send):
+        """Send a request within a span.
+
+        :param str method: The HTTP method.
+        :param str url: The URL of the request.
+        :param dict kwargs: The arguments of the request, whose headers are
+            updated with the trace context.
+        :param callable send: Sends the request with ``kwargs``.
+        """
+        page = _page.get()
+        if page is not None and page.span is None:
+            # The span of a page outlives its request, to cover building
+            # the resources, and is ended by pages().
+            page.span = self._tracer.start_span(
+                page.name, context=page.context, kind=trace.SpanKind.CLIENT,
+                attributes=page.attributes)
+            with trace.use_span(page.span, end_on_exit=False):
+                return self._send(page.span, method, url, kwargs, send)
+        operation, resource_type = _observe.operation_name(method, url)
+        with self._tracer.start_as_current_span(
+                operation, kind=trace.SpanKind.CLIENT) as span:
+            span.set_attribute('esi.lease.operation', operation)
+            if resource_type:
+                span.set_attribute('esi.lease.resource_type', resource_type)
+            return self._send(span, method, url, kwargs, send)
+
+    def pages(self, operation, resource_type, query, pages):
+        """Trace the pages of a listing.
+
+        :param str operation: The operation, e.g. ``list_offers``.
+        :param str resource_type: The resource type, e.g. ``offer``.
+        :param dict query: The query parameters of the listing.
+        :param pages: The generator of pages, each fetched on ``next()``.
+        """
+        attributes = {'esi.lease.operation': operation,
+                      'esi.lease.resource_type': resource_type}
+        attributes.update(('esi.lease.query.%s' % k, str(v))
+                          for k, v in query.items())
+        listing = self._tracer.start_span(operation, attributes=attributes)
+        context = trace.set_span_in_context(listing)
+        number = items = 0
+        try:
+            while True:
+                page = _Page(context, '%s page' % operation,
+                             dict(attributes, **{'esi.lease.page': number + 1}))
+                token = _page.set(page)
+                try:
+                    resources = next(pages)
+                except StopIteration:
+                    page.end()
+                    return
+                except BaseException as e:
+                    page.end(error=e)
+                    raise
+                finally:
+                    _page.reset(token)
+                number += 1
+                if isinstance(resources, list):
+                    page.end(items=len(resources))
+                    items += len(resources)
+                    yield resources
+                else:
+                    # Streamed pages are received while being consumed.
+                    try:
+                        yield resources
+                    finally:
+                        page.end(items=resources.count)
+                        items += resources.count
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                listing.record_exception(e)
+                listing.set_status(trace.StatusCode.ERROR, str(e))
+            raise
+        finally:
+            listing.set_attribute('esi.lease.pages', number)
+            listing.set_attribute('esi.lease.items', items)
+            listing.end()
+            pages.close()
+
+
+def default():
+    """Return a :class:`Tracer` if OpenTelemetry is installed, else NOOP."""
+    return Tracer() if trace is not None else NOOP
+
+
+def tracer(session):
+    """Return the tracer of a session, if it is a lease proxy."""
+    return getattr(session, 'tracer', None) or NOOP
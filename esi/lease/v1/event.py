@@ -10,10 +10,13 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from esi.lease.v1 import _common
+
 from openstack import resource
 
 
-class Event(resource.Resource):
+class Event(_common.ListMixin, _common.FetchMixin,
+            resource.Resource):
     resources_key = 'events'
     base_path = '/events'
 
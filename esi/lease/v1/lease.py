@@ -10,11 +10,14 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from esi.lease.v1 import _common
+
 from openstack import exceptions
 from openstack import resource
 
 
-class Lease(resource.Resource):
+class Lease(_common.ListMixin, _common.FetchMixin,
+            resource.Resource):
     resources_key = 'leases'
     base_path = '/leases'
 
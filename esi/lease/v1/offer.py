@@ -10,12 +10,15 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from esi.lease.v1 import _common
+
 from openstack import exceptions
 from openstack import resource
 from openstack import utils
 
 
-class Offer(resource.Resource):
+class Offer(_common.ListMixin, _common.FetchMixin,
+            resource.Resource):
     resources_key = 'offers'
     base_path = '/offers'
 
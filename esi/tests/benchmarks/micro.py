@@ -0,0 +1,245 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+micro
+-----
+
+Micro-benchmarks of the CPU hot paths of the lease SDK, on synthetic
+payloads shaped like esi-leap responses::
+
+    $ tox -e microbenchmark -- --filter hydrate --output after.json
+
+Each case reports ``ns_per_op``, the best time of one operation over
+several repeats, and its memory use measured with :mod:`tracemalloc`:
+``blocks_per_op`` and ``bytes_per_op`` still allocated once the result of
+the operation is kept, and ``peak_bytes_per_op``, the high-water mark of
+memory allocated while running one operation. Results can be compared with
+a baseline as with :mod:`esi.tests.benchmarks.throughput`.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+import uuid
+
+from esi.lease.v1 import event
+from esi.lease.v1 import lease
+from esi.lease.v1 import node
+from esi.lease.v1 import offer
+from esi.tests.benchmarks import throughput
+
+
+def _uuid(index):
+    return str(uuid.UUID(int=index, version=4))
+
+
+def _properties(count):
+    return {'property_%03d' % i: ('value-%d' % i if i % 3 else i)
+            for i in range(count)}
+
+
+def _windows(count):
+    return [['2030-01-%02dT00:00:00' % (i % 28 + 1),
+             '2030-02-%02dT00:00:00' % (i % 28 + 1)] for i in range(count)]
+
+
+def offer_item(properties=200, availabilities=50):
+    """Return an offer as listed by esi-leap."""
+    return {
+        'uuid': _uuid(1), 'name': 'offer-1', 'resource_type': 'ironic_node',
+        'resource_uuid': _uuid(2), 'resource': 'node-000001',
+        'resource_class': 'fc430', 'lessee': 'lessee-project',
+        'lessee_id': _uuid(3), 'parent_lease_uuid': None,
+        'start_time': '2030-01-01T00:00:00', 'end_time': '2031-01-01T00:00:00',
+        'status': 'available', 'available_start_time': None,
+        'available_end_time': None,
+        'availabilities': _windows(availabilities),
+        'project': 'owner-project', 'project_id': _uuid(4),
+        'properties': _properties(properties // 4),
+        'resource_properties': _properties(properties),
+    }
+
+
+def lease_item(properties=200):
+    """Return a lease as listed by esi-leap."""
+    return {
+        'uuid': _uuid(5), 'name': 'lease-1', 'resource_type': 'ironic_node',
+        'resource': 'node-000001', 'resource_uuid': _uuid(2),
+        'resource_class': 'fc430', 'offer_uuid': _uuid(1),
+        'owner': 'owner-project', 'owner_id': _uuid(4),
+        'parent_lease_uuid': None, 'start_time': '2030-01-01T00:00:00',
+        'end_time': '2030-01-08T00:00:00',
+        'fulfill_time': '2030-01-01T00:00:05', 'expire_time': None,
+        'status': 'active', 'project': 'lessee-project',
+        'project_id': _uuid(3), 'purpose': 'benchmark',
+        'properties': _properties(properties // 4),
+        'resource_properties': _properties(properties),
+    }
+
+
+def node_item(properties=200, future=20):
+    """Return a node as listed by esi-leap."""
+    return {
+        'uuid': _uuid(2), 'name': 'node-000001', 'owner': 'owner-project',
+        'lessee': 'lessee-project', 'provision_state': 'active',
+        'maintenance': False, 'offer_uuid': _uuid(1), 'lease_uuid': _uuid(5),
+        'future_offers': [_uuid(100 + i) for i in range(future)],
+        'future_leases': [_uuid(200 + i) for i in range(future)],
+        'properties': _properties(properties), 'resource_class': 'fc430',
+    }
+
+
+def event_item():
+    """Return an event as listed by esi-leap."""
+    return {
+        'id': 42, 'event_type': 'esi_leap.offer.claim.end',
+        'event_time': '2030-01-01T00:00:00', 'object_type': 'offer',
+        'object_uuid': _uuid(1), 'resource_type': 'ironic_node',
+        'resource_uuid': _uuid(2), 'lessee_id': _uuid(3),
+        'owner_id': _uuid(4),
+    }
+
+
+def _commit_patch():
+    item = lease_item()
+    res = lease.Lease.existing(**item)
+    ends = ['2030-01-09T00:00:00', '2030-01-10T00:00:00']
+
+    def op():
+        res.end_time = ends[res.end_time == ends[0]]
+        res.properties = dict(item['properties'], touched=res.end_time)
+        return res._prepare_request(patch=True)
+    return op
+
+
+def cases():
+    """Return a dict of benchmark names to operations to time."""
+    offer_dict, lease_dict = offer_item(), lease_item()
+    node_dict, event_dict = node_item(), event_item()
+    hydrated = offer.Offer.existing(**offer_dict)
+    cached = hydrated.to_dict(headers=False, computed=False)
+    query = {'resource_uuid': _uuid(2), 'node_type': 'ironic_node',
+             'resource_class': 'fc430', 'status': 'available',
+             'start_time': '2030-01-01T00:00:00',
+             'end_time': '2030-01-08T00:00:00', 'project_id': _uuid(4),
+             'limit': 100, 'marker': _uuid(9)}
+    return {
+        'hydrate_offer': lambda: offer.Offer.existing(**offer_dict),
+        'hydrate_lease': lambda: lease.Lease.existing(**lease_dict),
+        'hydrate_node': lambda: node.Node.existing(**node_dict),
+        'hydrate_event': lambda: event.Event.existing(**event_dict),
+        'attr_direct': lambda: hydrated.node_type,
+        'attr_alias': lambda: hydrated.resource_type,
+        'query_transpose': lambda: offer.Offer._query_mapping._transpose(
+            query, offer.Offer),
+        'commit_patch': _commit_patch(),
+        'cloud_to_dict': lambda: hydrated.to_dict(headers=False,
+                                                  computed=False),
+        'cloud_to_munch': lambda: hydrated.to_dict(_to_munch=True),
+        'cloud_rehydrate': lambda: offer.Offer.existing(**cached),
+    }
+
+
+def measure(op, repeat=5, min_time=0.2):
+    """Measure the time and memory of an operation.
+
+    :param callable op: The operation, called without arguments.
+    :param int repeat: The number of timing repeats, the best one is kept.
+    :param float min_time: The minimum duration of a repeat, in seconds.
+    :returns: A dict of metrics, see the module documentation.
+    """
+    timer = timeit.Timer(op)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat=repeat, number=number))
+
+    samples = 100
+    op()
+    tracemalloc.start()
+    try:
+        kept = []
+        before = tracemalloc.take_snapshot()
+        for _ in range(samples):
+            kept.append(op())
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    # A fresh trace starts at zero, so its peak is that of one operation.
+    tracemalloc.start()
+    try:
+        op()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    diff = [stat for stat in after.compare_to(before, 'filename')
+            if tracemalloc.__file__ not in stat.traceback[0].filename]
+    return {
+        'ns_per_op': best / number * 1e9,
+        'blocks_per_op': max(0, sum(s.count_diff for s in diff)) / samples,
+        'bytes_per_op': max(0, sum(s.size_diff for s in diff)) / samples,
+        'peak_bytes_per_op': peak,
+    }
+
+
+def run(names=None, repeat=5, min_time=0.2):
+    """Run the benchmarks whose name contains one of ``names``."""
+    results = {}
+    for name, op in cases().items():
+        if names and not any(n in name for n in names):
+            continue
+        results[name] = measure(op, repeat=repeat, min_time=min_time)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark the hot paths of the lease SDK.')
+    parser.add_argument('--filter', action='append',
+                        help='Only run the benchmarks containing this.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Minimum seconds of each timing repeat.')
+    parser.add_argument('--output', help='Write the results as JSON here.')
+    parser.add_argument('--baseline',
+                        help='JSON results of a previous run to compare to.')
+    parser.add_argument('--tolerance', type=float,
+                        default=throughput.DEFAULT_TOLERANCE,
+                        help='Relative change flagged as a regression.')
+    args = parser.parse_args(argv)
+
+    results = run(args.filter, repeat=args.repeat, min_time=args.min_time)
+    print('%-18s %12s %10s %12s %12s' % ('benchmark', 'ns/op', 'blocks/op',
+                                         'bytes/op', 'peak bytes'))
+    for name, metrics in results.items():
+        print('%-18s %12.0f %10.1f %12.0f %12d'
+              % (name, metrics['ns_per_op'], metrics['blocks_per_op'],
+                 metrics['bytes_per_op'], metrics['peak_bytes_per_op']))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results}, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = throughput.compare(results, baseline['results'],
+                                         args.tolerance)
+        for regression in regressions:
+            print('REGRESSION %s' % regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
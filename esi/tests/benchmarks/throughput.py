@@ -0,0 +1,235 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+throughput
+----------
+
+End-to-end benchmarks of :class:`~esi.connection.ESIConnection` against the
+fake esi-leap server of :mod:`esi.tests.fake_leap`::
+
+    $ tox -e benchmark -- --nodes 20000 --output after.json \\
+        --baseline before.json
+
+Listings are reported in objects per second, single calls in p50/p95/p99
+milliseconds, and the largest listing with its peak Python memory. When a
+baseline from another commit is given, metrics worse than it by more than
+the tolerance are reported as regressions and the exit status is 1.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from esi.tests import fake_leap
+
+#: The relative change of a metric flagged as a regression by default.
+DEFAULT_TOLERANCE = 0.2
+
+# Suffixes of the metrics, by whether higher values are better.
+_HIGHER_IS_BETTER = ('_per_second',)
+_LOWER_IS_BETTER = ('_ms', '_bytes', '_per_op')
+
+
+def percentile(samples, percent):
+    """Return a percentile of samples, using the nearest rank."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[int(rank) - 1]
+
+
+def _latencies(samples):
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p95_ms': percentile(samples, 95) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+    }
+
+
+def _timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def bench_listings(conn):
+    """Measure the throughput of full listings."""
+    results = {}
+    for name, listing, query in (
+            ('list_offers', conn.lease.offers, {}),
+            ('list_leases', conn.lease.leases, {'status': 'any'}),
+            ('list_nodes', conn.lease.nodes, {}),
+            ('list_events', conn.lease.events, {})):
+        items, elapsed = _timed(lambda: sum(1 for _ in listing(**query)))
+        results[name] = {'objects': items, 'seconds': elapsed,
+                         'objects_per_second': items / elapsed}
+    leases, elapsed = _timed(conn.list_leases, status='any')
+    results['cloud_list_leases'] = {
+        'objects': len(leases), 'seconds': elapsed,
+        'objects_per_second': len(leases) / elapsed}
+    return results
+
+
+def bench_memory(conn):
+    """Measure the peak memory of holding the largest listing."""
+    tracemalloc.start()
+    try:
+        offers = list(conn.lease.offers())
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'list_offers_memory': {'objects': len(offers),
+                                   'peak_bytes': peak}}
+
+
+def bench_calls(conn, leap, iterations):
+    """Measure the latency of single calls changing the state."""
+    samples = {'get_offer': [], 'create_offer': [], 'claim_offer': [],
+               'delete_lease': [], 'delete_offer': []}
+    nodes = list(leap.nodes.items)
+    offers = list(leap.offers.items)
+    # Far enough from the seeded offers and leases to never conflict.
+    base = datetime.datetime(2100, 1, 1)
+    for index in range(iterations):
+        start = base + datetime.timedelta(days=2 * index)
+        window = {'start_time': start.isoformat(),
+                  'end_time': (start + datetime.timedelta(days=1)).isoformat()}
+        _, elapsed = _timed(conn.lease.get_offer,
+                            offers[index % len(offers)])
+        samples['get_offer'].append(elapsed)
+        offer, elapsed = _timed(conn.lease.create_offer,
+                                resource_uuid=nodes[index % len(nodes)],
+                                node_type='ironic_node', **window)
+        samples['create_offer'].append(elapsed)
+        lease, elapsed = _timed(conn.lease.claim_offer, offer, **window)
+        samples['claim_offer'].append(elapsed)
+        _, elapsed = _timed(conn.lease.delete_lease, lease['uuid'])
+        samples['delete_lease'].append(elapsed)
+        _, elapsed = _timed(conn.lease.delete_offer, offer)
+        samples['delete_offer'].append(elapsed)
+    return {name: _latencies(values) for name, values in samples.items()}
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(nodes=10000, iterations=200, latency=0.0, jitter=0.0, seed=0):
+    """Run every benchmark against a fresh fake server.
+
+    :returns: A JSON serializable dict of the metadata and results.
+    """
+    leap = fake_leap.make_dataset(nodes=nodes, seed=seed)
+    results = {}
+    with fake_leap.FakeLeapServer(leap, latency=latency, jitter=jitter,
+                                  seed=seed) as server:
+        conn = server.connect()
+        # Warm up the connection pool and the resource classes.
+        list(conn.lease.offers(limit=10))
+        results.update(bench_listings(conn))
+        results.update(bench_calls(conn, leap, iterations))
+        results.update(bench_memory(conn))
+        requests = server.requests
+    return {
+        'meta': {
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'time': datetime.datetime.now(
+                datetime.timezone.utc).isoformat(),
+            'nodes': nodes, 'iterations': iterations, 'latency': latency,
+            'jitter': jitter, 'seed': seed, 'requests': requests,
+        },
+        'results': results,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Compare results with a baseline from another run.
+
+    :param dict results: The ``results`` of :func:`run`.
+    :param dict baseline: The ``results`` of the baseline run.
+    :param float tolerance: The relative change of a metric flagged as a
+        regression.
+    :returns: A list of messages, one per regression.
+    """
+    regressions = []
+    for name, metrics in sorted(results.items()):
+        for metric, value in sorted(metrics.items()):
+            before = baseline.get(name, {}).get(metric)
+            if not before:
+                continue
+            change = (value - before) / before
+            if ((metric.endswith(_HIGHER_IS_BETTER) and change < -tolerance)
+                    or (metric.endswith(_LOWER_IS_BETTER)
+                        and change > tolerance)):
+                regressions.append('%s %s: %.4g -> %.4g (%+.0f%%)'
+                                   % (name, metric, before, value,
+                                      change * 100))
+    return regressions
+
+
+def _report(results):
+    for name, metrics in sorted(results.items()):
+        shown = ', '.join('%s=%.4g' % item for item in sorted(metrics.items()))
+        print('%-20s %s' % (name, shown))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the lease SDK against a fake esi-leap.')
+    parser.add_argument('--nodes', type=int, default=10000,
+                        help='Nodes of the dataset, with one offer each.')
+    parser.add_argument('--iterations', type=int, default=200,
+                        help='Samples of each single call.')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds added by the server to each response.')
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help='Maximum random seconds added to the latency.')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results as JSON here.')
+    parser.add_argument('--baseline',
+                        help='JSON results of a previous run to compare to.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Relative change flagged as a regression.')
+    args = parser.parse_args(argv)
+
+    report = run(nodes=args.nodes, iterations=args.iterations,
+                 latency=args.latency, jitter=args.jitter, seed=args.seed)
+    _report(report['results'])
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report['results'], baseline['results'],
+                              args.tolerance)
+        for regression in regressions:
+            print('REGRESSION %s' % regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
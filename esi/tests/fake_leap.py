@@ -0,0 +1,741 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""
+fake_leap
+---------
+
+An in-process stand-in for the esi-leap API, to run functional tests and
+benchmarks without a cloud::
+
+    with fake_leap.FakeLeapServer(fake_leap.make_dataset(nodes=50000)) as srv:
+        conn = srv.connect()
+        print(len(list(conn.lease.offers())))
+
+It can also be run as a standalone server with
+``python -m esi.tests.fake_leap --nodes 50000 --port 7777``.
+
+Offers, leases, nodes and events are held in memory. Listings are
+paginated with ``marker`` and ``limit`` and accept the same query parameters
+as the ``_query_mapping`` of the SDK resources, plus ``fields``; unknown
+parameters are rejected. Claims and lease creations conflicting with
+another lease of the same resource are refused with a 409.
+"""
+
+import argparse
+import bisect
+import datetime
+import hashlib
+import http.server
+import json
+import random
+import threading
+import time
+import urllib.parse
+import uuid
+
+#: The statuses of offers and leases still holding their resource.
+OPEN_STATUSES = ('available', 'created', 'active')
+#: The resource classes of the synthetic nodes.
+RESOURCE_CLASSES = ('fc430', 'r640', 'gpu-a100', 'storage')
+
+_TIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+# The query parameters of the SDK resources, by collection.
+_QUERIES = {
+    'offers': ('resource_uuid', 'resource_type', 'resource_class', 'status',
+               'uuid', 'lessee', 'start_time', 'end_time', 'lessee_id',
+               'name', 'properties', 'project_id', 'available_start_time',
+               'available_end_time'),
+    'leases': ('resource_uuid', 'resource_type', 'status', 'uuid',
+               'project_id', 'start_time', 'end_time', 'owner_id',
+               'resource_class', 'purpose', 'properties'),
+    'nodes': ('name', 'owner', 'lessee', 'offer_uuid', 'lease_uuid'),
+    'events': ('last_event_id', 'event_type', 'last_event_time',
+               'resource_type', 'resource_uuid', 'lessee_or_owner_id'),
+}
+_DEFAULT_STATUSES = {'offers': ('available',), 'leases': ('created', 'active')}
+
+
+def _format(value):
+    return value.strftime(_TIME_FORMAT)
+
+
+def _time(value):
+    """Normalize a timestamp to a naive UTC string, sortable as text."""
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return _format(value)
+
+
+def _now():
+    return _format(datetime.datetime.now(datetime.timezone.utc).replace(
+        tzinfo=None))
+
+
+class HTTPError(Exception):
+    """An error answered to the client, formatted as esi-leap does."""
+
+    def __init__(self, status, message):
+        super(HTTPError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _Table:
+    """Items kept sorted by key, for marker based pagination."""
+
+    def __init__(self, key=str):
+        self._key = key
+        self._keys = []
+        self.items = {}
+
+    def add(self, key, item):
+        if key not in self.items:
+            bisect.insort(self._keys, key)
+        self.items[key] = item
+
+    def get(self, key):
+        try:
+            return self.items[self._key(key)]
+        except (KeyError, ValueError):
+            raise HTTPError(404, 'Not found: %s' % key)
+
+    def after(self, marker=None):
+        """Yield the items following ``marker`` in key order."""
+        start = 0
+        if marker is not None:
+            start = bisect.bisect_right(self._keys, self._key(marker))
+        keys = self._keys
+        while start < len(keys):
+            yield self.items[keys[start]]
+            start += 1
+
+    def __len__(self):
+        return len(self.items)
+
+
+class FakeLeap:
+    """The state and request handling of a fake esi-leap service.
+
+    Every method is safe to call from several threads.
+    """
+
+    def __init__(self, page_size=500, max_page_size=1000):
+        """Create an empty service.
+
+        :param int page_size: The number of items of a listing page when
+            the client does not set ``limit``.
+        :param int max_page_size: The maximum number of items of a page.
+        """
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        self.offers = _Table()
+        self.leases = _Table()
+        self.nodes = _Table()
+        self.events = _Table(key=int)
+        self._node_offers = {}
+        self._node_leases = {}
+        self._offer_leases = {}
+        self._lock = threading.RLock()
+
+    # Data
+
+    def add_node(self, name, owner, resource_class, properties=None,
+                 node_uuid=None, provision_state='available'):
+        """Add a node, returning its UUID."""
+        node_uuid = node_uuid or str(uuid.uuid4())
+        with self._lock:
+            self.nodes.add(node_uuid, {
+                'uuid': node_uuid, 'name': name, 'owner': owner,
+                'lessee': None, 'provision_state': provision_state,
+                'maintenance': False, 'resource_class': resource_class,
+                'properties': properties or {},
+            })
+            self._node_offers.setdefault(node_uuid, [])
+            self._node_leases.setdefault(node_uuid, [])
+        return node_uuid
+
+    def _event(self, event_type, obj_type, obj, event_time=None):
+        event_id = len(self.events) + 1
+        self.events.add(event_id, {
+            'id': event_id, 'event_type': event_type,
+            'event_time': event_time or _now(),
+            'object_type': obj_type, 'object_uuid': obj['uuid'],
+            'resource_type': obj['resource_type'],
+            'resource_uuid': obj['resource_uuid'],
+            'lessee_id': obj.get('lessee_id') or obj.get('project_id'),
+            'owner_id': obj.get('owner_id') or obj.get('project_id'),
+        })
+
+    def _node(self, body):
+        resource_uuid = body.get('resource_uuid')
+        if not resource_uuid:
+            raise HTTPError(400, 'resource_uuid is required')
+        node = self.nodes.items.get(resource_uuid)
+        if node is None:
+            for candidate in self.nodes.items.values():
+                if candidate['name'] == resource_uuid:
+                    return candidate
+            raise HTTPError(404, 'Node %s not found' % resource_uuid)
+        return node
+
+    @staticmethod
+    def _window(body, default_start, default_days):
+        start = _time(body['start_time']) if body.get('start_time') \
+            else default_start
+        if body.get('end_time'):
+            end = _time(body['end_time'])
+        else:
+            end = _format(datetime.datetime.fromisoformat(start)
+                          + datetime.timedelta(days=default_days))
+        if end <= start:
+            raise HTTPError(400, 'end_time must be after start_time')
+        return start, end
+
+    def create_offer(self, body, event_time=None):
+        """Create an offer of a node."""
+        with self._lock:
+            node = self._node(body)
+            start, end = self._window(body, _now(), 365)
+            for other in self._node_offers[node['uuid']]:
+                other = self.offers.items[other]
+                if (other['status'] == 'available'
+                        and other['start_time'] < end
+                        and start < other['end_time']):
+                    raise HTTPError(
+                        409, 'Offer %s already covers this time frame'
+                        % other['uuid'])
+            offer_uuid = body.get('uuid') or str(uuid.uuid4())
+            offer = {
+                'uuid': offer_uuid, 'name': body.get('name'),
+                'resource_type': body.get('resource_type', 'ironic_node'),
+                'resource_uuid': node['uuid'], 'resource': node['name'],
+                'resource_class': node['resource_class'],
+                'resource_properties': node['properties'],
+                'lessee': body.get('lessee'),
+                'lessee_id': body.get('lessee_id'),
+                'project': body.get('project', node['owner']),
+                'project_id': body.get('project_id', node['owner']),
+                'parent_lease_uuid': body.get('parent_lease_uuid'),
+                'start_time': start, 'end_time': end,
+                'status': 'available',
+                'properties': body.get('properties') or {},
+            }
+            self.offers.add(offer_uuid, offer)
+            self._node_offers[node['uuid']].append(offer_uuid)
+            self._offer_leases[offer_uuid] = []
+            self._event('esi_leap.offer.create.end', 'offer', offer,
+                        event_time)
+            return self._render_offer(offer)
+
+    def _conflict(self, node_uuid, start, end, ignore=None):
+        for lease_uuid in self._node_leases[node_uuid]:
+            lease = self.leases.items[lease_uuid]
+            if (lease_uuid != ignore and lease['status'] in OPEN_STATUSES
+                    and lease['start_time'] < end
+                    and start < lease['end_time']):
+                return lease
+        return None
+
+    def _add_lease(self, node, offer, body, event_time=None):
+        start, end = self._window(body, _now(), 7)
+        if offer is not None and not (offer['start_time'] <= start
+                                      and end <= offer['end_time']):
+            raise HTTPError(409, 'Offer %s is not available from %s to %s'
+                            % (offer['uuid'], start, end))
+        conflict = self._conflict(node['uuid'], start, end)
+        if conflict is not None:
+            raise HTTPError(409, 'Time conflict with lease %s'
+                            % conflict['uuid'])
+        now = _now()
+        status = 'created' if start > now else 'active'
+        if end <= now:
+            status = 'expired'
+        lease_uuid = body.get('uuid') or str(uuid.uuid4())
+        project_id = body.get('project_id') or 'fake-project'
+        owner_id = offer['project_id'] if offer else node['owner']
+        lease = {
+            'uuid': lease_uuid, 'name': body.get('name'),
+            'resource_type': body.get('resource_type', 'ironic_node'),
+            'resource_uuid': node['uuid'], 'resource': node['name'],
+            'resource_class': node['resource_class'],
+            'resource_properties': node['properties'],
+            'offer_uuid': offer['uuid'] if offer else None,
+            'owner': owner_id, 'owner_id': owner_id,
+            'project': body.get('project', project_id),
+            'project_id': project_id,
+            'parent_lease_uuid': body.get('parent_lease_uuid'),
+            'start_time': start, 'end_time': end,
+            'fulfill_time': now if status == 'active' else None,
+            'expire_time': None, 'status': status,
+            'purpose': body.get('purpose'),
+            'properties': body.get('properties') or {},
+        }
+        self.leases.add(lease_uuid, lease)
+        self._node_leases[node['uuid']].append(lease_uuid)
+        if offer is not None:
+            self._offer_leases[offer['uuid']].append(lease_uuid)
+        self._event('esi_leap.lease.create.end', 'lease', lease, event_time)
+        return lease
+
+    def claim_offer(self, offer_uuid, body, event_time=None):
+        """Claim an offer, creating a lease."""
+        with self._lock:
+            offer = self.offers.get(offer_uuid)
+            if offer['status'] != 'available':
+                raise HTTPError(409, 'Offer %s is %s'
+                                % (offer_uuid, offer['status']))
+            lease = self._add_lease(self.nodes.items[offer['resource_uuid']],
+                                    offer, body, event_time)
+            self._event('esi_leap.offer.claim.end', 'offer', offer,
+                        event_time)
+            return dict(lease)
+
+    def create_lease(self, body):
+        """Create a lease of a node, without an offer."""
+        with self._lock:
+            return dict(self._add_lease(self._node(body), None, body))
+
+    def update_lease(self, lease_uuid, body):
+        """Update the end time of a lease."""
+        with self._lock:
+            lease = self.leases.get(lease_uuid)
+            unknown = set(body) - {'end_time'}
+            if unknown:
+                raise HTTPError(400, 'Cannot update %s'
+                                % ', '.join(sorted(unknown)))
+            if lease['status'] not in OPEN_STATUSES:
+                raise HTTPError(409, 'Lease %s is %s'
+                                % (lease_uuid, lease['status']))
+            end = _time(body['end_time'])
+            if end <= lease['start_time']:
+                raise HTTPError(400, 'end_time must be after start_time')
+            if lease['offer_uuid']:
+                offer = self.offers.items[lease['offer_uuid']]
+                if end > offer['end_time']:
+                    raise HTTPError(409, 'Offer %s ends at %s'
+                                    % (offer['uuid'], offer['end_time']))
+            conflict = self._conflict(lease['resource_uuid'],
+                                      lease['start_time'], end,
+                                      ignore=lease_uuid)
+            if conflict is not None:
+                raise HTTPError(409, 'Time conflict with lease %s'
+                                % conflict['uuid'])
+            lease['end_time'] = end
+            self._event('esi_leap.lease.update.end', 'lease', lease)
+            return dict(lease)
+
+    def delete_lease(self, lease_uuid):
+        with self._lock:
+            lease = self.leases.get(lease_uuid)
+            if lease['status'] in OPEN_STATUSES:
+                lease['status'] = 'deleted'
+                lease['expire_time'] = _now()
+                self._event('esi_leap.lease.delete.end', 'lease', lease)
+
+    def delete_offer(self, offer_uuid):
+        with self._lock:
+            offer = self.offers.get(offer_uuid)
+            if offer['status'] == 'available':
+                for lease_uuid in self._offer_leases[offer_uuid]:
+                    self.delete_lease(lease_uuid)
+                offer['status'] = 'deleted'
+                self._event('esi_leap.offer.delete.end', 'offer', offer)
+
+    # Views
+
+    def _availabilities(self, offer):
+        busy = sorted(
+            (lease['start_time'], lease['end_time'])
+            for lease in (self.leases.items[u]
+                          for u in self._offer_leases[offer['uuid']])
+            if lease['status'] in OPEN_STATUSES)
+        windows, start = [], offer['start_time']
+        for lease_start, lease_end in busy:
+            if lease_start > start:
+                windows.append([start, lease_start])
+            start = max(start, lease_end)
+        if start < offer['end_time']:
+            windows.append([start, offer['end_time']])
+        return windows
+
+    def _render_offer(self, offer):
+        result = dict(offer)
+        result['availabilities'] = self._availabilities(offer)
+        return result
+
+    def _render_node(self, node):
+        result = dict(node)
+        now = _now()
+        offers = [self.offers.items[u]
+                  for u in self._node_offers[node['uuid']]]
+        leases = [self.leases.items[u]
+                  for u in self._node_leases[node['uuid']]]
+        current = [o for o in offers if o['status'] == 'available'
+                   and o['start_time'] <= now < o['end_time']]
+        active = [lease for lease in leases if lease['status'] == 'active']
+        result.update({
+            'offer_uuid': current[0]['uuid'] if current else None,
+            'lease_uuid': active[0]['uuid'] if active else None,
+            'lessee': active[0]['project'] if active else None,
+            'future_offers': [o['uuid'] for o in offers
+                              if o['status'] == 'available'
+                              and o['start_time'] > now],
+            'future_leases': [lease['uuid'] for lease in leases
+                              if lease['status'] == 'created'],
+        })
+        return result
+
+    def _render(self, collection, item):
+        if collection == 'offers':
+            return self._render_offer(item)
+        if collection == 'nodes':
+            return self._render_node(item)
+        return dict(item)
+
+    def _filter(self, collection, query):
+        """Return a predicate on raw items implementing a listing query."""
+        tests = []
+        statuses = query.pop('status', None)
+        if collection in _DEFAULT_STATUSES:
+            statuses = (_DEFAULT_STATUSES[collection] if statuses is None
+                        else statuses.split(','))
+            if 'any' not in statuses:
+                tests.append(lambda i: i['status'] in statuses)
+        if collection == 'offers' and 'start_time' in query:
+            # Offers covering the whole time frame.
+            start = _time(query.pop('start_time'))
+            end = _time(query.pop('end_time', start))
+            tests.append(lambda i: i['start_time'] <= start
+                         and end <= i['end_time'])
+        if 'available_start_time' in query:
+            start = _time(query.pop('available_start_time'))
+            end = _time(query.pop('available_end_time', start))
+            tests.append(lambda i: any(
+                w[0] <= start and end <= w[1]
+                for w in self._availabilities(i)))
+        if collection == 'leases' and 'start_time' in query:
+            # Leases overlapping the time frame.
+            start = _time(query.pop('start_time'))
+            end = _time(query.pop('end_time', start))
+            tests.append(lambda i: i['start_time'] <= end
+                         and start <= i['end_time'])
+        if 'last_event_id' in query:
+            last_id = int(query.pop('last_event_id'))
+            tests.append(lambda i: i['id'] > last_id)
+        if 'last_event_time' in query:
+            last_time = _time(query.pop('last_event_time'))
+            tests.append(lambda i: i['event_time'] > last_time)
+        if 'lessee_or_owner_id' in query:
+            project = query.pop('lessee_or_owner_id')
+            tests.append(lambda i: project in (i['lessee_id'],
+                                               i['owner_id']))
+        if 'properties' in query:
+            properties = json.loads(query.pop('properties'))
+            tests.append(lambda i: all(
+                (i['properties'] or {}).get(k) == v
+                for k, v in properties.items()))
+        view = ('offer_uuid', 'lease_uuid', 'lessee')
+        for name, value in query.items():
+            if collection == 'nodes' and name in view:
+                tests.append(lambda i, n=name, v=value:
+                             self._render_node(i)[n] == v)
+            else:
+                tests.append(lambda i, n=name, v=value: i.get(n) == v)
+        return lambda item: all(test(item) for test in tests)
+
+    def list(self, collection, query, prefix=''):
+        """Return a page of a listing.
+
+        :param str collection: ``offers``, ``leases``, ``nodes`` or
+            ``events``.
+        :param dict query: The query parameters.
+        :param str prefix: The path prefix of the next link.
+        """
+        query = dict(query)
+        params = dict(query)
+        marker = query.pop('marker', None)
+        limit = min(int(query.pop('limit', None) or self.page_size),
+                    self.max_page_size)
+        fields = query.pop('fields', None)
+        unknown = set(query) - set(_QUERIES[collection])
+        if unknown:
+            raise HTTPError(400, 'Unknown query parameters: %s'
+                            % ', '.join(sorted(unknown)))
+        with self._lock:
+            matches = self._filter(collection, query)
+            page, more = [], False
+            table = getattr(self, collection)
+            for item in table.after(marker):
+                if not matches(item):
+                    continue
+                if len(page) == limit:
+                    more = True
+                    break
+                page.append(self._render(collection, item))
+        key = 'id' if collection == 'events' else 'uuid'
+        body = {collection: page}
+        if more:
+            params.update(marker=page[-1][key], limit=limit)
+            body['links'] = [{'rel': 'next', 'href': '%s/%s?%s' % (
+                prefix, collection, urllib.parse.urlencode(params))}]
+        if fields:
+            names = fields.split(',')
+            body[collection] = [{n: item.get(n) for n in names}
+                                for item in page]
+        return body
+
+    def get(self, collection, key, fields=None):
+        with self._lock:
+            item = self._render(collection,
+                                getattr(self, collection).get(key))
+        if fields:
+            item = {n: item.get(n) for n in fields.split(',')}
+        return item
+
+    def handle(self, method, path, query, body):
+        """Handle a request.
+
+        :returns: A tuple of the status code and the JSON body, or ``None``.
+        :raises: :class:`HTTPError`
+        """
+        prefix = ''
+        parts = [p for p in path.split('/') if p]
+        if parts and parts[0] == 'v1':
+            prefix, parts = '/v1', parts[1:]
+        if not parts:
+            return 200, self._versions(prefix)
+        collection, rest = parts[0], parts[1:]
+        if collection not in _QUERIES or len(rest) > 2:
+            raise HTTPError(404, 'Not found: %s' % path)
+        route = (method, collection, len(rest), rest[1:])
+        if route[:3] == ('GET', collection, 0):
+            return 200, self.list(collection, query, prefix)
+        if route[:3] == ('GET', collection, 1) and collection != 'events':
+            return 200, self.get(collection, rest[0], query.get('fields'))
+        if route == ('POST', 'offers', 0, []):
+            return 201, self.create_offer(body)
+        if route == ('POST', 'offers', 2, ['claim']):
+            return 201, self.claim_offer(rest[0], body)
+        if route == ('POST', 'leases', 0, []):
+            return 201, self.create_lease(body)
+        if route[:3] == ('PATCH', 'leases', 1):
+            return 200, self.update_lease(rest[0], body)
+        if route[:3] == ('DELETE', 'offers', 1):
+            self.delete_offer(rest[0])
+            return 200, None
+        if route[:3] == ('DELETE', 'leases', 1):
+            self.delete_lease(rest[0])
+            return 200, None
+        raise HTTPError(405, 'Method %s not allowed on %s' % (method, path))
+
+    @staticmethod
+    def _versions(prefix):
+        version = {'id': 'v1.0', 'status': 'CURRENT',
+                   'links': [{'rel': 'self', 'href': '/v1/'}]}
+        if prefix:
+            return {'version': version}
+        return {'versions': [version]}
+
+
+def make_dataset(nodes=1000, lease_ratio=0.5, projects=50, seed=0,
+                 page_size=500, max_page_size=1000):
+    """Create a fake service holding synthetic data.
+
+    Every node has one offer, and ``lease_ratio`` of the offers are claimed.
+    Each creation is recorded as an event, so ``nodes=50000`` gives about
+    200,000 objects. The same seed always gives the same data.
+
+    :param int nodes: The number of nodes.
+    :param float lease_ratio: The share of offers with a lease.
+    :param int projects: The number of distinct projects.
+    :param int seed: The seed of the random generator.
+    :returns: A :class:`FakeLeap`.
+    """
+    rng = random.Random(seed)
+    leap = FakeLeap(page_size=page_size, max_page_size=max_page_size)
+    project_ids = [uuid.UUID(int=rng.getrandbits(128), version=4).hex
+                   for _ in range(projects)]
+    now = datetime.datetime.now(datetime.timezone.utc).replace(
+        tzinfo=None).replace(microsecond=0)
+    for index in range(nodes):
+        resource_class = rng.choice(RESOURCE_CLASSES)
+        node_uuid = leap.add_node(
+            'node-%06d' % index, rng.choice(project_ids), resource_class,
+            properties={'cpus': rng.choice((16, 32, 64)),
+                        'memory_mb': rng.choice((65536, 131072, 262144))},
+            node_uuid=str(uuid.UUID(int=rng.getrandbits(128), version=4)))
+        start = now - datetime.timedelta(days=rng.randint(0, 30))
+        end = now + datetime.timedelta(days=rng.randint(30, 365))
+        offer = leap.create_offer({
+            'uuid': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            'resource_uuid': node_uuid, 'start_time': _format(start),
+            'end_time': _format(end),
+        }, event_time=_format(start))
+        if rng.random() < lease_ratio:
+            lease_start = now + datetime.timedelta(
+                hours=rng.randint(-24 * 7, 24 * 14))
+            lease_start = max(lease_start, start)
+            leap.claim_offer(offer['uuid'], {
+                'uuid': str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                'project_id': rng.choice(project_ids),
+                'start_time': _format(lease_start),
+                'end_time': _format(min(
+                    end, lease_start
+                    + datetime.timedelta(days=rng.randint(1, 14)))),
+            }, event_time=_format(lease_start))
+    return leap
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, small
+    # responses wait for the delayed acknowledgement of the headers.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        server = self.server
+        with server.lock:
+            delay = server.latency + server.rng.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            body = json.loads(self.rfile.read(length)) if length else {}
+            status, result = server.leap.handle(self.command, url.path,
+                                                query, body)
+        except HTTPError as e:
+            status, result = e.status, {'faultcode': 'Client',
+                                        'faultstring': e.message,
+                                        'debuginfo': None}
+        except (ValueError, KeyError, TypeError) as e:
+            status, result = 400, {'faultcode': 'Client',
+                                   'faultstring': str(e), 'debuginfo': None}
+        content = b'' if result is None else json.dumps(result).encode()
+        headers = {'Content-Type': 'application/json'}
+        if self.command == 'GET' and status == 200:
+            etag = '"%s"' % hashlib.md5(content).hexdigest()
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                status, content = 304, b''
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+        with server.lock:
+            server.requests += 1
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+
+class FakeLeapServer:
+    """Serve a :class:`FakeLeap` over HTTP from a background thread."""
+
+    def __init__(self, leap=None, host='127.0.0.1', port=0, latency=0.0,
+                 jitter=0.0, seed=0):
+        """Create a server; it is started by :meth:`start`.
+
+        :param leap: The :class:`FakeLeap` to serve, empty by default.
+        :param str host: The address to listen on.
+        :param int port: The port to listen on, any free one by default.
+        :param float latency: The time in seconds added to every response.
+        :param float jitter: The maximum random time in seconds added to
+            the latency.
+        :param int seed: The seed of the jitter.
+        """
+        self.leap = leap if leap is not None else FakeLeap()
+        self._httpd = http.server.ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.leap = self.leap
+        self._httpd.latency = latency
+        self._httpd.jitter = jitter
+        self._httpd.rng = random.Random(seed)
+        self._httpd.requests = 0
+        # Guards the counter and the jitter draws of the handler threads.
+        self._httpd.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self):
+        """The endpoint of the lease service."""
+        host, port = self._httpd.server_address[:2]
+        return 'http://%s:%s/v1' % (host, port)
+
+    @property
+    def requests(self):
+        """The number of requests served so far."""
+        return self._httpd.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def connect(self, **kwargs):
+        """Return an :class:`~esi.connection.ESIConnection` to the server.
+
+        :param kwargs: Other settings of the connection, such as
+            ``lease_max_in_flight_read``.
+        """
+        import esi
+        return esi.connect(auth_type='none', lease_endpoint_override=self.url,
+                           lease_api_version='1', **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serve a fake esi-leap API with synthetic data.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--nodes', type=int, default=1000)
+    parser.add_argument('--lease-ratio', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    args = parser.parse_args(argv)
+    leap = make_dataset(nodes=args.nodes, lease_ratio=args.lease_ratio,
+                        seed=args.seed, page_size=args.page_size)
+    server = FakeLeapServer(leap, host=args.host, port=args.port,
+                            latency=args.latency, jitter=args.jitter)
+    print('Serving %d offers, %d leases, %d nodes and %d events at %s'
+          % (len(leap.offers), len(leap.leases), len(leap.nodes),
+             len(leap.events), server.url))
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
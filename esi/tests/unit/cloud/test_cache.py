@@ -0,0 +1,138 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from esi.cloud import _cache
+
+from openstack import exceptions
+from openstack.tests.unit import base
+
+
+class TestLeaseCache(base.TestCase):
+    def setUp(self):
+        super(TestLeaseCache, self).setUp()
+        self.cache = _cache.LeaseCache(
+            'dogpile.cache.memory',
+            expirations={'offers': 60, 'lease': 60, 'not_found': 60})
+        self.creator = mock.Mock(return_value=['o1'])
+
+    def test_disabled(self):
+        cache = _cache.LeaseCache(expirations={'offers': 60})
+        self.assertFalse(cache.caches('offers'))
+        cache.list('offers', self.creator)
+        cache.list('offers', self.creator)
+        self.assertEqual(2, self.creator.call_count)
+
+    def test_list(self):
+        self.assertEqual(['o1'], self.cache.list('offers', self.creator,
+                                                 status='available'))
+        self.assertEqual(['o1'], self.cache.list('offers', self.creator,
+                                                 status='available',
+                                                 prefetch=2))
+        self.assertEqual(1, self.creator.call_count)
+        self.cache.list('offers', self.creator, status='claimed')
+        self.assertEqual(2, self.creator.call_count)
+
+    def test_list_not_configured(self):
+        self.cache.list('events', self.creator)
+        self.cache.list('events', self.creator)
+        self.assertEqual(2, self.creator.call_count)
+
+    def test_expired(self):
+        self.cache.list('offers', self.creator)
+        with mock.patch('time.time', return_value=10 ** 12):
+            self.cache.list('offers', self.creator)
+        self.assertEqual(2, self.creator.call_count)
+
+    def test_invalidate(self):
+        self.cache.list('offers', self.creator)
+        self.cache.invalidate()
+        self.cache.list('offers', self.creator)
+        self.assertEqual(2, self.creator.call_count)
+
+    def test_invalidate_shared(self):
+        backend = {'cache_dict': {}}
+        first = _cache.LeaseCache('dogpile.cache.memory', arguments=backend,
+                                  expirations={'offers': 60})
+        second = _cache.LeaseCache('dogpile.cache.memory', arguments=backend,
+                                   expirations={'offers': 60})
+        first.list('offers', self.creator)
+        second.list('offers', self.creator)
+        self.assertEqual(1, self.creator.call_count)
+        second.invalidate()
+        first.list('offers', self.creator)
+        self.assertEqual(2, self.creator.call_count)
+
+    def test_get_negative(self):
+        creator = mock.Mock(side_effect=exceptions.ResourceNotFound)
+        for _ in range(2):
+            self.assertRaises(exceptions.ResourceNotFound, self.cache.get,
+                              'lease', creator, exceptions.ResourceNotFound,
+                              id='l1')
+        self.assertEqual(1, creator.call_count)
+
+    def test_get(self):
+        creator = mock.Mock(return_value={'uuid': 'l1'})
+        for _ in range(2):
+            self.assertEqual({'uuid': 'l1'}, self.cache.get(
+                'lease', creator, exceptions.ResourceNotFound, id='l1'))
+        self.assertEqual(1, creator.call_count)
+
+    def test_stale_while_revalidate(self):
+        cache = _cache.LeaseCache('dogpile.cache.memory',
+                                  expirations={'offers': 60},
+                                  stale_while_revalidate=3600)
+        cache.list('offers', self.creator)
+        with mock.patch.object(_cache.threading, 'Thread') as thread:
+            with mock.patch('time.time', return_value=10 ** 12):
+                # Far past the stale window: refetched synchronously.
+                self.assertEqual(['o1'], cache.list('offers', self.creator))
+            self.assertEqual(2, self.creator.call_count)
+            thread.assert_not_called()
+
+    def test_stale_served(self):
+        cache = _cache.LeaseCache('dogpile.cache.memory',
+                                  expirations={'offers': 60},
+                                  stale_while_revalidate=3600)
+        cache.list('offers', self.creator)
+        self.creator.return_value = ['o2']
+        now = _cache.time.time()
+        with mock.patch.object(_cache.threading, 'Thread') as thread:
+            with mock.patch('time.time', return_value=now + 120):
+                self.assertEqual(['o1'], cache.list('offers', self.creator))
+            thread.return_value.start.assert_called_once_with()
+
+    def test_revalidation_error_logged(self):
+        cache = mock.Mock()
+        mutex = mock.Mock()
+        creator = mock.Mock(side_effect=exceptions.HttpException('down'))
+        with mock.patch.object(_cache.threading, 'Thread') as thread, \
+                mock.patch.object(_cache._log, 'warning') as warning:
+            _cache._async_creation_runner(cache, 'key', creator, mutex)
+            thread.call_args[1]['target']()
+        cache.set.assert_not_called()
+        mutex.release.assert_called_once_with()
+        warning.assert_called_once_with(mock.ANY, 'key', exc_info=True)
+
+    def test_from_config(self):
+        config = mock.Mock()
+        config.get_cache_class.return_value = 'dogpile.cache.memory'
+        config.get_cache_arguments.return_value = {}
+        config.get_cache_expirations.return_value = {
+            'esi.lease.offers': '30', 'compute.servers': 5}
+        config.config = {'lease_cache_stale_while_revalidate': 10}
+        cache = _cache.LeaseCache.from_config(config)
+        self.assertEqual({'offers': 30.0}, cache.expirations)
+        self.assertEqual(10.0, cache.stale_while_revalidate)
+        self.assertTrue(cache.caches('offers'))
+        self.assertFalse(cache.caches('leases'))
@@ -13,10 +13,12 @@
 from unittest import mock
 
 from esi import connection
+from esi.lease import _discovery
 from esi.tests import fakes
 
 from keystoneauth1.identity import base as ks_base
 
+from openstack import exceptions
 from openstack.tests.unit import base
 
 
@@ -28,6 +30,7 @@ from openstack.tests.unit import base
 class TestLease(base.TestCase):
     def setUp(self):
         super(TestLease, self).setUp()
+        self.addCleanup(_discovery.clear)
         self.fake_offer = fakes.make_fake_offer("fake_offer_id",
                                                 "fake_node_id",
                                                 "fake_type")
@@ -178,6 +181,30 @@ class TestLease(base.TestCase):
         self.assertTrue(self.cloud.delete_lease("fake_lease_id"))
         self.assert_calls()
 
+    def test_delete_leases(self, mock_ged):
+        self.register_uris(
+            [
+                dict(
+                    method='DELETE',
+                    uri=self.uri_lease + "/fake_lease_id",
+                    json={},
+                ),
+                dict(
+                    method='DELETE',
+                    uri=self.uri_lease + "/fake_lease_id_1",
+                    status_code=409,
+                ),
+            ]
+        )
+        results = self.cloud.delete_leases(["fake_lease_id",
+                                            "fake_lease_id_1"],
+                                           max_workers=1)
+        self.assertEqual(["fake_lease_id"],
+                         [r.item for r in results.succeeded])
+        self.assertEqual(["fake_lease_id_1"],
+                         [r.item for r in results.failed])
+        self.assert_calls()
+
     def test_list_nodes(self, mock_ged):
         self.register_uris(
             [
@@ -213,3 +240,73 @@ class TestLease(base.TestCase):
         self.assertSubdict(self.fake_event, events[0])
         self.assertSubdict(self.fake_event_1, events[1])
         self.assert_calls()
+
+    def test_list_offers_cached(self, mock_ged):
+        self.cloud.configure_lease_cache(expirations={'offers': 60})
+        self.register_uris(
+            [
+                dict(
+                    method='GET',
+                    uri=self.uri_offer,
+                    json={'offers': [self.fake_offer]},
+                ),
+                dict(
+                    method='DELETE',
+                    uri=self.uri_offer + "/fake_offer_id",
+                    json={},
+                ),
+                dict(
+                    method='GET',
+                    uri=self.uri_offer,
+                    json={'offers': []},
+                ),
+            ]
+        )
+        offers = self.cloud.list_offers()
+        self.assertSubdict(self.fake_offer, offers[0])
+        self.assertEqual(offers, self.cloud.list_offers())
+        self.cloud.delete_offer("fake_offer_id")
+        self.assertEqual([], self.cloud.list_offers())
+        self.assert_calls()
+
+    def test_get_lease_not_found_cached(self, mock_ged):
+        self.cloud.configure_lease_cache(expirations={'not_found': 60})
+        self.register_uris(
+            [
+                dict(
+                    method='GET',
+                    uri=self.uri_lease + "/missing",
+                    status_code=404,
+                ),
+            ]
+        )
+        for _ in range(2):
+            self.assertRaises(exceptions.ResourceNotFound,
+                              self.cloud.get_lease, "missing")
+        self.assert_calls()
+
+    def test_pool_and_timeouts(self, mock_ged):
+        cloud_config = self.config.get_one(cloud='_test_cloud_',
+                                           validate=True,
+                                           lease_pool_maxsize=20,
+                                           lease_timeout_read=5,
+                                           lease_max_in_flight_read=4)
+        cloud = connection.ESIConnection(config=cloud_config,
+                                         strict=self.strict_cloud)
+        self.register_uris(
+            [
+                dict(
+                    method='GET',
+                    uri=self.uri_node,
+                    json={'nodes': []},
+                ),
+            ]
+        )
+        cloud.list_nodes()
+        self.assertEqual((5.0, 5.0), self.adapter.request_history[-1].timeout)
+        adapter = cloud.lease.session.session.get_adapter(self.uri_node)
+        self.assertEqual(20, adapter._pool_maxsize)
+        stats = cloud.lease.rate_limiter.stats()['read']
+        self.assertEqual(4, stats['max_in_flight'])
+        self.assertEqual(1, stats['requests'])
+        self.assert_calls()
@@ -0,0 +1,85 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import tempfile
+from unittest import mock
+
+from esi import connection
+from esi.lease import _discovery
+from esi.tests import fakes
+
+from keystoneauth1.identity import base as ks_base
+
+from openstack.tests.unit import base
+
+URL = 'https://lease.example.com/v1'
+
+
+class TestDiscoveryCache(base.TestCase):
+    def setUp(self):
+        super(TestDiscoveryCache, self).setUp()
+        self.addCleanup(_discovery.clear)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'discovery.json')
+
+    def test_in_process(self):
+        _discovery.DiscoveryCache().set('key', URL, (1, 0))
+        self.assertEqual(URL,
+                         _discovery.DiscoveryCache().get('key')['service_url'])
+        self.assertIsNone(_discovery.DiscoveryCache().get('other'))
+
+    def test_expired(self):
+        cache = _discovery.DiscoveryCache(ttl=10)
+        cache.set('key', URL, (1, 0))
+        with mock.patch('time.time', return_value=10 ** 12):
+            self.assertIsNone(cache.get('key'))
+
+    def test_disabled(self):
+        cache = _discovery.DiscoveryCache(ttl=0)
+        cache.set('key', URL, (1, 0))
+        self.assertIsNone(cache.get('key'))
+
+    def test_file(self):
+        _discovery.DiscoveryCache(path=self.path).set('key', URL, (1, 0))
+        _discovery.clear()
+        self.assertIsNone(_discovery.DiscoveryCache().get('key'))
+        entry = _discovery.DiscoveryCache(path=self.path).get('key')
+        self.assertEqual([1, 0], entry['api_version'])
+
+
+@mock.patch.object(ks_base.BaseIdentityPlugin,
+                   'get_endpoint_data',
+                   return_value=fakes.get_lease_endpoint())
+class TestLeaseServiceDiscovery(base.TestCase):
+    def setUp(self):
+        super(TestLeaseServiceDiscovery, self).setUp()
+        _discovery.clear()
+        self.addCleanup(_discovery.clear)
+
+    def connect(self):
+        config = self.config.get_one(cloud='_test_cloud_', validate=True)
+        return connection.ESIConnection(config=config,
+                                        strict=self.strict_cloud)
+
+    def test_discovered_once(self, mock_ged):
+        self.connect().lease
+        self.assertTrue(mock_ged.call_count)
+        mock_ged.reset_mock()
+
+        proxy = self.connect().lease
+        self.assertEqual(URL, proxy.endpoint_override)
+        # Only endpoint lookups remain, which never fetch a discovery
+        # document.
+        for call in mock_ged.call_args_list:
+            self.assertFalse(call[1].get('discover_versions', True))
@@ -0,0 +1,230 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import asyncio
+import json
+import threading
+from unittest import mock
+
+from esi.lease.v1 import _async_proxy
+from esi.lease.v1 import _proxy
+from esi.lease.v1 import lease
+from esi.lease.v1 import offer
+
+from openstack import exceptions
+from openstack.tests.unit import base
+
+ENDPOINT = 'https://lease.example.com/v1'
+
+
+class FakeResponse:
+    def __init__(self, status=200, body=None, links=None):
+        self.status = status
+        self.reason = 'reason'
+        self.headers = {}
+        self.links = links or {}
+        self._content = b'' if body is None else json.dumps(body).encode()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def read(self):
+        return self._content
+
+    async def json(self, content_type=None):
+        return json.loads(self._content)
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return self.responses.pop(0)
+
+
+class TestAsyncProxy(base.TestCase):
+    def setUp(self):
+        super(TestAsyncProxy, self).setUp()
+        self.sync_proxy = mock.Mock(spec=_proxy.Proxy)
+        self.sync_proxy.session = mock.Mock()
+        self.sync_proxy.get_endpoint.return_value = ENDPOINT
+        self.sync_proxy.session.get_auth_headers.return_value = {
+            'X-Auth-Token': 'token'}
+        self.sync_proxy._get_connection.return_value = None
+        self.sync_proxy._get_resource.side_effect = (
+            lambda cls, value: value if isinstance(value, cls)
+            else cls.new(id=value))
+
+    def _proxy(self, *responses):
+        self.session = FakeSession(*responses)
+        return _async_proxy.AsyncProxy(self.sync_proxy, session=self.session)
+
+    def test_get_lease(self):
+        proxy = self._proxy(FakeResponse(body={'uuid': 'l1',
+                                               'resource_type': 'ironic'}))
+        result = asyncio.run(proxy.get_lease('l1'))
+        self.assertIsInstance(result, lease.Lease)
+        self.assertEqual('l1', result.id)
+        self.assertEqual('ironic', result.node_type)
+        method, url, kwargs = self.session.calls[0]
+        self.assertEqual('GET', method)
+        self.assertEqual(ENDPOINT + '/leases/l1', url)
+        self.assertEqual('token', kwargs['headers']['X-Auth-Token'])
+
+    def test_credentials_cached_off_loop(self):
+        loop_threads = []
+        self.sync_proxy.get_endpoint.side_effect = (
+            lambda: loop_threads.append(threading.get_ident()) or ENDPOINT)
+        proxy = self._proxy(FakeResponse(body={'uuid': 'l1'}),
+                            FakeResponse(body={'uuid': 'l2'}))
+
+        async def get_both():
+            await proxy.get_lease('l1')
+            await proxy.get_lease('l2')
+            return threading.get_ident()
+
+        self.assertNotIn(asyncio.run(get_both()), loop_threads)
+        self.assertEqual(1, len(loop_threads))
+        self.sync_proxy.session.get_auth_headers.assert_called_once_with()
+        self.sync_proxy.session.invalidate.assert_not_called()
+
+    def test_unauthorized_refreshes_token(self):
+        self.sync_proxy.session.get_auth_headers.side_effect = [
+            {'X-Auth-Token': 'expired'}, {'X-Auth-Token': 'token'}]
+        proxy = self._proxy(FakeResponse(status=401),
+                            FakeResponse(body={'uuid': 'l1'}))
+        self.assertEqual('l1', asyncio.run(proxy.get_lease('l1')).id)
+        self.sync_proxy.session.invalidate.assert_called_once_with()
+        self.assertEqual(['expired', 'token'],
+                         [call[2]['headers']['X-Auth-Token']
+                          for call in self.session.calls])
+
+    def test_unauthorized_twice(self):
+        proxy = self._proxy(FakeResponse(status=401),
+                            FakeResponse(status=401))
+        self.assertRaises(exceptions.HttpException,
+                          asyncio.run, proxy.get_lease('l1'))
+        self.assertEqual(2, len(self.session.calls))
+
+    def test_get_lease_not_found(self):
+        proxy = self._proxy(FakeResponse(status=404,
+                                         body={'faultstring': 'missing'}))
+        self.assertRaises(exceptions.ResourceNotFound,
+                          asyncio.run, proxy.get_lease('l1'))
+
+    def test_offers_paginated(self):
+        next_link = {'next': {'url': ENDPOINT + '/offers?marker=o2'}}
+        proxy = self._proxy(
+            FakeResponse(body={'offers': [{'uuid': 'o1'}, {'uuid': 'o2'}]},
+                         links=next_link),
+            FakeResponse(body={'offers': [{'uuid': 'o3'}]}),
+        )
+
+        async def collect():
+            return [o async for o in proxy.offers(resource_class='fc430')]
+
+        offers = asyncio.run(collect())
+        self.assertEqual(['o1', 'o2', 'o3'], [o.id for o in offers])
+        self.assertTrue(all(isinstance(o, offer.Offer) for o in offers))
+        self.assertEqual({'resource_class': 'fc430'},
+                         self.session.calls[0][2]['params'])
+        self.assertEqual(ENDPOINT + '/offers', self.session.calls[1][1])
+        self.assertEqual({'resource_class': 'fc430', 'marker': ['o2']},
+                         self.session.calls[1][2]['params'])
+
+    def test_offers_fields_keep_id(self):
+        proxy = self._proxy(FakeResponse(body={'offers': [{'uuid': 'o1'}]}))
+
+        async def collect():
+            return [o async for o in proxy.offers(fields=['node_type'])]
+
+        self.assertEqual(['o1'], [o.id for o in asyncio.run(collect())])
+        self.assertEqual('resource_type,uuid',
+                         self.session.calls[0][2]['params']['fields'])
+
+    def test_offers_unknown_params(self):
+        proxy = self._proxy()
+
+        async def collect(**query):
+            return [o async for o in proxy.offers(**query)]
+
+        self.assertRaises(exceptions.InvalidResourceQuery,
+                          asyncio.run, collect(bogus=1))
+        self.assertEqual([], self.session.calls)
+
+    def test_offers_allow_unknown_params(self):
+        proxy = self._proxy(FakeResponse(body={'offers': [{'uuid': 'o1'}]}))
+
+        async def collect():
+            return [o async for o in proxy.offers(bogus=1,
+                                                  allow_unknown_params=True)]
+
+        self.assertEqual(['o1'], [o.id for o in asyncio.run(collect())])
+        self.assertEqual({}, self.session.calls[0][2]['params'])
+
+    def test_create_offer(self):
+        proxy = self._proxy(FakeResponse(body={'uuid': 'o1',
+                                               'resource_uuid': 'n1'}))
+        result = asyncio.run(proxy.create_offer(resource_uuid='n1'))
+        self.assertEqual('o1', result.id)
+        method, url, kwargs = self.session.calls[0]
+        self.assertEqual(('POST', ENDPOINT + '/offers'), (method, url))
+        self.assertEqual({'resource_uuid': 'n1'}, kwargs['json'])
+
+    def test_claim_offer(self):
+        proxy = self._proxy(FakeResponse(body={'uuid': 'l1'}))
+        result = asyncio.run(proxy.claim_offer('o1', name='lease'))
+        self.assertEqual({'uuid': 'l1'}, result)
+        method, url, kwargs = self.session.calls[0]
+        self.assertEqual(('POST', ENDPOINT + '/offers/o1/claim'),
+                         (method, url))
+        self.assertEqual({'name': 'lease'}, kwargs['json'])
+
+    def test_update_lease(self):
+        proxy = self._proxy(FakeResponse(body={'uuid': 'l1'}))
+        asyncio.run(proxy.update_lease('l1', end_time='2030-01-01'))
+        method, url, kwargs = self.session.calls[0]
+        self.assertEqual(('PATCH', ENDPOINT + '/leases/l1'), (method, url))
+
+    def test_delete_lease_ignore_missing(self):
+        proxy = self._proxy(FakeResponse(status=404))
+        self.assertIsNone(asyncio.run(proxy.delete_lease('l1')))
+
+    def test_delete_lease_missing(self):
+        proxy = self._proxy(FakeResponse(status=404))
+        self.assertRaises(
+            exceptions.ResourceNotFound,
+            asyncio.run, proxy.delete_lease('l1', ignore_missing=False))
+
+    def test_follow_events(self):
+        proxy = self._proxy(
+            FakeResponse(body={'events': [{'id': 2}, {'id': 1}]}),
+            FakeResponse(body={'events': []}),
+            FakeResponse(body={'events': [{'id': 2}, {'id': 3}]}),
+        )
+
+        async def collect():
+            result = []
+            async for e in proxy.follow_events(min_interval=0):
+                result.append(e.id)
+                if len(result) == 3:
+                    return result
+
+        self.assertEqual([1, 2, 3], asyncio.run(collect()))
+        self.assertEqual({'last_event_id': 2},
+                         self.session.calls[2][2]['params'])
@@ -0,0 +1,101 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import random
+
+from esi.lease.v1 import _availability
+from esi.lease.v1 import offer
+
+from openstack.tests.unit import base
+
+
+def make_offer(uuid, windows, resource_class='fc430'):
+    return offer.Offer.existing(
+        uuid=uuid, resource_class=resource_class,
+        availabilities=[['2023-01-%02dT00:00:00' % start,
+                         '2023-01-%02dT00:00:00' % end]
+                        for start, end in windows])
+
+
+class TestAvailabilityIndex(base.TestCase):
+    def setUp(self):
+        super(TestAvailabilityIndex, self).setUp()
+        self.index = _availability.AvailabilityIndex([
+            make_offer('o1', [(1, 5), (10, 20)]),
+            make_offer('o2', [(3, 12)]),
+            make_offer('o3', [(1, 30)], resource_class='gpu'),
+        ])
+
+    def find(self, start, end, **kwargs):
+        return [o.id for o in self.index.find_available(
+            'fc430', '2023-01-%02dT00:00:00' % start,
+            '2023-01-%02dT00:00:00' % end, **kwargs)]
+
+    def test_find_available(self):
+        self.assertEqual(['o1', 'o2'], self.find(4, 5))
+        self.assertEqual(['o2'], self.find(4, 11))
+        self.assertEqual(['o2', 'o1'], self.find(11, 12))
+        self.assertEqual([], self.find(4, 13))
+        self.assertEqual([], self.find(25, 26))
+
+    def test_count(self):
+        self.assertEqual(['o1'], self.find(4, 5, count=1))
+
+    def test_datetime(self):
+        start = datetime.datetime(2023, 1, 4, tzinfo=datetime.timezone.utc)
+        result = self.index.find_available(
+            'gpu', start, start + datetime.timedelta(days=1))
+        self.assertEqual(['o3'], [o.id for o in result])
+
+    def test_start_end_fallback(self):
+        self.index.update([offer.Offer.existing(
+            uuid='o4', resource_class='fc430',
+            start_time='2023-01-01T00:00:00',
+            end_time='2023-01-31T00:00:00')])
+        self.assertIn('o4', self.find(4, 13))
+
+    def test_fully_booked(self):
+        self.index.update([offer.Offer.existing(
+            uuid='o4', resource_class='fc430', availabilities=[],
+            start_time='2023-01-01T00:00:00',
+            end_time='2023-01-31T00:00:00')])
+        self.assertNotIn('o4', self.find(5, 6))
+
+    def test_update_remove(self):
+        self.index.update([make_offer('o2', [(20, 25)])])
+        self.assertEqual(['o1'], self.find(4, 5))
+        self.index.remove('o1')
+        self.assertEqual([], self.find(4, 5))
+        self.assertEqual(2, len(self.index))
+
+    def test_matches_scan(self):
+        rng = random.Random(4)
+        offers = []
+        for i in range(50):
+            windows = []
+            for _ in range(rng.randint(0, 3)):
+                start = rng.randint(1, 27)
+                windows.append((start, rng.randint(start + 1, 28)))
+            offers.append(make_offer('o%d' % i, windows))
+        index = _availability.AvailabilityIndex(offers)
+        for _ in range(100):
+            start = rng.randint(1, 27)
+            end = rng.randint(start, 28)
+            expected = {o.id for o in offers
+                        for a in o.availabilities
+                        if a[0] <= '2023-01-%02dT00:00:00' % start
+                        and a[1] >= '2023-01-%02dT00:00:00' % end}
+            found = index.find_available(
+                'fc430', '2023-01-%02dT00:00:00' % start,
+                '2023-01-%02dT00:00:00' % end)
+            self.assertEqual(expected, {o.id for o in found})
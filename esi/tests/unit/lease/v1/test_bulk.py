@@ -0,0 +1,49 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+from esi.lease.v1 import _bulk
+
+from openstack.tests.unit import base
+
+
+class TestBulkResults(base.TestCase):
+    def test_results(self):
+        def func(item):
+            if item == 2:
+                raise ValueError(item)
+            return item * 10
+
+        results = _bulk.BulkResults(func, [1, 2, 3], max_workers=2)
+        self.assertEqual(3, len(results))
+        self.assertEqual([10, 30],
+                         sorted(r.result for r in results.succeeded))
+        self.assertEqual([2], [r.item for r in results.failed])
+        self.assertIsInstance(results.failed[0].error, ValueError)
+        self.assertIsNotNone(results.elapsed)
+
+    def test_concurrency(self):
+        barrier = threading.Barrier(3, timeout=5)
+        results = _bulk.BulkResults(lambda item: barrier.wait(),
+                                    range(3), max_workers=3)
+        self.assertEqual(3, len(results.succeeded))
+
+    def test_stream_then_resume(self):
+        results = _bulk.BulkResults(lambda item: item, range(5))
+        iterator = iter(results)
+        first = next(iterator)
+        iterator.close()
+        items = [r.item for r in results]
+        self.assertEqual(5, len(items))
+        self.assertEqual(first.item, items[0])
+        self.assertEqual(list(range(5)), sorted(items))
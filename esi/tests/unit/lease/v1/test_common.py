@@ -0,0 +1,204 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import threading
+from unittest import mock
+
+from keystoneauth1 import adapter
+
+from esi.lease.v1 import _common
+from esi.lease.v1 import event
+from esi.lease.v1 import lease
+from esi.lease.v1 import offer
+
+from openstack import exceptions
+from openstack.tests.unit import base
+
+
+def fake_response(body, links=None):
+    response = mock.Mock(status_code=200, headers={}, links=links or {})
+    response.json.return_value = body
+    return response
+
+
+class TestListMixin(base.TestCase):
+    def setUp(self):
+        super(TestListMixin, self).setUp()
+        self.session = mock.Mock(spec=adapter.Adapter,
+                                 default_microversion=None)
+        self.session._get_connection = mock.Mock(return_value=None)
+        self.session.get.side_effect = [
+            fake_response({'leases': [{'uuid': 'l1'}, {'uuid': 'l2'}],
+                           'links': [{'rel': 'next',
+                                      'href': '/leases?marker=l2'}]}),
+            fake_response({'leases': [{'uuid': 'l3', 'name': 'x'}]}),
+        ]
+
+    def test_list_pages(self):
+        pages = list(lease.Lease.list_pages(self.session, status='active'))
+        self.assertEqual([['l1', 'l2'], ['l3']],
+                         [[r.id for r in page] for page in pages])
+        self.assertEqual(
+            [mock.call('/leases', headers={'Accept': 'application/json'},
+                       params={'status': 'active'}, microversion=None),
+             mock.call('/leases', headers={'Accept': 'application/json'},
+                       params={'status': 'active', 'marker': ['l2']},
+                       microversion=None)],
+            self.session.get.call_args_list)
+
+    def test_list_client_filters(self):
+        result = list(lease.Lease.list(self.session, name='x'))
+        self.assertEqual(['l3'], [r.id for r in result])
+
+    def test_list_dict_client_filters(self):
+        self.session.get.side_effect = [fake_response({'leases': [
+            {'uuid': 'l1', 'resource_properties': {'a': 1, 'b': {'c': 2}}},
+            {'uuid': 'l2', 'resource_properties': {'a': 1, 'b': {'c': 3}}},
+            {'uuid': 'l3'},
+        ]})]
+        result = list(lease.Lease.list(
+            self.session, resource_properties={'b': {'c': 2}}))
+        self.assertEqual(['l1'], [r.id for r in result])
+
+    def test_list_unknown_params(self):
+        self.assertRaises(exceptions.InvalidResourceQuery, list,
+                          lease.Lease.list(self.session, bogus=1))
+        self.session.get.assert_not_called()
+        result = list(lease.Lease.list(self.session, bogus=1,
+                                       allow_unknown_params=True))
+        self.assertEqual(3, len(result))
+        self.assertEqual({},
+                         self.session.get.call_args_list[0][1]['params'])
+
+    def test_list_fields(self):
+        result = list(lease.Lease.list(self.session,
+                                       fields=['id', 'node_type']))
+        self.assertEqual('uuid,resource_type',
+                         self.session.get.call_args[1]['params']['fields'])
+        self.assertIsNone(result[0].properties)
+
+    def test_list_fields_without_id(self):
+        self.session.get.side_effect = [
+            fake_response({'leases': [{'uuid': 'l1'}, {'uuid': 'l2'}]}),
+            fake_response({'leases': [{'uuid': 'l3'}]}),
+            fake_response({'leases': []}),
+        ]
+        result = list(lease.Lease.list(self.session, fields='node_type',
+                                       limit=2))
+        self.assertEqual(['l1', 'l2', 'l3'], [r.id for r in result])
+        calls = self.session.get.call_args_list
+        self.assertEqual('resource_type,uuid',
+                         calls[0][1]['params']['fields'])
+        self.assertEqual('l2', calls[1][1]['params']['marker'])
+
+    def test_list_fields_unpaginated(self):
+        list(lease.Lease.list(self.session, paginated=False,
+                              fields='node_type'))
+        self.assertEqual('resource_type',
+                         self.session.get.call_args[1]['params']['fields'])
+
+    def test_list_raw(self):
+        result = list(lease.Lease.list(self.session, raw=True))
+        self.assertEqual(['l1', 'l2', 'l3'], [r.id for r in result])
+        self.assertEqual('x', result[2].name)
+        self.assertNotIsInstance(result[0], lease.Lease)
+
+    def test_list_stream(self):
+        first = json.dumps({'leases': [{'uuid': 'l1'}, {'uuid': 'l2'}],
+                            'links': [{'rel': 'next',
+                                       'href': '/leases?marker=l2'}]})
+        second = json.dumps({'leases': [{'uuid': 'l3'}]})
+        responses = [mock.Mock(status_code=200, headers={}, links={})
+                     for _ in range(2)]
+        responses[0].iter_content.return_value = [first[:10].encode(),
+                                                  first[10:].encode()]
+        responses[1].iter_content.return_value = [second.encode()]
+        self.session.get.side_effect = responses
+
+        pages = lease.Lease.list_pages(self.session, stream=True)
+        self.assertEqual('l1', next(iter(next(pages))).id)
+        self.assertEqual(['l3'], [r.id for r in next(pages)])
+        self.assertRaises(StopIteration, next, pages)
+        self.assertTrue(self.session.get.call_args[1]['stream'])
+        responses[0].close.assert_called_once_with()
+
+    def test_list_prefetch(self):
+        result = list(lease.Lease.list(self.session, prefetch=2))
+        self.assertEqual(['l1', 'l2', 'l3'], [r.id for r in result])
+
+
+class TestPrefetched(base.TestCase):
+    def test_order(self):
+        self.assertEqual(list(range(10)),
+                         list(_common.prefetched(iter(range(10)), 3)))
+
+    def test_error(self):
+        def failing():
+            yield 1
+            raise ValueError('boom')
+
+        result = _common.prefetched(failing(), 1)
+        self.assertEqual(1, next(result))
+        self.assertRaises(ValueError, next, result)
+
+    def test_bounded(self):
+        produced = []
+        full = threading.Event()
+
+        class Semaphore(threading.Semaphore):
+            def acquire(self, *args, **kwargs):
+                if super(Semaphore, self).acquire(blocking=False):
+                    return True
+                # The producer waits for the consumer from now on.
+                if len(produced) >= 3:
+                    full.set()
+                return super(Semaphore, self).acquire(*args, **kwargs)
+
+        def producer():
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        with mock.patch.object(_common.threading, 'Semaphore', Semaphore):
+            result = _common.prefetched(producer(), 2)
+            self.assertEqual(0, next(result))
+        # The consumer holds item 0; at most two more may be buffered.
+        self.assertTrue(full.wait(5))
+        self.assertEqual([0, 1, 2], produced)
+        result.close()
+
+
+class TestFieldsType(base.TestCase):
+    def test_none(self):
+        self.assertIsNone(_common.fields_type(None, offer.Offer))
+
+    def test_attribute_names(self):
+        self.assertEqual(
+            'uuid,resource_type,resource',
+            _common.fields_type(['uuid', 'node_type', 'resource_name'],
+                                offer.Offer))
+
+    def test_server_names(self):
+        self.assertEqual(
+            'resource_type,status',
+            _common.fields_type('resource_type,status,node_type',
+                                lease.Lease))
+
+    def test_alternate_id(self):
+        self.assertEqual('uuid', _common.fields_type(['id'], lease.Lease))
+        self.assertEqual('id', _common.fields_type(['id'], event.Event))
+
+    def test_invalid(self):
+        self.assertRaises(exceptions.InvalidResourceQuery,
+                          _common.fields_type, ['uuid', 'bogus'],
+                          offer.Offer)
@@ -0,0 +1,129 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+from unittest import mock
+
+from keystoneauth1 import adapter
+
+from esi.lease.v1 import _conditional
+from esi.lease.v1 import lease
+
+from openstack.tests.unit import base
+
+
+def fake_response(status_code=200, headers=None, body=None):
+    response = mock.Mock(status_code=status_code, headers=headers or {},
+                         links={})
+    response.content = json.dumps(body).encode()
+    response.json.return_value = body
+    return response
+
+
+class TestValidatorCache(base.TestCase):
+    def setUp(self):
+        super(TestValidatorCache, self).setUp()
+        self.cache = _conditional.ValidatorCache(max_entries=2)
+        self.session = mock.Mock(spec=adapter.Adapter,
+                                 default_microversion=None)
+        self.session.validator_cache = self.cache
+        self.session._get_connection = mock.Mock(return_value=None)
+
+    def test_not_modified(self):
+        self.session.get.side_effect = [
+            fake_response(headers={'ETag': '"v1"'},
+                          body={'uuid': 'l1', 'status': 'active'}),
+            fake_response(status_code=304),
+        ]
+        first = lease.Lease.new(id='l1').fetch(self.session)
+        second = lease.Lease.new(id='l1').fetch(self.session)
+        self.assertEqual('active', first.status)
+        self.assertEqual('active', second.status)
+        self.assertEqual('"v1"',
+                         self.session.get.call_args[1]['headers'][
+                             'If-None-Match'])
+        stats = self.cache.stats()
+        self.assertEqual({'requests': 1, 'hits': 1, 'hit_rate': 1.0,
+                          'entries': 1},
+                         {k: stats[k] for k in stats if k != 'bytes'})
+        self.assertGreater(stats['bytes'], 0)
+
+    def test_modified(self):
+        self.session.get.side_effect = [
+            fake_response(headers={'Last-Modified': 'Mon'},
+                          body={'leases': [{'uuid': 'l1'}]}),
+            fake_response(headers={'Last-Modified': 'Tue'},
+                          body={'leases': [{'uuid': 'l2'}]}),
+            fake_response(status_code=304),
+        ]
+        for expected in (['l1'], ['l2'], ['l2']):
+            self.assertEqual(expected,
+                             [r.id for r in lease.Lease.list(self.session)])
+        self.assertEqual('Tue',
+                         self.session.get.call_args[1]['headers'][
+                             'If-Modified-Since'])
+        self.assertEqual(0.5, self.cache.hit_rate)
+
+    def test_no_validators(self):
+        self.session.get.side_effect = [
+            fake_response(body={'uuid': 'l1'}),
+            fake_response(body={'uuid': 'l1'}),
+        ]
+        for _ in range(2):
+            lease.Lease.new(id='l1').fetch(self.session)
+        self.assertEqual({}, self.session.get.call_args[1]['headers'])
+        self.assertEqual(0, self.cache.stats()['entries'])
+
+    def test_eviction(self):
+        for i in range(3):
+            self.cache._store(str(i), fake_response(
+                headers={'ETag': str(i)}, body={}))
+        self.assertEqual(['1', '2'], list(self.cache._entries))
+
+    def test_byte_cap(self):
+        self.cache = _conditional.ValidatorCache(max_bytes=10)
+        self.cache._store('a', fake_response(headers={'ETag': 'a'},
+                                             body='1234'))
+        self.cache._store('b', fake_response(headers={'ETag': 'b'},
+                                             body='5678'))
+        # Each body is 6 bytes once encoded, so only the last one fits.
+        self.assertEqual(['b'], list(self.cache._entries))
+        self.cache._store('c', fake_response(headers={'ETag': 'c'},
+                                             body='x' * 20))
+        self.assertEqual(['b'], list(self.cache._entries))
+        self.assertEqual(6, self.cache.stats()['bytes'])
+        self.cache._store('b', fake_response(headers={'ETag': 'b2'},
+                                             body='12'))
+        self.assertEqual(4, self.cache.stats()['bytes'])
+
+    def test_timestamp_not_a_validator(self):
+        self.session.get.side_effect = [
+            fake_response(headers={'X-Timestamp': '1700000000.0'},
+                          body={'uuid': 'l1'}),
+            fake_response(body={'uuid': 'l1'}),
+        ]
+        for _ in range(2):
+            lease.Lease.new(id='l1').fetch(self.session)
+        self.assertEqual({}, self.session.get.call_args[1]['headers'])
+
+    def test_links_replayed(self):
+        link = '<https://lease/v1/leases?marker=l1>; rel="next"'
+        self.session.get.side_effect = [
+            fake_response(headers={'ETag': '"p1"', 'Link': link},
+                          body={'leases': [{'uuid': 'l1'}]}),
+            fake_response(status_code=304),
+        ]
+        self.cache.get(self.session, '/leases')
+        replayed = self.cache.get(self.session, '/leases')
+        self.assertIsInstance(replayed, _conditional.CachedResponse)
+        self.assertEqual('https://lease/v1/leases?marker=l1',
+                         replayed.links['next']['url'])
@@ -0,0 +1,99 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import os
+import tempfile
+from unittest import mock
+
+from esi.lease.v1 import _follow
+from esi.lease.v1 import event
+
+from openstack.tests.unit import base
+
+
+def events(*ids):
+    return [event.Event.existing(id=i) for i in ids]
+
+
+class TestEventFollower(base.TestCase):
+    def test_new_events(self):
+        follower = _follow.EventFollower(last_event_id=2)
+        result = follower.new_events(events(4, 1, 3, 2, 3))
+        self.assertEqual([3, 4], [e.id for e in result])
+
+    def test_string_ids(self):
+        follower = _follow.EventFollower(last_event_id='9')
+        result = follower.new_events(events('10', '9', '8'))
+        self.assertEqual(['10'], [e.id for e in result])
+
+    def test_query(self):
+        follower = _follow.EventFollower()
+        self.assertEqual({'event_type': 'x'},
+                         follower.query({'event_type': 'x'}))
+        follower.advance(events(5)[0])
+        self.assertEqual({'event_type': 'x', 'last_event_id': 5},
+                         follower.query({'event_type': 'x'}))
+
+    def test_backoff(self):
+        follower = _follow.EventFollower(min_interval=1, max_interval=5)
+        intervals = []
+        for batch in ([], [], [], [], events(1), []):
+            follower.new_events(batch)
+            intervals.append(follower.interval)
+        self.assertEqual([2, 4, 5, 5, 1, 2], intervals)
+
+
+class TestCheckpoint(base.TestCase):
+    def setUp(self):
+        super(TestCheckpoint, self).setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'cursor.json')
+
+    def test_round_trip(self):
+        checkpoint = _follow.Checkpoint(self.path)
+        self.assertIsNone(checkpoint.load())
+        checkpoint.save(42)
+        self.assertEqual(42, _follow.Checkpoint(self.path).load())
+
+    def test_resume(self):
+        _follow.Checkpoint(self.path).save(7)
+        follower = _follow.EventFollower(checkpoint=self.path)
+        self.assertEqual(7, follower.last_event_id)
+        follower.advance(events(8)[0])
+        self.assertEqual(8, _follow.Checkpoint(self.path).load())
+
+
+class TestFollow(base.TestCase):
+    def test_follow(self):
+        list_events = mock.Mock(side_effect=[events(1, 2), [], events(2, 3)])
+        sleep = mock.Mock()
+        result = _follow.follow(list_events, _follow.EventFollower(),
+                                sleep=sleep, event_type='x')
+        self.assertEqual([1, 2, 3], [next(result).id for _ in range(3)])
+        self.assertEqual(
+            [mock.call(event_type='x'),
+             mock.call(event_type='x', last_event_id=2),
+             mock.call(event_type='x', last_event_id=2)],
+            list_events.call_args_list)
+        self.assertEqual(2, sleep.call_count)
+
+    def test_unprocessed_not_checkpointed(self):
+        checkpoint = mock.Mock(spec=_follow.Checkpoint)
+        checkpoint.load.return_value = None
+        list_events = mock.Mock(return_value=events(1, 2))
+        result = _follow.follow(
+            list_events, _follow.EventFollower(checkpoint=checkpoint))
+        next(result)
+        checkpoint.save.assert_not_called()
+        next(result)
+        checkpoint.save.assert_called_once_with(1)
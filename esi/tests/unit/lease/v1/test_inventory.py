@@ -0,0 +1,129 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+from unittest import mock
+
+from keystoneauth1 import exceptions as ks_exceptions
+
+from esi.lease.v1 import _bulk
+from esi.lease.v1 import _inventory
+from esi.lease.v1 import _proxy
+from esi.lease.v1 import event
+from esi.lease.v1 import lease
+from esi.lease.v1 import node
+from esi.lease.v1 import offer
+
+from openstack import exceptions
+from openstack.tests.unit import base
+
+
+class TestInventory(base.TestCase):
+    def setUp(self):
+        super(TestInventory, self).setUp()
+        self.proxy = mock.Mock(spec=_proxy.Proxy)
+        self.proxy.offers.return_value = [
+            offer.Offer.existing(uuid='o1', resource_uuid='n1',
+                                 status='available', project_id='p1'),
+            offer.Offer.existing(uuid='o2', resource_uuid='n2',
+                                 status='available', project_id='p1'),
+        ]
+        self.proxy.leases.return_value = [
+            lease.Lease.existing(uuid='l1', resource_uuid='n1',
+                                 status='active', project_id='p2',
+                                 owner_id='p1'),
+        ]
+        self.proxy.nodes.return_value = [node.Node.existing(uuid='n1'),
+                                         node.Node.existing(uuid='n2')]
+        self.proxy.events.return_value = []
+        self.inventory = _inventory.Inventory(self.proxy)
+        self.inventory.bootstrap()
+
+    def test_lookups(self):
+        self.assertEqual('n1', self.inventory.get('offer', 'o1').resource_uuid)
+        self.assertIsNone(self.inventory.get('lease', 'missing'))
+        self.assertEqual(['o1'], [o.id for o in self.inventory.offers(
+            resource_uuid='n1', status='available')])
+        self.assertEqual(['l1'], [o.id for o in self.inventory.leases(
+            owner_id='p1')])
+        self.assertEqual([], self.inventory.leases(project_id='p1'))
+        self.assertEqual(2, len(self.inventory.nodes()))
+
+    def test_invalid_filter(self):
+        self.assertRaises(exceptions.InvalidResourceQuery,
+                          self.inventory.offers, node_type='ironic_node')
+
+    def test_sync(self):
+        self.proxy.events.return_value = [
+            event.Event.existing(id=5, object_type='lease', object_uuid='l2',
+                                 resource_uuid='n2'),
+            event.Event.existing(id=6, object_type='offer', object_uuid='o2',
+                                 resource_uuid='n2'),
+            event.Event.existing(id=7, object_type='lease', object_uuid='l1',
+                                 resource_uuid='n1'),
+        ]
+        self.proxy.get_lease.side_effect = [
+            lease.Lease.existing(uuid='l2', resource_uuid='n2',
+                                 status='created', project_id='p2'),
+            exceptions.ResourceNotFound,
+        ]
+        self.proxy.get_offer.return_value = offer.Offer.existing(
+            uuid='o2', resource_uuid='n2', status='deleted')
+        self.proxy.get_nodes.return_value = _bulk.GetManyResult(
+            [node.Node.existing(uuid='n2', lessee='p2')], ['n1'])
+
+        self.assertEqual(3, self.inventory.sync())
+        self.assertEqual(['l2'], [o.id for o in self.inventory.leases(
+            project_id='p2')])
+        self.assertEqual(['o1'], [o.id for o in self.inventory.offers()])
+        # Only the nodes named by the events are refreshed.
+        self.assertEqual(1, self.proxy.nodes.call_count)
+        self.assertEqual({'n1', 'n2'},
+                         set(self.proxy.get_nodes.call_args[0][0]))
+        self.assertEqual(['n2'], [n.id for n in self.inventory.nodes()])
+        self.assertEqual('p2', self.inventory.get('node', 'n2').lessee)
+        self.assertIn('last_event_time', self.proxy.events.call_args[1])
+
+        self.inventory.sync()
+        self.assertEqual(7, self.proxy.events.call_args[1]['last_event_id'])
+
+    def test_sync_other_resources(self):
+        self.proxy.events.return_value = [
+            event.Event.existing(id=5, object_type='offer', object_uuid='o9',
+                                 resource_type='dummy_node',
+                                 resource_uuid='d1'),
+        ]
+        self.proxy.get_offer.side_effect = exceptions.ResourceNotFound
+        self.assertEqual(1, self.inventory.sync())
+        self.proxy.get_nodes.assert_not_called()
+
+    def test_background_errors(self):
+        synced = threading.Event()
+        errors = [ks_exceptions.ConnectFailure('down'), RuntimeError('bug')]
+
+        def events(**query):
+            if errors:
+                raise errors.pop(0)
+            synced.set()
+            return []
+
+        self.proxy.events.side_effect = events
+        self.inventory = _inventory.Inventory(self.proxy, min_interval=0,
+                                              max_interval=0)
+        self.inventory.bootstrap()
+        with mock.patch.object(_inventory._log, 'warning') as warning:
+            self.inventory.start()
+            self.addCleanup(self.inventory.stop)
+            self.assertTrue(synced.wait(5))
+        self.assertEqual(2, warning.call_count)
+        self.inventory.stop()
+        self.assertIsNone(self.inventory.last_error)
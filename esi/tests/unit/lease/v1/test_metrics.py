@@ -0,0 +1,153 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+from unittest import mock
+
+from esi.lease.v1 import _metrics
+from esi.lease.v1 import _observe
+from esi.tests import fake_leap
+
+from openstack.tests import base as test_base
+from openstack.tests.unit import base
+
+
+def request(operation, elapsed, status=200, size=100, error=None):
+    return _observe.Event(_observe.REQUEST, operation, status=status,
+                          bytes=size, elapsed=elapsed, error=error)
+
+
+class TestHistogram(base.TestCase):
+    def test_record(self):
+        histogram = _metrics.Histogram(buckets=(1, 2, 4))
+        for value in (0.5, 1, 1.5, 3, 10):
+            histogram.record(value)
+        self.assertEqual([(1, 2), (2, 3), (4, 4), (float('inf'), 5)],
+                         histogram.cumulative())
+        self.assertEqual(5, histogram.count)
+        self.assertEqual(16.0, histogram.sum)
+
+    def test_percentile(self):
+        histogram = _metrics.Histogram(buckets=(1, 2))
+        self.assertIsNone(histogram.percentile(50))
+        for _ in range(100):
+            histogram.record(1.5)
+        # Interpolated linearly within the (1, 2] bucket.
+        self.assertEqual(1.5, histogram.percentile(50))
+        self.assertEqual(1.99, histogram.percentile(99))
+        histogram.record(5)
+        self.assertEqual(2, histogram.percentile(100))
+
+
+class TestLeaseMetrics(base.TestCase):
+    def setUp(self):
+        super(TestLeaseMetrics, self).setUp()
+        self.metrics = _metrics.LeaseMetrics(buckets=(0.1, 1))
+        self.metrics(request('claim_offer', 0.05, status=201))
+        self.metrics(request('claim_offer', 0.5, status=409, size=50))
+        self.metrics(request('list_offers', 2, status=None, size=None,
+                             error=RuntimeError()))
+        self.metrics(_observe.Event(_observe.PAGE, 'list_offers', items=7))
+
+    def test_snapshot(self):
+        operations = self.metrics.snapshot()['operations']
+        claim = operations['claim_offer']
+        self.assertEqual(2, claim['requests'])
+        self.assertEqual(1, claim['errors'])
+        self.assertEqual({201: 1, 409: 1}, claim['statuses'])
+        self.assertEqual(150, claim['bytes'])
+        self.assertEqual(2, claim['latency']['count'])
+        listing = operations['list_offers']
+        self.assertEqual(1, listing['errors'])
+        self.assertEqual(7, listing['items'])
+        self.assertEqual(1, listing['pages'])
+        self.metrics.reset()
+        self.assertEqual({}, self.metrics.snapshot()['operations'])
+
+    def test_prometheus(self):
+        text = self.metrics.prometheus()
+        lines = text.splitlines()
+        self.assertIn('# TYPE esi_lease_request_duration_seconds histogram',
+                      lines)
+        self.assertIn('esi_lease_request_duration_seconds_bucket'
+                      '{operation="claim_offer",le="0.1"} 1', lines)
+        self.assertIn('esi_lease_request_duration_seconds_bucket'
+                      '{operation="claim_offer",le="+Inf"} 2', lines)
+        self.assertIn('esi_lease_request_duration_seconds_count'
+                      '{operation="claim_offer"} 2', lines)
+        self.assertIn('esi_lease_requests_total'
+                      '{operation="claim_offer",status="409"} 1', lines)
+        self.assertIn('esi_lease_request_errors_total'
+                      '{operation="list_offers"} 1', lines)
+        self.assertIn('esi_lease_items_total{operation="list_offers"} 7',
+                      lines)
+        self.assertNotIn('retries', text)
+        self.assertTrue(text.endswith('\n'))
+
+    def test_label_escaping(self):
+        self.assertEqual(r'a\"b\\c\n', _metrics._label('a"b\\c\n'))
+
+
+# The unit test base mocks every HTTP request, so a plain one is used.
+class TestConnectionMetrics(test_base.TestCase):
+    def setUp(self):
+        super(TestConnectionMetrics, self).setUp()
+        self.leap = fake_leap.make_dataset(nodes=10, page_size=4)
+        self.server = fake_leap.FakeLeapServer(self.leap).start()
+        self.addCleanup(self.server.stop)
+
+    def test_from_setting(self):
+        conn = self.server.connect(lease_metrics=True)
+        list(conn.lease.offers())
+        snapshot = conn.get_lease_metrics()
+        offers = snapshot['operations']['list_offers']
+        self.assertEqual(3, offers['requests'])
+        self.assertEqual(10, offers['items'])
+        self.assertIsNotNone(offers['latency']['p99'])
+        self.assertEqual(0, snapshot['retries']['total'])
+        self.assertIs(conn.lease.metrics, conn.lease.enable_metrics())
+
+    def test_prometheus(self):
+        conn = self.server.connect()
+        self.assertIsNone(conn.lease.metrics)
+        conn.get_lease_metrics()
+        conn.list_nodes()
+        text = conn.get_lease_metrics('prometheus')
+        self.assertIn('esi_lease_requests_total'
+                      '{operation="list_nodes",status="200"} 3', text)
+        self.assertIn('esi_lease_in_flight{type="read"} 0', text)
+        self.assertRaises(ValueError, conn.get_lease_metrics, 'xml')
+
+    def test_enable_concurrently(self):
+        proxy = self.server.connect().lease
+        barrier = threading.Barrier(8)
+        results = []
+        build = _metrics.LeaseMetrics
+
+        def slow_build(*args, **kwargs):
+            time.sleep(0.05)
+            return build(*args, **kwargs)
+
+        def enable():
+            barrier.wait()
+            results.append(proxy.enable_metrics())
+
+        with mock.patch.object(_metrics, 'LeaseMetrics',
+                               side_effect=slow_build):
+            threads = [threading.Thread(target=enable) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(1, len(proxy.observers))
+        self.assertEqual({id(proxy.metrics)}, {id(m) for m in results})
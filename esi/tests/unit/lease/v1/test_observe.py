@@ -0,0 +1,121 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from keystoneauth1 import exceptions as ks_exceptions
+import requests
+
+from esi.lease.v1 import _observe
+from esi.tests import fake_leap
+
+from openstack import exceptions
+from openstack.tests import base as test_base
+from openstack.tests.unit import base
+
+
+class TestOperationName(base.TestCase):
+    def test_operation_name(self):
+        for method, url, expected in (
+                ('GET', 'http://leap/v1/offers?status=any',
+                 ('list_offers', 'offer')),
+                ('GET', '/leases/l1', ('get_lease', 'lease')),
+                ('POST', '/offers', ('create_offer', 'offer')),
+                ('POST', '/offers/o1/claim', ('claim_offer', 'offer')),
+                ('PATCH', '/v1/leases/l1', ('update_lease', 'lease')),
+                ('DELETE', '/offers/o1', ('delete_offer', 'offer')),
+                ('GET', '/', ('get', None))):
+            self.assertEqual(expected, _observe.operation_name(method, url))
+
+
+class TestObserver(base.TestCase):
+    def test_dispatch(self):
+        observer = _observe.Observer()
+        observer.on_page = mock.Mock()
+        event = _observe.Event(_observe.PAGE, 'list_offers')
+        observer(event)
+        observer(_observe.Event(_observe.REQUEST, 'list_offers'))
+        observer.on_page.assert_called_once_with(event)
+
+    def test_emit_errors_ignored(self):
+        failing = mock.Mock(side_effect=RuntimeError)
+        other = mock.Mock()
+        event = _observe.Event(_observe.FETCH, 'get_offer')
+        _observe.emit((failing, other), event)
+        other.assert_called_once_with(event)
+
+
+# The unit test base mocks every HTTP request, so a plain one is used.
+class TestProxyObservers(test_base.TestCase):
+    def setUp(self):
+        super(TestProxyObservers, self).setUp()
+        self.leap = fake_leap.make_dataset(nodes=10, page_size=4)
+        server = fake_leap.FakeLeapServer(self.leap).start()
+        self.addCleanup(server.stop)
+        self.proxy = server.connect().lease
+        self.events = []
+        self.proxy.add_observer(self.events.append)
+
+    def _kinds(self):
+        return [(e.kind, e.operation) for e in self.events]
+
+    def test_list(self):
+        self.assertEqual(10, len(list(self.proxy.offers())))
+        self.assertEqual(
+            [('request', 'list_offers'), ('page', 'list_offers')] * 3,
+            self._kinds())
+        request, page = self.events[:2]
+        self.assertEqual(200, request.status)
+        self.assertGreater(request.bytes, 0)
+        self.assertEqual({'auth', 'request', 'server'}, set(request.timings))
+        self.assertEqual('offer', page.resource_type)
+        self.assertEqual(4, page.items)
+        self.assertEqual(request.bytes, page.bytes)
+        self.assertEqual({'request', 'decode', 'hydrate'}, set(page.timings))
+        self.assertEqual(2, self.events[-1].items)
+
+    def test_list_stream(self):
+        list(self.proxy.nodes(stream=True))
+        pages = [e for e in self.events if e.kind == _observe.PAGE]
+        self.assertEqual([4, 4, 2], [e.items for e in pages])
+        self.assertEqual({'request'}, set(pages[0].timings))
+
+    def test_fetch_and_claim(self):
+        offer = self.proxy.get_offer(next(iter(self.leap.offers.items)))
+        start, end = offer.availabilities[0]
+        self.proxy.claim_offer(offer, start_time=start, end_time=end)
+        self.assertRaises(exceptions.ConflictException,
+                          self.proxy.claim_offer, offer,
+                          start_time=start, end_time=end)
+        self.assertEqual(
+            [('request', 'get_offer'), ('fetch', 'get_offer'),
+             ('request', 'claim_offer'), ('request', 'claim_offer')],
+            self._kinds())
+        self.assertEqual(1, self.events[1].items)
+        self.assertEqual([200, 200, 201, 409],
+                         [e.status for e in self.events])
+
+    def test_connection_error(self):
+        self.proxy.retry_policy.max_attempts = 1
+        self.proxy.session.session.mount('http://', mock.Mock(
+            send=mock.Mock(side_effect=requests.ConnectionError('reset'))))
+        self.assertRaises(ks_exceptions.ConnectFailure, list,
+                          self.proxy.nodes())
+        self.assertIsNotNone(self.events[-1].error)
+        self.assertIsNone(self.events[-1].status)
+
+    def test_remove_observer(self):
+        self.proxy.remove_observer(self.events.append)
+        with mock.patch.object(_observe, 'observe_request') as observe:
+            list(self.proxy.nodes())
+        self.assertEqual([], self.events)
+        observe.assert_not_called()
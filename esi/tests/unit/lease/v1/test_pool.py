@@ -0,0 +1,81 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import socket
+from unittest import mock
+
+from keystoneauth1 import session as ks_session
+
+from esi.lease.v1 import _pool
+
+from openstack.tests.unit import base
+
+ENDPOINT = 'https://lease.example.com/v1'
+
+
+class TestPool(base.TestCase):
+    def test_pool_options(self):
+        config = mock.Mock(config={'lease_pool_maxsize': '50',
+                                   'lease_tcp_nodelay': 'false',
+                                   'compute_pool_maxsize': 5})
+        self.assertEqual({'pool_maxsize': 50, 'tcp_nodelay': False},
+                         _pool.pool_options(config))
+
+    def test_timeouts(self):
+        self.assertEqual({}, _pool.timeouts(mock.Mock(config={})))
+        config = mock.Mock(config={'lease_timeout_connect': 2,
+                                   'lease_timeout_write': '30'})
+        self.assertEqual({'read': (2.0, None), 'write': (2.0, 30.0)},
+                         _pool.timeouts(config))
+
+    def test_timeouts_fallback(self):
+        config = mock.Mock(config={'lease_timeout_read': 5})
+        self.assertEqual({'read': (5.0, 5.0)},
+                         _pool.timeouts(config))
+        config.config['api_timeout'] = 60
+        self.assertEqual({'read': (60.0, 5.0), 'write': (60.0, 60.0)},
+                         _pool.timeouts(config))
+
+    def test_operation_class(self):
+        self.assertEqual('read', _pool.operation_class('get'))
+        self.assertEqual('write', _pool.operation_class('PATCH'))
+
+    def test_socket_options(self):
+        adapter = _pool.LeaseHTTPAdapter(tcp_nodelay=False,
+                                         tcp_keepalive=False)
+        self.assertIn((socket.IPPROTO_TCP, socket.TCP_NODELAY, 0),
+                      adapter.socket_options)
+        self.assertEqual(adapter.socket_options,
+                         adapter.poolmanager.connection_pool_kw[
+                             'socket_options'])
+
+    def test_mount_and_stats(self):
+        session = ks_session.Session()
+        adapter = _pool.mount(session, ENDPOINT, pool_maxsize=25)
+        self.assertIs(adapter, session.session.get_adapter(
+            ENDPOINT + '/leases'))
+        self.assertIsNot(adapter, session.session.get_adapter(
+            'https://compute.example.com/'))
+        # Another service on the same host keeps the default adapter.
+        self.assertIsNot(adapter, session.session.get_adapter(
+            'https://lease.example.com/compute/v2.1/servers'))
+        self.assertIsNot(adapter, session.session.get_adapter(
+            'https://lease.example.com/v10/'))
+        self.assertEqual([], _pool.stats(session, ENDPOINT))
+
+        adapter.poolmanager.connection_from_url(ENDPOINT)
+        stats = _pool.stats(session, ENDPOINT)
+        self.assertEqual(1, len(stats))
+        self.assertEqual({'host': 'lease.example.com', 'port': 443,
+                          'maxsize': 25, 'in_use': 0, 'idle': 0,
+                          'created': 0, 'requests': 0, 'utilization': 0.0},
+                         stats[0])
@@ -18,6 +18,7 @@ from esi.lease.v1 import lease
 from esi.lease.v1 import node
 from esi.lease.v1 import offer
 
+from openstack import exceptions
 from openstack.tests.unit import test_proxy_base
 
 _MOCK_METHOD = 'esi.lease.v1._proxy.Proxy._get_with_fields'
@@ -47,12 +48,48 @@ class TestOffer(TestESILEAPProxy):
             expected_kwargs={'fields': None},
         )
 
+    @mock.patch.object(offer.Offer, 'fetch')
+    def test_get_offer_fields(self, mock_fetch):
+        self.proxy.get_offer('o1', fields=['uuid', 'node_type'])
+        mock_fetch.assert_called_once_with(
+            self.proxy, error_message=mock.ANY,
+            fields='uuid,resource_type')
+
     def test_delete_offer(self):
         self.verify_delete(self.proxy.delete_offer, offer.Offer, False)
 
     def test_delete_offer_ignore(self):
         self.verify_delete(self.proxy.delete_offer, offer.Offer, True)
 
+    @mock.patch.object(_proxy.Proxy, 'delete_offer')
+    def test_delete_offers(self, mock_delete):
+        results = self.proxy.delete_offers(['o1', 'o2'])
+        self.assertEqual(2, len(results.succeeded))
+        mock_delete.assert_has_calls([mock.call('o1', ignore_missing=True),
+                                      mock.call('o2', ignore_missing=True)],
+                                     any_order=True)
+
+    @mock.patch.object(_proxy.Proxy, 'get_offer')
+    def test_get_offers(self, mock_get):
+        def get(value, fields=None):
+            if value == 'missing':
+                raise exceptions.ResourceNotFound
+            return offer.Offer.existing(uuid=offer.Offer._get_id(value))
+
+        mock_get.side_effect = get
+        found, missing = self.proxy.get_offers(
+            ['o3', 'missing', offer.Offer.existing(uuid='o1')],
+            fields=['uuid'])
+        self.assertEqual(['o3', 'o1'], [o.id for o in found])
+        self.assertEqual(['missing'], missing)
+        mock_get.assert_any_call('o3', fields=['uuid'])
+
+    @mock.patch.object(_proxy.Proxy, 'get_offer')
+    def test_get_offers_error(self, mock_get):
+        mock_get.side_effect = exceptions.HttpException('boom')
+        self.assertRaises(exceptions.HttpException,
+                          self.proxy.get_offers, ['o1'])
+
 
 class TestLease(TestESILEAPProxy):
     @mock.patch.object(lease.Lease, 'list')
@@ -78,6 +115,22 @@ class TestLease(TestESILEAPProxy):
     def test_delete_lease_ignore(self):
         self.verify_delete(self.proxy.delete_lease, lease.Lease, True)
 
+    @mock.patch.object(_proxy.Proxy, 'create_lease')
+    def test_create_leases(self, mock_create):
+        mock_create.side_effect = [ValueError('conflict'), 'lease']
+        results = self.proxy.create_leases([{'resource_uuid': 'n1'},
+                                            {'resource_uuid': 'n2'}],
+                                           max_workers=1)
+        self.assertEqual(['lease'], [r.result for r in results.succeeded])
+        self.assertEqual([{'resource_uuid': 'n1'}],
+                         [r.item for r in results.failed])
+
+    @mock.patch.object(_proxy.Proxy, 'update_lease')
+    def test_update_leases(self, mock_update):
+        results = self.proxy.update_leases({'l1': {'end_time': 'soon'}})
+        self.assertEqual(['l1'], [r.item for r in results.succeeded])
+        mock_update.assert_called_once_with('l1', end_time='soon')
+
 
 class TestNode(TestESILEAPProxy):
     @mock.patch.object(node.Node, 'list')
@@ -86,6 +139,17 @@ class TestNode(TestESILEAPProxy):
         self.assertIs(result, mock_list.return_value)
         mock_list.assert_called_once_with(self.proxy)
 
+    @mock.patch.object(node.Node, 'list')
+    def test_get_nodes(self, mock_list):
+        mock_list.return_value = [node.Node.existing(uuid='n1'),
+                                  node.Node.existing(uuid='n2')]
+        result = self.proxy.get_nodes(['n2', 'n3', 'n1'],
+                                      fields=['provision_state'])
+        self.assertEqual(['n2', 'n1'], [n.id for n in result.found])
+        self.assertEqual(['n3'], result.missing)
+        mock_list.assert_called_once_with(
+            self.proxy, fields=['provision_state', 'uuid'])
+
 
 class TestEvent(TestESILEAPProxy):
     @mock.patch.object(event.Event, 'list')
@@ -93,3 +157,13 @@ class TestEvent(TestESILEAPProxy):
         result = self.proxy.events(query=1)
         self.assertIs(result, mock_list.return_value)
         mock_list.assert_called_once_with(self.proxy, query=1)
+
+    def test_follow_events(self):
+        with mock.patch.object(self.proxy, 'events',
+                               return_value=[event.Event.existing(id=3),
+                                             event.Event.existing(id=2)]):
+            result = self.proxy.follow_events(last_event_id=1,
+                                              event_type='x')
+            self.assertEqual([2, 3], [next(result).id for _ in range(2)])
+            self.proxy.events.assert_called_once_with(event_type='x',
+                                                      last_event_id=1)
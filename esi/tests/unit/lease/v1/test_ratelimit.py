@@ -0,0 +1,144 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+from unittest import mock
+
+from esi.lease.v1 import _ratelimit
+
+from openstack.tests.unit import base
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestOperation(base.TestCase):
+    def test_operation(self):
+        self.assertEqual('read', _ratelimit.operation('get', '/offers'))
+        self.assertEqual('delete',
+                         _ratelimit.operation('DELETE', '/leases/l1'))
+        self.assertEqual('claim',
+                         _ratelimit.operation('POST', '/offers/o1/claim'))
+        self.assertEqual('write', _ratelimit.operation('POST', '/leases'))
+        self.assertEqual('write', _ratelimit.operation('PATCH', '/leases/l1'))
+
+
+class TestTokenBucket(base.TestCase):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = _ratelimit.TokenBucket(2, burst=3, clock=clock,
+                                        sleep=clock.sleep)
+        self.assertEqual([0.0, 0.0, 0.0],
+                         [bucket.acquire() for _ in range(3)])
+        self.assertEqual(0.5, bucket.acquire())
+        self.assertEqual(0.5, clock.now)
+        clock.now += 10
+        # The bucket refills up to its capacity only.
+        self.assertEqual([0.0, 0.0, 0.0],
+                         [bucket.acquire() for _ in range(3)])
+        self.assertEqual(0.5, bucket.acquire())
+
+    def test_default_burst(self):
+        self.assertEqual(3, _ratelimit.TokenBucket(2.5).burst)
+        self.assertEqual(1, _ratelimit.TokenBucket(0.2).burst)
+
+
+class TestRateLimiter(base.TestCase):
+    def test_unlimited(self):
+        limiter = _ratelimit.RateLimiter()
+        self.assertEqual('ok', limiter.call('read', lambda: 'ok'))
+        stats = limiter.stats()
+        self.assertEqual(1, stats['read']['requests'])
+        self.assertEqual(0, stats['read']['delayed'])
+        self.assertIsNone(stats['claim']['rate'])
+
+    def test_unknown_operation(self):
+        self.assertRaises(ValueError, _ratelimit.RateLimiter,
+                          {'bogus': {'rate': 1}})
+
+    def test_burst_without_rate(self):
+        self.assertRaises(ValueError, _ratelimit.RateLimiter,
+                          {'read': {'burst': 5, 'max_in_flight': 2}})
+
+    def test_rate(self):
+        clock = FakeClock()
+        limiter = _ratelimit.RateLimiter(
+            {'claim': {'rate': 1, 'burst': 1}}, clock=clock,
+            sleep=clock.sleep)
+        for _ in range(3):
+            limiter.call('claim', mock.Mock())
+            limiter.call('read', mock.Mock())
+        self.assertEqual(2.0, clock.now)
+        stats = limiter.stats()
+        self.assertEqual(
+            {'rate': 1.0, 'burst': 1.0, 'max_in_flight': None,
+             'requests': 3, 'delayed': 2, 'wait_time': 2.0, 'max_wait': 1.0,
+             'in_flight': 0},
+            stats['claim'])
+        self.assertEqual(0, stats['read']['delayed'])
+
+    def test_max_in_flight(self):
+        limiter = _ratelimit.RateLimiter({'read': {'max_in_flight': 2}})
+        lock = threading.Lock()
+        running = []
+        peak = []
+        release = threading.Event()
+
+        def send():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            release.wait(1)
+            with lock:
+                running.pop()
+
+        threads = [threading.Thread(target=limiter.call, args=('read', send))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(2, max(peak))
+        stats = limiter.stats()['read']
+        self.assertEqual(5, stats['requests'])
+        self.assertEqual(0, stats['in_flight'])
+
+    def test_error_releases(self):
+        limiter = _ratelimit.RateLimiter({'delete': {'max_in_flight': 1}})
+        send = mock.Mock(side_effect=RuntimeError)
+        self.assertRaises(RuntimeError, limiter.call, 'delete', send)
+        self.assertRaises(RuntimeError, limiter.call, 'delete', send)
+        self.assertEqual(0, limiter.stats()['delete']['in_flight'])
+
+    def test_from_config(self):
+        config = mock.Mock(config={'lease_rate_limit_claim': '5',
+                                   'lease_rate_burst_claim': '10',
+                                   'lease_max_in_flight_read': '20'})
+        stats = _ratelimit.RateLimiter.from_config(config).stats()
+        self.assertEqual(5.0, stats['claim']['rate'])
+        self.assertEqual(10.0, stats['claim']['burst'])
+        self.assertEqual(20, stats['read']['max_in_flight'])
+        self.assertIsNone(stats['write']['rate'])
+
+    def test_from_config_burst_without_rate(self):
+        config = mock.Mock(config={'lease_rate_burst_write': '10'})
+        self.assertRaises(ValueError, _ratelimit.RateLimiter.from_config,
+                          config)
@@ -0,0 +1,53 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from esi.lease.v1 import _record
+from esi.lease.v1 import event
+from esi.lease.v1 import lease
+from esi.lease.v1 import offer
+
+from openstack.tests.unit import base
+
+FAKE = {'uuid': 'lease_uuid',
+        'resource_type': 'ironic_node',
+        'resource_uuid': '1718',
+        'resource': 'node-1718',
+        'status': 'active',
+        'properties': {'cpu': 16}}
+
+
+class TestRecord(base.TestCase):
+    def test_attributes(self):
+        record = _record.record_type(lease.Lease)(FAKE)
+        self.assertEqual('lease_uuid', record.id)
+        self.assertEqual('lease_uuid', record.uuid)
+        self.assertEqual('ironic_node', record.node_type)
+        self.assertEqual('node-1718', record.resource_name)
+        self.assertEqual('active', record['status'])
+        self.assertIsNone(record.get('project_id'))
+        self.assertIs(FAKE['properties'], record.properties)
+        self.assertRaises(KeyError, record.__getitem__, 'bogus')
+        self.assertFalse(hasattr(record, '__dict__'))
+
+    def test_same_attributes_as_resource(self):
+        record = _record.record_type(offer.Offer)(FAKE)
+        resource = offer.Offer.existing(**FAKE)
+        for attr, value in record.to_dict().items():
+            self.assertEqual(getattr(resource, attr), value)
+
+    def test_event_id(self):
+        record = _record.record_type(event.Event)({'id': 42})
+        self.assertEqual(42, record.id)
+
+    def test_cached_type(self):
+        self.assertIs(_record.record_type(lease.Lease),
+                      _record.record_type(lease.Lease))
@@ -0,0 +1,141 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import email.utils
+import time
+from unittest import mock
+
+from keystoneauth1 import exceptions as ks_exceptions
+
+from esi.lease.v1 import _retry
+
+from openstack.tests.unit import base
+
+
+def fake_response(status_code, retry_after=None):
+    headers = {}
+    if retry_after is not None:
+        headers['Retry-After'] = retry_after
+    return mock.Mock(status_code=status_code, headers=headers)
+
+
+class TestRetryPolicy(base.TestCase):
+    def setUp(self):
+        super(TestRetryPolicy, self).setUp()
+        self.sleep = mock.Mock()
+        self.policy = _retry.RetryPolicy(max_attempts=3, backoff=1.0,
+                                         sleep=self.sleep)
+
+    def test_success(self):
+        response = fake_response(200)
+        self.assertIs(response, self.policy.call('GET', lambda: response))
+        self.sleep.assert_not_called()
+        self.assertEqual({'total': 0}, self.policy.stats())
+
+    def test_retry_status(self):
+        responses = [fake_response(503), fake_response(502),
+                     fake_response(200)]
+        send = mock.Mock(side_effect=responses)
+        self.assertIs(responses[2], self.policy.call('GET', send))
+        self.assertEqual(3, send.call_count)
+        responses[0].close.assert_called_once_with()
+        self.assertEqual({'503': 1, '502': 1, 'total': 2},
+                         self.policy.stats())
+
+    def test_exhausted(self):
+        send = mock.Mock(side_effect=[fake_response(503)] * 3)
+        self.assertEqual(503, self.policy.call('GET', send).status_code)
+        self.assertEqual(3, send.call_count)
+
+    def test_not_retried_status(self):
+        send = mock.Mock(return_value=fake_response(500))
+        self.policy.call('GET', send)
+        self.assertEqual(1, send.call_count)
+
+    def test_backoff_jitter(self):
+        send = mock.Mock(side_effect=[fake_response(503)] * 3)
+        with mock.patch.object(_retry.random, 'uniform',
+                               side_effect=lambda a, b: b) as uniform:
+            self.policy.call('GET', send)
+        uniform.assert_has_calls([mock.call(0, 1.0), mock.call(0, 2.0)])
+        self.sleep.assert_has_calls([mock.call(1.0), mock.call(2.0)])
+
+    def test_max_backoff(self):
+        policy = _retry.RetryPolicy(max_attempts=10, backoff=1.0,
+                                    max_backoff=4.0, sleep=self.sleep)
+        send = mock.Mock(side_effect=[fake_response(503)] * 10)
+        with mock.patch.object(_retry.random, 'uniform',
+                               side_effect=lambda a, b: b):
+            policy.call('GET', send)
+        self.assertEqual(4.0, max(c[0][0] for c in self.sleep.call_args_list))
+
+    def test_retry_after_seconds(self):
+        send = mock.Mock(side_effect=[fake_response(429, '7'),
+                                      fake_response(200)])
+        self.policy.call('GET', send)
+        self.sleep.assert_called_once_with(7.0)
+
+    def test_retry_after_date(self):
+        when = email.utils.formatdate(time.time() + 30, usegmt=True)
+        send = mock.Mock(side_effect=[fake_response(503, when),
+                                      fake_response(200)])
+        self.policy.call('GET', send)
+        self.assertAlmostEqual(30, self.sleep.call_args[0][0], delta=2)
+
+    def test_retry_after_too_long(self):
+        send = mock.Mock(return_value=fake_response(503, '3600'))
+        self.assertEqual(503, self.policy.call('GET', send).status_code)
+        self.assertEqual(1, send.call_count)
+
+    def test_connection_failure(self):
+        response = fake_response(200)
+        send = mock.Mock(side_effect=[ks_exceptions.ConnectFailure(),
+                                      response])
+        self.assertIs(response, self.policy.call('DELETE', send))
+        self.assertEqual({'ConnectFailure': 1, 'total': 1},
+                         self.policy.stats())
+
+    def test_connection_failure_exhausted(self):
+        send = mock.Mock(side_effect=ks_exceptions.ConnectTimeout())
+        self.assertRaises(ks_exceptions.ConnectTimeout,
+                          self.policy.call, 'GET', send)
+        self.assertEqual(3, send.call_count)
+
+    def test_post_not_retried(self):
+        send = mock.Mock(side_effect=ks_exceptions.ConnectFailure())
+        self.assertRaises(ks_exceptions.ConnectFailure,
+                          self.policy.call, 'POST', send)
+        send = mock.Mock(return_value=fake_response(503))
+        self.policy.call('PATCH', send)
+        self.assertEqual(1, send.call_count)
+
+    def test_post_retried_when_throttled(self):
+        send = mock.Mock(side_effect=[fake_response(429),
+                                      fake_response(201)])
+        self.assertEqual(201, self.policy.call('POST', send).status_code)
+        self.assertEqual(2, send.call_count)
+
+    def test_disabled(self):
+        policy = _retry.RetryPolicy(max_attempts=1, sleep=self.sleep)
+        send = mock.Mock(return_value=fake_response(503))
+        policy.call('GET', send)
+        self.assertEqual(1, send.call_count)
+
+    def test_from_config(self):
+        config = mock.Mock(config={'lease_retry_max_attempts': '5',
+                                   'lease_retry_backoff': '0.1',
+                                   'lease_retry_status_codes': '500,503'})
+        policy = _retry.RetryPolicy.from_config(config)
+        self.assertEqual(5, policy.max_attempts)
+        self.assertEqual(0.1, policy.backoff)
+        self.assertEqual(30.0, policy.max_backoff)
+        self.assertEqual((500, 503), policy.status_codes)
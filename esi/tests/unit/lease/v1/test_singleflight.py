@@ -0,0 +1,176 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import concurrent.futures
+import threading
+import time
+from unittest import mock
+
+from esi.lease.v1 import _singleflight
+from esi.lease.v1 import lease
+from esi.tests import fake_leap
+
+from openstack.tests import base as test_base
+from openstack.tests.unit import base
+
+
+class TestSingleFlight(base.TestCase):
+    def setUp(self):
+        super(TestSingleFlight, self).setUp()
+        self.flight = _singleflight.SingleFlight()
+        self.release = threading.Event()
+        self.runs = 0
+
+    def slow(self, result):
+        def func():
+            self.runs += 1
+            self.release.wait(5)
+            if isinstance(result, BaseException):
+                raise result
+            return result
+        return func
+
+    def run_concurrently(self, count, key, func, share=None):
+        pool = concurrent.futures.ThreadPoolExecutor(count)
+        self.addCleanup(pool.shutdown)
+        futures = [pool.submit(self.flight.do, key, func, share)
+                   for _ in range(count)]
+        # Wait until every caller joined the call in flight.
+        deadline = time.monotonic() + 5
+        while (self.flight.executed + self.flight.collapsed < count
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        self.release.set()
+        return futures
+
+    def test_coalesced(self):
+        futures = self.run_concurrently(5, 'k', self.slow('value'))
+        self.assertEqual(['value'] * 5, [f.result() for f in futures])
+        self.assertEqual(1, self.runs)
+        self.assertEqual({'executed': 1, 'collapsed': 4}, self.flight.stats())
+
+    def test_error_shared(self):
+        futures = self.run_concurrently(3, 'k', self.slow(ValueError('x')))
+        for future in futures:
+            self.assertRaises(ValueError, future.result)
+        self.assertEqual(1, self.runs)
+
+    def test_sequential_not_coalesced(self):
+        self.release.set()
+        self.flight.do('k', self.slow(1))
+        self.flight.do('k', self.slow(2))
+        self.assertEqual(2, self.runs)
+
+    def test_different_keys(self):
+        self.release.set()
+        self.assertEqual(1, self.flight.do(_singleflight.key('a', 1),
+                                           self.slow(1)))
+        self.assertEqual(2, self.flight.do(_singleflight.key('a', 2),
+                                           self.slow(2)))
+        self.assertEqual(0, self.flight.collapsed)
+
+    def test_shared_copy(self):
+        result = ['value']
+        futures = self.run_concurrently(3, 'k', self.slow(result),
+                                        share=lambda r: list(r) + ['copy'])
+        results = [f.result() for f in futures]
+        # The caller which ran the call gets the result, the others a copy.
+        self.assertEqual(1, sum(r is result for r in results))
+        self.assertEqual(2, results.count(['value', 'copy']))
+
+    def test_not_shared_alone(self):
+        self.release.set()
+        share = mock.Mock()
+        self.assertEqual(1, self.flight.do('k', self.slow(1), share))
+        share.assert_not_called()
+
+    def test_base_exception_shared(self):
+        class Stop(BaseException):
+            pass
+
+        futures = self.run_concurrently(3, 'k', self.slow(Stop()))
+        for future in futures:
+            self.assertRaises(Stop, future.result)
+        self.assertEqual(1, self.runs)
+
+
+# The unit test base mocks every HTTP request, so a plain one is used.
+class TestProxySingleFlight(test_base.TestCase):
+    def setUp(self):
+        super(TestProxySingleFlight, self).setUp()
+        self.leap = fake_leap.make_dataset(nodes=10)
+        server = fake_leap.FakeLeapServer(self.leap).start()
+        self.addCleanup(server.stop)
+        self.conn = server.connect()
+        self.proxy = self.conn.lease
+
+    def test_get_own_instances(self):
+        release = threading.Event()
+        get = self.leap.get
+
+        def slow_get(*args, **kwargs):
+            release.wait(5)
+            return get(*args, **kwargs)
+
+        self.leap.get = slow_get
+        uuid = next(iter(self.leap.leases.items))
+        leases = [lease.Lease(id=uuid), lease.Lease(id=uuid)]
+        pool = concurrent.futures.ThreadPoolExecutor(2)
+        self.addCleanup(pool.shutdown)
+        futures = [pool.submit(self.proxy.get_lease, res) for res in leases]
+        flight = self.proxy.single_flight
+        deadline = time.monotonic() + 5
+        while flight.collapsed < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+        self.assertEqual({'executed': 1, 'collapsed': 1}, flight.stats())
+        # Each caller gets its own instance back, refreshed.
+        self.assertIs(leases[0], results[0])
+        self.assertIs(leases[1], results[1])
+        for res in leases:
+            self.assertEqual(self.leap.leases.get(uuid)['status'],
+                             res.status)
+        leases[0].properties['mutated'] = True
+        self.assertNotIn('mutated', leases[1].properties)
+
+    def test_list_own_instances(self):
+        release = threading.Event()
+        list_ = self.leap.list
+
+        def slow_list(*args, **kwargs):
+            release.wait(5)
+            return list_(*args, **kwargs)
+
+        self.leap.list = slow_list
+        pool = concurrent.futures.ThreadPoolExecutor(3)
+        self.addCleanup(pool.shutdown)
+        futures = [pool.submit(self.conn.list_leases) for _ in range(3)]
+        flight = self.proxy.single_flight
+        deadline = time.monotonic() + 5
+        while flight.collapsed < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        results = [f.result() for f in futures]
+        self.assertEqual({'executed': 1, 'collapsed': 2}, flight.stats())
+        self.assertTrue(results[0])
+        for result in results[1:]:
+            self.assertEqual([res.id for res in results[0]],
+                             [res.id for res in result])
+            self.assertTrue(all(isinstance(res, lease.Lease)
+                                for res in result))
+            self.assertIsNot(results[0][0], result[0])
+        results[0][0].properties['mutated'] = True
+        results[1][0].name = 'renamed'
+        self.assertNotIn('mutated', results[1][0].properties)
+        self.assertNotIn('mutated', results[2][0].properties)
+        self.assertNotEqual('renamed', results[2][0].name)
@@ -0,0 +1,67 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+from esi.lease.v1 import _stream
+
+from openstack import exceptions
+from openstack.tests.unit import base
+
+BODY = {
+    'offers_links': [{'rel': 'next', 'href': '/offers?marker=9'}],
+    'offers': [{'uuid': str(i), 'score': i * 1.5,
+                'properties': {'name': 'nøde-%d' % i, 'tags': [1, None]}}
+               for i in range(10)],
+    'total': 10,
+}
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestStreamingObject(base.TestCase):
+    def test_chunk_sizes(self):
+        data = json.dumps(BODY, ensure_ascii=False).encode('utf-8')
+        for size in (1, 2, 5, 64, len(data)):
+            body = _stream.StreamingObject(chunked(data, size), 'offers')
+            self.assertEqual(BODY['offers'], list(body.items()))
+            self.assertEqual({'offers_links': BODY['offers_links'],
+                              'total': 10}, body.rest)
+
+    def test_incremental(self):
+        chunks = iter([b'{"offers": [{"uuid": "1"}, ', b'{"uuid": "2"}]}'])
+        body = _stream.StreamingObject(chunks, 'offers')
+        items = body.items()
+        self.assertEqual({'uuid': '1'}, next(items))
+        # Only the first chunk was needed for the first item.
+        self.assertEqual([b'{"uuid": "2"}]}'], list(chunks))
+
+    def test_single_object(self):
+        body = _stream.StreamingObject([b'{"offers": {"uuid": "1"}}'],
+                                       'offers')
+        self.assertEqual([{'uuid': '1'}], list(body.items()))
+
+    def test_empty(self):
+        for data in (b'{}', b'{"offers": []}', b' { "offers" : [ ] } '):
+            body = _stream.StreamingObject([data], 'offers')
+            self.assertEqual([], list(body.items()))
+
+    def test_truncated(self):
+        body = _stream.StreamingObject([b'{"offers": [{"uuid": "1"'],
+                                       'offers')
+        self.assertRaises(exceptions.SDKException, list, body.items())
+
+    def test_invalid(self):
+        body = _stream.StreamingObject([b'["offers"]'], 'offers')
+        self.assertRaises(exceptions.SDKException, list, body.items())
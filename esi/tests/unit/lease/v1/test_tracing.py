@@ -0,0 +1,189 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+from unittest import mock
+
+from opentelemetry.sdk import trace as sdk_trace
+from opentelemetry.sdk.trace import export
+from opentelemetry.sdk.trace.export import in_memory_span_exporter
+from opentelemetry import trace
+
+from esi.lease.v1 import _tracing
+from esi.tests import fake_leap
+
+from openstack import exceptions
+from openstack.tests import base as test_base
+from openstack.tests.unit import base
+
+
+class TestNoopTracer(base.TestCase):
+    def test_passthrough(self):
+        send = mock.Mock(return_value='response')
+        kwargs = {}
+        self.assertEqual('response',
+                         _tracing.NOOP.call('GET', '/offers', kwargs, send))
+        self.assertEqual({}, kwargs)
+        pages = iter([[1], [2]])
+        self.assertIs(pages, _tracing.NOOP.pages('list_offers', 'offer', {},
+                                                 pages))
+
+    def test_tracer_of_session(self):
+        self.assertIs(_tracing.NOOP, _tracing.tracer(object()))
+
+    def test_default_without_opentelemetry(self):
+        with mock.patch.object(_tracing, 'trace', None):
+            self.assertIs(_tracing.NOOP, _tracing.default())
+            self.assertRaises(RuntimeError, _tracing.Tracer)
+
+
+# The unit test base mocks every HTTP request, so a plain one is used.
+class TestProxyTracing(test_base.TestCase):
+    def setUp(self):
+        super(TestProxyTracing, self).setUp()
+        self.leap = fake_leap.make_dataset(nodes=10, page_size=4)
+        server = fake_leap.FakeLeapServer(self.leap).start()
+        self.addCleanup(server.stop)
+        self.proxy = server.connect().lease
+        self.exporter = in_memory_span_exporter.InMemorySpanExporter()
+        provider = sdk_trace.TracerProvider()
+        provider.add_span_processor(
+            export.SimpleSpanProcessor(self.exporter))
+        self.proxy.tracer = _tracing.Tracer(tracer_provider=provider)
+        self.sent = mock.patch.object(
+            self.proxy.session.session, 'request',
+            wraps=self.proxy.session.session.request).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def _spans(self):
+        return {span.name: span for span in self.exporter.get_finished_spans()}
+
+    def _traceparent(self, call):
+        return call[1]['headers']['traceparent']
+
+    def test_list(self):
+        self.assertEqual(
+            10, len(list(self.proxy.offers(node_type='ironic_node'))))
+        spans = self.exporter.get_finished_spans()
+        self.assertEqual(['list_offers page'] * 3 + ['list_offers'],
+                         [span.name for span in spans])
+        listing = spans[-1]
+        self.assertEqual('offer', listing.attributes['esi.lease.resource_type'])
+        self.assertEqual('ironic_node',
+                         listing.attributes['esi.lease.query.node_type'])
+        self.assertEqual(3, listing.attributes['esi.lease.pages'])
+        self.assertEqual(10, listing.attributes['esi.lease.items'])
+        self.assertEqual([1, 2, 3],
+                         [s.attributes['esi.lease.page'] for s in spans[:3]])
+        self.assertEqual([4, 4, 2],
+                         [s.attributes['esi.lease.items'] for s in spans[:3]])
+        for span, call in zip(spans, self.sent.call_args_list):
+            self.assertEqual(listing.context.span_id, span.parent.span_id)
+            self.assertEqual(trace.SpanKind.CLIENT, span.kind)
+            self.assertEqual(200,
+                             span.attributes['http.response.status_code'])
+            self.assertIn('%032x-%016x' % (span.context.trace_id,
+                                           span.context.span_id),
+                          self._traceparent(call))
+
+    def test_list_stream(self):
+        self.assertEqual(10, len(list(self.proxy.nodes(stream=True))))
+        spans = self.exporter.get_finished_spans()
+        self.assertEqual([4, 4, 2],
+                         [s.attributes['esi.lease.items'] for s in spans[:3]])
+        self.assertEqual(10, spans[-1].attributes['esi.lease.items'])
+
+    def test_list_abandoned(self):
+        listing = self.proxy.offers()
+        next(listing)
+        listing.close()
+        spans = self._spans()
+        self.assertEqual({'list_offers page', 'list_offers'}, set(spans))
+        self.assertTrue(spans['list_offers'].status.is_ok)
+
+    def test_call_and_error(self):
+        offer = self.proxy.get_offer(next(iter(self.leap.offers.items)))
+        start, end = offer.availabilities[0]
+        self.proxy.claim_offer(offer, start_time=start, end_time=end)
+        self.assertRaises(exceptions.ConflictException,
+                          self.proxy.claim_offer, offer,
+                          start_time=start, end_time=end)
+        spans = self.exporter.get_finished_spans()
+        self.assertEqual(['get_offer', 'claim_offer', 'claim_offer'],
+                         [span.name for span in spans])
+        self.assertEqual('offer', spans[0].attributes['esi.lease.resource_type'])
+        self.assertEqual('POST', spans[1].attributes['http.request.method'])
+        self.assertTrue(spans[1].status.is_ok)
+        self.assertEqual(409, spans[2].attributes['http.response.status_code'])
+        self.assertEqual(trace.StatusCode.ERROR, spans[2].status.status_code)
+        for span, call in zip(spans, self.sent.call_args_list):
+            self.assertIn('%016x' % span.context.span_id,
+                          self._traceparent(call))
+
+    def test_page_error(self):
+        self.leap.list = mock.Mock(
+            side_effect=fake_leap.HTTPError(500, 'broken'))
+        self.assertRaises(exceptions.HttpException, list,
+                          self.proxy.offers())
+        spans = self._spans()
+        self.assertEqual(trace.StatusCode.ERROR,
+                         spans['list_offers page'].status.status_code)
+        self.assertEqual(trace.StatusCode.ERROR,
+                         spans['list_offers'].status.status_code)
+
+    def test_parent_context(self):
+        with self._caller():
+            list(self.proxy.nodes())
+        spans = self._spans()
+        self.assertEqual(spans['caller'].context.span_id,
+                         spans['list_nodes'].parent.span_id)
+
+    def test_noop(self):
+        self.proxy.tracer = _tracing.NOOP
+        list(self.proxy.nodes())
+        self.assertEqual((), self.exporter.get_finished_spans())
+        self.assertNotIn('traceparent',
+                         self.sent.call_args[1]['headers'])
+
+    def test_setting(self):
+        server = fake_leap.FakeLeapServer(self.leap).start()
+        self.addCleanup(server.stop)
+        self.assertIsInstance(server.connect().lease.tracer, _tracing.Tracer)
+        conn = server.connect(lease_tracing=False)
+        self.assertIs(_tracing.NOOP, conn.lease.tracer)
+
+    def _caller(self):
+        provider = sdk_trace.TracerProvider()
+        provider.add_span_processor(
+            export.SimpleSpanProcessor(self.exporter))
+        return provider.get_tracer(__name__).start_as_current_span('caller')
+
+    def test_prefetch_context(self):
+        with self._caller():
+            self.assertEqual(10, len(list(self.proxy.offers(prefetch=2))))
+        spans = self.exporter.get_finished_spans()
+        caller = spans[-1]
+        self.assertEqual('caller', caller.name)
+        self.assertEqual({caller.context.trace_id},
+                         {span.context.trace_id for span in spans})
+        self.assertEqual(caller.context.span_id,
+                         self._spans()['list_offers'].parent.span_id)
+
+    def test_bulk_context(self):
+        uuids = list(self.leap.offers.items)[:3]
+        with self._caller():
+            self.assertEqual(3, len(self.proxy.get_offers(uuids).found))
+        spans = self.exporter.get_finished_spans()
+        caller = spans[-1]
+        gets = [span for span in spans if span.name == 'get_offer']
+        self.assertEqual(3, len(gets))
+        for span in gets:
+            self.assertEqual(caller.context.span_id, span.parent.span_id)
@@ -0,0 +1,76 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+import os
+import tempfile
+
+from esi.tests.benchmarks import micro
+from esi.tests.benchmarks import throughput
+
+from openstack.tests import base as test_base
+from openstack.tests.unit import base
+
+
+class TestCompare(base.TestCase):
+    def test_percentile(self):
+        samples = list(range(1, 101))
+        self.assertEqual(50, throughput.percentile(samples, 50))
+        self.assertEqual(99, throughput.percentile(samples, 99))
+        self.assertEqual(7, throughput.percentile([7], 95))
+
+    def test_compare(self):
+        baseline = {'list_offers': {'objects_per_second': 1000,
+                                    'seconds': 1.0},
+                    'get_offer': {'p50_ms': 10.0, 'count': 5}}
+        results = {'list_offers': {'objects_per_second': 700,
+                                   'seconds': 1.4},
+                   'get_offer': {'p50_ms': 11.0, 'count': 50},
+                   'claim_offer': {'p50_ms': 3.0}}
+        regressions = throughput.compare(results, baseline, tolerance=0.2)
+        self.assertEqual(1, len(regressions))
+        self.assertIn('list_offers objects_per_second', regressions[0])
+        self.assertEqual([], throughput.compare(baseline, results))
+
+
+class TestMicro(base.TestCase):
+    def test_cases(self):
+        for name, op in micro.cases().items():
+            self.assertIsNotNone(op(), name)
+
+    def test_run(self):
+        results = micro.run(['hydrate_event', 'transpose'], repeat=1,
+                            min_time=0.01)
+        self.assertEqual({'hydrate_event', 'query_transpose'}, set(results))
+        metrics = results['hydrate_event']
+        self.assertGreater(metrics['ns_per_op'], 0)
+        self.assertGreater(metrics['bytes_per_op'], 0)
+        self.assertEqual([], throughput.compare(results, results))
+
+
+# The unit test base mocks every HTTP request, so a plain one is used.
+class TestRun(test_base.TestCase):
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, 'results.json')
+            self.assertEqual(0, throughput.main(
+                ['--nodes', '20', '--iterations', '3', '--output', output]))
+            with open(output) as f:
+                report = json.load(f)
+            self.assertEqual(0, throughput.main(
+                ['--nodes', '20', '--iterations', '3', '--baseline', output,
+                 '--tolerance', '1000']))
+        results = report['results']
+        self.assertEqual(20, results['list_offers']['objects'])
+        self.assertEqual(3, results['claim_offer']['count'])
+        self.assertGreater(results['list_offers_memory']['peak_bytes'], 0)
+        self.assertEqual(20, report['meta']['nodes'])
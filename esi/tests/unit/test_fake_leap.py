@@ -0,0 +1,144 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import concurrent.futures
+import time
+
+import requests
+
+from esi.tests import fake_leap
+
+from openstack import exceptions
+from openstack.tests import base as test_base
+from openstack.tests.unit import base
+
+
+class TestFakeLeap(base.TestCase):
+    def setUp(self):
+        super(TestFakeLeap, self).setUp()
+        self.leap = fake_leap.make_dataset(nodes=50, lease_ratio=0.5,
+                                           page_size=7)
+
+    def test_dataset_deterministic(self):
+        other = fake_leap.make_dataset(nodes=50, lease_ratio=0.5)
+        self.assertEqual(list(self.leap.nodes.items),
+                         list(other.nodes.items))
+        self.assertEqual(list(self.leap.offers.items),
+                         list(other.offers.items))
+        self.assertEqual(50, len(self.leap.offers))
+        self.assertEqual(50 + 2 * len(self.leap.leases),
+                         len(self.leap.events))
+
+    def test_list_pages(self):
+        body = self.leap.list('offers', {}, prefix='/v1')
+        self.assertEqual(7, len(body['offers']))
+        self.assertEqual('next', body['links'][0]['rel'])
+        self.assertTrue(body['links'][0]['href'].startswith('/v1/offers?'))
+        seen, marker = [], None
+        while True:
+            query = {'limit': '20'}
+            if marker:
+                query['marker'] = marker
+            body = self.leap.list('offers', query)
+            seen.extend(o['uuid'] for o in body['offers'])
+            if 'links' not in body:
+                break
+            marker = seen[-1]
+        self.assertEqual(sorted(self.leap.offers.items), seen)
+
+    def test_list_unknown_query(self):
+        self.assertRaises(fake_leap.HTTPError, self.leap.list, 'nodes',
+                          {'resource_uuid': 'x'})
+
+    def test_list_fields(self):
+        body = self.leap.list('leases', {'fields': 'uuid,status'})
+        self.assertEqual({'uuid', 'status'}, set(body['leases'][0]))
+
+    def test_claim_conflict(self):
+        offer = next(iter(self.leap.offers.items.values()))
+        window = self.leap.get('offers', offer['uuid'])['availabilities'][-1]
+        body = {'start_time': window[0], 'end_time': window[1]}
+        lease = self.leap.claim_offer(offer['uuid'], body)
+        self.assertEqual(offer['uuid'], lease['offer_uuid'])
+        e = self.assertRaises(fake_leap.HTTPError, self.leap.claim_offer,
+                              offer['uuid'], body)
+        self.assertEqual(409, e.status)
+        self.leap.delete_lease(lease['uuid'])
+        self.leap.claim_offer(offer['uuid'], body)
+
+
+# The unit test base mocks every HTTP request, so a plain one is used.
+class TestFakeLeapServer(test_base.TestCase):
+    def setUp(self):
+        super(TestFakeLeapServer, self).setUp()
+        self.leap = fake_leap.make_dataset(nodes=30, page_size=4)
+        self.server = fake_leap.FakeLeapServer(self.leap).start()
+        self.addCleanup(self.server.stop)
+        self.conn = self.server.connect()
+
+    def test_list(self):
+        offers = list(self.conn.lease.offers())
+        self.assertEqual(30, len(offers))
+        self.assertEqual(sorted(self.leap.offers.items),
+                         [o.id for o in offers])
+
+    def test_filters(self):
+        node = next(iter(self.leap.nodes.items.values()))
+        offers = list(self.conn.lease.offers(resource_uuid=node['uuid']))
+        self.assertEqual([node['uuid']], [o.resource_uuid for o in offers])
+        nodes = list(self.conn.lease.nodes(name=node['name']))
+        self.assertEqual([node['uuid']], [n.id for n in nodes])
+        leases = list(self.conn.lease.leases(status='any'))
+        self.assertEqual(len(self.leap.leases), len(leases))
+
+    def test_claim_and_events(self):
+        offer = next(o for o in self.conn.lease.offers()
+                     if len(o.availabilities) == 1)
+        last_event_id = len(self.leap.events)
+        start, end = offer.availabilities[0]
+        lease = self.conn.lease.claim_offer(offer, start_time=start,
+                                            end_time=end)
+        self.assertRaises(exceptions.ConflictException,
+                          self.conn.lease.claim_offer, offer,
+                          start_time=start, end_time=end)
+        self.conn.lease.delete_lease(lease['uuid'])
+        self.assertEqual('deleted',
+                         self.conn.lease.get_lease(lease['uuid']).status)
+        events = list(self.conn.lease.events(last_event_id=last_event_id))
+        self.assertEqual(['esi_leap.lease.create.end',
+                          'esi_leap.offer.claim.end',
+                          'esi_leap.lease.delete.end'],
+                         [e.event_type for e in events])
+
+    def test_not_found(self):
+        self.assertRaises(exceptions.ResourceNotFound,
+                          self.conn.lease.get_offer, 'missing')
+
+    def test_etag(self):
+        url = self.server.url + '/nodes'
+        first = requests.get(url)
+        second = requests.get(url, headers={
+            'If-None-Match': first.headers['ETag']})
+        self.assertEqual(304, second.status_code)
+
+    def test_latency(self):
+        server = fake_leap.FakeLeapServer(self.leap, latency=0.05).start()
+        self.addCleanup(server.stop)
+        started = time.monotonic()
+        requests.get(server.url + '/nodes')
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+    def test_concurrent_requests_counted(self):
+        url = self.server.url + '/nodes'
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: requests.get(url), range(40)))
+        self.assertEqual(40, self.server.requests)
@@ -0,0 +1,57 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import re
+import subprocess
+import sys
+
+from openstack.tests.unit import base
+
+# The import time budget of "import esi", in microseconds. It takes about
+# a millisecond, and loading openstack hundreds of them, so this generous
+# budget only fails when something heavy is imported eagerly again.
+IMPORT_BUDGET = 150000
+
+# Packages which must not be loaded by "import esi", besides esi modules.
+HEAVY_PACKAGES = ('openstack', 'keystoneauth1', 'yaml', 'requests',
+                  'aiohttp', 'dogpile')
+
+
+def run(code):
+    return subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, check=True)
+
+
+class TestImport(base.TestCase):
+    def test_lazy_modules(self):
+        result = run('import sys, esi; print(",".join(sys.modules))')
+        loaded = result.stdout.strip().split(',')
+        self.assertEqual([], [m for m in loaded
+                              if m.split('.')[0] in HEAVY_PACKAGES
+                              or m.startswith('esi.')])
+
+    def test_import_budget(self):
+        # The best of a few runs, so a loaded machine does not fail it.
+        timings = []
+        for _ in range(3):
+            result = run('import esi')
+            timings.append(int(re.search(
+                r'^import time:\s+\d+ \|\s+(\d+) \| esi$',
+                result.stderr, re.M).group(1)))
+        self.assertLess(min(timings), IMPORT_BUDGET)
+
+    def test_lazy_attributes(self):
+        result = run('import esi, sys; '
+                     'print(esi.ESIConnection.__module__); '
+                     'print("openstack" in sys.modules)')
+        self.assertEqual(['esi.connection', 'True'],
+                         result.stdout.split())
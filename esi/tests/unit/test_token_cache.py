@@ -0,0 +1,108 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+import os
+import stat
+import tempfile
+from unittest import mock
+
+from keystoneauth1 import fixture
+from keystoneauth1.identity import v3
+from keystoneauth1 import session as ks_session
+
+from esi import _token_cache
+
+from openstack.tests.unit import base
+
+AUTH_URL = 'https://identity.example.com/v3'
+
+
+class TestTokenCache(base.TestCase):
+    def setUp(self):
+        super(TestTokenCache, self).setUp()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = os.path.join(tmp.name, 'tokens')
+        self.cache = _token_cache.TokenCache(self.directory)
+        self.register_token(fixture.V3Token())
+
+    def register_token(self, token):
+        token.set_project_scope()
+        self.auth_request = self.adapter.register_uri(
+            'POST', AUTH_URL + '/auth/tokens', json=token,
+            headers={'X-Subject-Token': 'token-id'})
+
+    def plugin(self, username='user'):
+        return v3.Password(auth_url=AUTH_URL, username=username,
+                           password='secret', user_domain_id='default',
+                           project_id='project')
+
+    def test_reused(self):
+        first = self.plugin()
+        self.cache.attach(first)
+        self.assertEqual('token-id', first.get_token(ks_session.Session()))
+        self.assertEqual(1, self.auth_request.call_count)
+
+        path = os.path.join(self.directory, first.get_cache_id() + '.json')
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(path).st_mode))
+        self.assertEqual(0o700,
+                         stat.S_IMODE(os.stat(self.directory).st_mode))
+
+        second = self.plugin()
+        self.cache.attach(second)
+        self.assertEqual('token-id', second.get_token(ks_session.Session()))
+        self.assertEqual(1, self.auth_request.call_count)
+
+    def test_existing_directory_restricted(self):
+        os.makedirs(self.directory, mode=0o755)
+        os.chmod(self.directory, 0o755)
+        plugin = self.plugin()
+        self.cache.attach(plugin)
+        plugin.get_token(ks_session.Session())
+        self.assertEqual(0o700,
+                         stat.S_IMODE(os.stat(self.directory).st_mode))
+
+    def test_other_user(self):
+        self.cache.attach(self.plugin())
+        self.plugin().get_token(ks_session.Session())
+        other = self.plugin(username='other')
+        self.assertFalse(self.cache.load(other))
+
+    def test_expiring(self):
+        self.register_token(fixture.V3Token(
+            expires=datetime.datetime.utcnow() + datetime.timedelta(
+                seconds=10)))
+        first = self.plugin()
+        self.cache.attach(first)
+        first.get_token(ks_session.Session())
+        self.assertFalse(self.cache.load(self.plugin()))
+
+    def test_corrupt(self):
+        plugin = self.plugin()
+        os.makedirs(self.directory)
+        with open(os.path.join(self.directory,
+                               plugin.get_cache_id() + '.json'), 'w') as f:
+            f.write('{')
+        self.assertFalse(self.cache.load(plugin))
+        self.assertIsNone(plugin.auth_ref)
+
+    def test_from_config(self):
+        self.assertIsNone(_token_cache.TokenCache.from_config(
+            mock.Mock(config={})))
+        cache = _token_cache.TokenCache.from_config(
+            mock.Mock(config={'token_cache': 'True'}))
+        self.assertEqual(os.path.expanduser(_token_cache.DEFAULT_DIRECTORY),
+                         cache.directory)
+        cache = _token_cache.TokenCache.from_config(
+            mock.Mock(config={'token_cache': self.directory}))
+        self.assertEqual(self.directory, cache.directory)